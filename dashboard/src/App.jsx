@@ -201,38 +201,40 @@ export default function App() {
   const [showSourceModal, setShowSourceModal] = useState(false);
   const [activeTabSource, setActiveTabSource] = useState("recommended"); // recommended, rss, twitter
 
+  const showEvents = (data) => {
+    // Sorting logic
+    const sorted = [...data].sort((a, b) => {
+      if (sortBy === "urgency") {
+        const scoreA =
+          (a.urgency === "urgent" ? 1000 : 0) +
+          (a.impact === "high" ? 100 : 0);
+        const scoreB =
+          (b.urgency === "urgent" ? 1000 : 0) +
+          (b.impact === "high" ? 100 : 0);
+        return (
+          scoreB - scoreA || new Date(b.timestamp) - new Date(a.timestamp)
+        );
+      }
+      if (sortBy === "impact") {
+        const score = (ev) =>
+          ev.impact === "high" ? 3 : ev.impact === "medium" ? 2 : 1;
+        return (
+          score(b) - score(a) ||
+          new Date(b.timestamp) - new Date(a.timestamp)
+        );
+      }
+      return new Date(b.timestamp) - new Date(a.timestamp);
+    });
+
+    setEvents(sorted);
+    setStatus("ready");
+    setLastUpdated(new Date()); // Update timestamp on success
+  };
+
   const loadEvents = () => {
     setStatus("loading");
     return fetchEvents({ impact, type, region: "all" })
-      .then((data) => {
-        // Sorting logic
-        const sorted = [...data].sort((a, b) => {
-          if (sortBy === "urgency") {
-            const scoreA =
-              (a.urgency === "urgent" ? 1000 : 0) +
-              (a.impact === "high" ? 100 : 0);
-            const scoreB =
-              (b.urgency === "urgent" ? 1000 : 0) +
-              (b.impact === "high" ? 100 : 0);
-            return (
-              scoreB - scoreA || new Date(b.timestamp) - new Date(a.timestamp)
-            );
-          }
-          if (sortBy === "impact") {
-            const score = (ev) =>
-              ev.impact === "high" ? 3 : ev.impact === "medium" ? 2 : 1;
-            return (
-              score(b) - score(a) ||
-              new Date(b.timestamp) - new Date(a.timestamp)
-            );
-          }
-          return new Date(b.timestamp) - new Date(a.timestamp);
-        });
-
-        setEvents(sorted);
-        setStatus("ready");
-        setLastUpdated(new Date()); // Update timestamp on success
-      })
+      .then(showEvents)
       .catch((err) => {
         setError(err.message || "Failed to load events");
         setStatus("error");
@@ -269,6 +271,11 @@ export default function App() {
     loadEvents();
   }, [impact, type, sortBy]);
 
+  // Push: eventos novos chegam pelo /stream sem esperar o próximo refresh
+  useEffect(() => {
+    return streamEvents({ impact, type, region: "all" }, showEvents);
+  }, [impact, type, sortBy]);
+
   const handleCreateSource = (event) => {
     event.preventDefault();
     setSourceStatus("loading");
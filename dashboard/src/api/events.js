@@ -1,4 +1,84 @@
-export async function fetchEvents({ impact, type, region }) {
+// Delta-sync: carga completa uma vez (header X-Sync-Cursor) e, depois,
+// só o que mudou (?since=cursor → items/deleted), aplicado sobre o cache local.
+function createDeltaSync(path, params, idField, sortField, limit) {
+  const items = new Map();
+  let cursor = null;
+
+  const snapshot = () =>
+    [...items.values()]
+      .sort((a, b) => String(b[sortField]).localeCompare(String(a[sortField])))
+      .slice(0, limit);
+
+  const load = async () => {
+    const response = await fetch(`${path}?${params}`);
+    if (!response.ok) {
+      throw new Error(`Failed to load ${path}`);
+    }
+    items.clear();
+    for (const item of await response.json()) {
+      items.set(item[idField], item);
+    }
+    cursor = response.headers.get("X-Sync-Cursor");
+  };
+
+  // Trim: mantém só as mais recentes (o que a lista completa devolveria)
+  const trimmed = () => {
+    const current = snapshot();
+    if (items.size > current.length) {
+      items.clear();
+      for (const item of current) {
+        items.set(item[idField], item);
+      }
+    }
+    return current;
+  };
+
+  async function sync() {
+    if (cursor === null) {
+      await load();
+      return snapshot();
+    }
+    let hasMore = true;
+    while (hasMore) {
+      const query = new URLSearchParams(params);
+      query.set("since", cursor);
+      const response = await fetch(`${path}?${query}`);
+      if (!response.ok) {
+        throw new Error(`Failed to sync ${path}`);
+      }
+      const delta = await response.json();
+      if (delta.reset) {
+        await load();
+        return snapshot();
+      }
+      for (const id of delta.deleted) {
+        items.delete(id);
+      }
+      for (const item of delta.items) {
+        items.set(item[idField], item);
+      }
+      cursor = String(delta.cursor);
+      hasMore = delta.has_more;
+    }
+    return trimmed();
+  }
+
+  // Itens recebidos por push (GET /stream): entram direto no cache local;
+  // o próximo delta os reentrega sem efeito (merge por id)
+  sync.push = (pushed) => {
+    for (const item of pushed) {
+      items.set(item[idField], item);
+    }
+    return trimmed();
+  };
+  sync.loaded = () => cursor !== null;
+
+  return sync;
+}
+
+const eventSyncs = new Map();
+
+function eventParams({ impact, type, region }) {
   const params = new URLSearchParams();
   if (impact && impact !== "all") {
     params.set("impact", impact);
@@ -9,13 +89,99 @@ export async function fetchEvents({ impact, type, region }) {
   if (region && region !== "all") {
     params.set("region", region);
   }
+  return params;
+}
+
+function eventSync(filters) {
+  const params = eventParams(filters);
+  params.set("view", "card");
+  const key = params.toString();
+  if (!eventSyncs.has(key)) {
+    eventSyncs.set(key, createDeltaSync("/events", params, "id", "timestamp", 500));
+  }
+  return eventSyncs.get(key);
+}
 
-  const url = params.toString() ? `/events?${params}` : "/events";
-  const response = await fetch(url);
-  if (!response.ok) {
-    throw new Error("Failed to load events");
+export async function fetchEvents({ impact, type, region }) {
+  return eventSync({ impact, type, region })();
+}
+
+const predictionSyncs = new Map();
+
+function predictionSync(limit) {
+  const params = new URLSearchParams({ limit: String(limit), view: "card" });
+  const key = params.toString();
+  if (!predictionSyncs.has(key)) {
+    predictionSyncs.set(key, createDeltaSync("/predictions", params, "event_id", "predicted_at", limit));
   }
-  return response.json();
+  return predictionSyncs.get(key);
+}
+
+export async function syncPredictions({ limit = 250 } = {}) {
+  return predictionSync(limit)();
+}
+
+// Push (SSE): GET /stream avisa eventos/predições novos assim que são gravados.
+// "resync" (mensagens perdidas) e reconexões disparam o delta-sync.
+// Retorna a função que fecha a conexão.
+export function subscribeStream(params, { onItems, onResync }) {
+  const source = new EventSource(`/stream?${params}`);
+  let connected = false;
+  let pending = [];
+  let timer = null;
+
+  // Agrupa rajadas (um flush do inference publica várias predições de uma vez)
+  const flush = () => {
+    timer = null;
+    const items = pending;
+    pending = [];
+    onItems(items);
+  };
+  const onMessage = (message) => {
+    pending.push(JSON.parse(message.data));
+    timer = timer || setTimeout(flush, 250);
+  };
+
+  source.addEventListener("events", onMessage);
+  source.addEventListener("predictions", onMessage);
+  source.addEventListener("resync", () => onResync());
+  source.onopen = () => {
+    // Reconexão: o que foi publicado enquanto estava fora só vem pelo delta
+    if (connected) {
+      onResync();
+    }
+    connected = true;
+  };
+
+  return () => {
+    clearTimeout(timer);
+    source.close();
+  };
+}
+
+function streamInto(sync, params, onData) {
+  const resync = () => sync().then(onData).catch((err) => console.error(err));
+  return subscribeStream(params, {
+    onItems: (items) => {
+      if (sync.loaded()) {
+        onData(sync.push(items));
+      } else {
+        resync();
+      }
+    },
+    onResync: resync,
+  });
+}
+
+export function streamEvents({ impact, type, region }, onData) {
+  const params = eventParams({ impact, type, region });
+  params.set("types", "events");
+  return streamInto(eventSync({ impact, type, region }), params, onData);
+}
+
+export function streamPredictions({ limit = 250 } = {}, onData) {
+  const params = new URLSearchParams({ types: "predictions" });
+  return streamInto(predictionSync(limit), params, onData);
 }
 
 export async function fetchGeoSummary() {
@@ -53,3 +219,23 @@ export async function fetchNarratives() {
   }
   return response.json();
 }
+
+export async function fetchTimeseries({ resolution = "1h", dimension = "sector", key, points = 24 } = {}) {
+  const params = new URLSearchParams({ resolution, dimension, points: String(points) });
+  if (key) {
+    params.set("key", key);
+  }
+  const response = await fetch(`/timeseries?${params}`);
+  if (!response.ok) {
+    throw new Error("Failed to load timeseries");
+  }
+  return response.json();
+}
+
+export async function fetchMood() {
+  const response = await fetch("/mood");
+  if (!response.ok) {
+    throw new Error("Failed to load mood");
+  }
+  return response.json();
+}
@@ -1,5 +1,5 @@
 import React, { useState, useEffect } from "react";
-import { fetchNarratives } from "../api/events";
+import { fetchNarratives, subscribeStream } from "../api/events";
 import {
   Newspaper,
   TrendingUp,
@@ -127,6 +127,25 @@ const IntelligenceFeed = ({
     return () => clearInterval(interval);
   }, []);
 
+  // Push: evento novo muda as narrativas; recarrega (agrupado em 5s)
+  useEffect(() => {
+    let timer = null;
+    const schedule = () => {
+      timer = timer || setTimeout(() => {
+        timer = null;
+        loadNarratives();
+      }, 5000);
+    };
+    const close = subscribeStream(new URLSearchParams({ types: "events" }), {
+      onItems: schedule,
+      onResync: schedule,
+    });
+    return () => {
+      clearTimeout(timer);
+      close();
+    };
+  }, []);
+
   const loadNarratives = async () => {
     try {
       // Don't set loading to true on background refresh if we have data
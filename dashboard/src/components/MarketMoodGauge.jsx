@@ -1,5 +1,9 @@
-import React from "react";
+import React, { useEffect, useState } from "react";
 import { PieChart, Pie, Cell, ResponsiveContainer } from "recharts";
+import { fetchMood } from "../api/events";
+
+// Polaridade média → 0-100 (0.2 de polaridade já é euforia/pânico)
+const moodScore = (value) => Math.round(Math.min(Math.max(50 + value * 250, 0), 100));
 
 const MarketMoodGauge = ({ isDark, language }) => {
   const t = {
@@ -9,7 +13,7 @@ const MarketMoodGauge = ({ isDark, language }) => {
       neutral: "Neutro",
       bullish: "Otimista",
       greedLevel: "Nível de Ganância",
-      status: "OTIMISTA",
+      status: { Bullish: "OTIMISTA", Bearish: "PESSIMISTA", Neutral: "NEUTRO" },
     },
     en: {
       title: "Market Sentiment",
@@ -17,7 +21,7 @@ const MarketMoodGauge = ({ isDark, language }) => {
       neutral: "Neutral",
       bullish: "Bullish",
       greedLevel: "Greed Level",
-      status: "BULLISH",
+      status: { Bullish: "BULLISH", Bearish: "BEARISH", Neutral: "NEUTRAL" },
     },
   };
   const strings = language === "pt" ? t.pt : t.en;
@@ -28,8 +32,24 @@ const MarketMoodGauge = ({ isDark, language }) => {
     { name: strings.bullish, value: 33, color: "#22c55e" }, // Green
   ];
 
-  // needle value (mocked for now, can be dynamic later)
-  const needleValue = 75; // 0-100 range, 75 is bullish
+  // Humor atual (EWMA no Redis): GET /mood é barato, atualiza a cada segundo
+  const [mood, setMood] = useState({ label: "Neutral", value: 0 });
+
+  useEffect(() => {
+    let active = true;
+    const load = () =>
+      fetchMood()
+        .then((data) => active && setMood(data))
+        .catch(() => {});
+    load();
+    const interval = setInterval(load, 1000);
+    return () => {
+      active = false;
+      clearInterval(interval);
+    };
+  }, []);
+
+  const needleValue = moodScore(mood.value); // 0-100, >50 é otimista
 
   return (
     <div className="flex flex-col items-center justify-center h-full relative">
@@ -63,10 +83,10 @@ const MarketMoodGauge = ({ isDark, language }) => {
         {/* Needle / Text Overlay */}
         <div className="absolute bottom-6 flex flex-col items-center">
           <span className="text-2xl font-black text-slate-800 dark:text-white tracking-tighter">
-            {strings.status}
+            {strings.status[mood.label] || strings.status.Neutral}
           </span>
           <span className="text-[10px] text-slate-400 uppercase tracking-widest">
-            {strings.greedLevel}
+            {strings.greedLevel}: {needleValue}
           </span>
         </div>
       </div>
@@ -9,6 +9,7 @@ import {
   ArrowUpRight,
   Brain,
 } from "lucide-react";
+import { syncPredictions } from "../api/events";
 
 /**
  * OpportunityRadar — Detects actionable investment signals from event data.
@@ -22,11 +23,7 @@ const OpportunityRadar = ({ events, isDark, language }) => {
   useEffect(() => {
     const fetchPredictions = async () => {
       try {
-        const res = await fetch("/predictions?limit=250");
-        if (res.ok) {
-          const data = await res.json();
-          setPredictions(data);
-        }
+        setPredictions(await syncPredictions({ limit: 250 }));
       } catch (err) {
         console.error("[OpportunityRadar] Failed to fetch predictions:", err);
       }
@@ -10,6 +10,7 @@ import {
   ChevronRight,
   ArrowUpDown,
 } from "lucide-react";
+import { streamPredictions, syncPredictions } from "../api/events";
 
 const CONFIDENCE_CONFIG = {
   high: {
@@ -72,30 +73,27 @@ const PredictionRadar = ({ isDark, language, refreshInterval = 30000 }) => {
       if (isInitial) setLoading(true);
       else setRefreshing(true);
 
-      const [predRes, statsRes] = await Promise.all([
-        fetch("/predictions?limit=250"),
+      const [data, statsRes] = await Promise.all([
+        syncPredictions({ limit: 250 }),
         fetch("/predictions/stats"),
       ]);
 
-      if (predRes.ok) {
-        const data = await predRes.json();
-        // Only update if events actually changed (new/removed events or probability changed)
-        const oldMap = new Map(
-          predictions.map((p) => [p.event_id, p.probability]),
+      // Only update if events actually changed (new/removed events or probability changed)
+      const oldMap = new Map(
+        predictions.map((p) => [p.event_id, p.probability]),
+      );
+      const newMap = new Map(data.map((p) => [p.event_id, p.probability]));
+      const hasChanges =
+        data.length !== predictions.length ||
+        data.some(
+          (p) =>
+            !oldMap.has(p.event_id) ||
+            oldMap.get(p.event_id) !== p.probability,
         );
-        const newMap = new Map(data.map((p) => [p.event_id, p.probability]));
-        const hasChanges =
-          data.length !== predictions.length ||
-          data.some(
-            (p) =>
-              !oldMap.has(p.event_id) ||
-              oldMap.get(p.event_id) !== p.probability,
-          );
-        if (hasChanges || isInitial) {
-          setPredictions(data);
-        }
-        setLastUpdated(new Date());
+      if (hasChanges || isInitial) {
+        setPredictions(data);
       }
+      setLastUpdated(new Date());
 
       if (statsRes.ok) {
         const s = await statsRes.json();
@@ -113,6 +111,14 @@ const PredictionRadar = ({ isDark, language, refreshInterval = 30000 }) => {
     fetchPredictions();
   }, []);
 
+  // Push: predições novas chegam pelo /stream entre os refreshes
+  useEffect(() => {
+    return streamPredictions({ limit: 250 }, (data) => {
+      setPredictions(data);
+      setLastUpdated(new Date());
+    });
+  }, []);
+
   // Auto-refresh
   useEffect(() => {
     if (refreshInterval > 0) {
@@ -382,6 +388,23 @@ const PredictionRadar = ({ isDark, language, refreshInterval = 30000 }) => {
                           💡 {pred.llm_reasoning}
                         </p>
                       )}
+                      {pred.top_features?.length > 0 && (
+                        <div className="flex flex-wrap gap-1 mt-1.5">
+                          {pred.top_features.map(([name, value]) => (
+                            <span
+                              key={name}
+                              className={`text-[10px] font-mono px-1.5 py-0.5 rounded ${
+                                value >= 0
+                                  ? "bg-red-500/10 text-red-400"
+                                  : "bg-emerald-500/10 text-emerald-400"
+                              }`}
+                            >
+                              {name} {value >= 0 ? "+" : ""}
+                              {(value * 100).toFixed(1)}pp
+                            </span>
+                          ))}
+                        </div>
+                      )}
                     </div>
 
                     {/* Right: Probability */}
@@ -8,6 +8,7 @@ export default defineConfig({
       "/events": "http://localhost:8000",
       "/sources": "http://localhost:8000",
       "/narratives": "http://localhost:8000",
+      "/score": "http://localhost:8001",
     },
   },
 });
@@ -1,14 +1,19 @@
+import hashlib
 import json
 import os
 import re
 import time
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from email.utils import parsedate_to_datetime
 
 import bleach
-from pymongo import MongoClient
+from pymongo import ASCENDING, DESCENDING, MongoClient
+from pymongo.errors import OperationFailure
 from redis import Redis
 
+from shared.mood import UPDATE_SCRIPT as MOOD_UPDATE_SCRIPT, update_args as mood_update_args
+from shared.rollups import RollupBatch
+
 
 def get_settings() -> dict:
     return {
@@ -19,8 +24,13 @@ def get_settings() -> dict:
         "events_queue": os.getenv("EVENTS_QUEUE", "events_queue"),
         "alerts_queue": os.getenv("ALERTS_QUEUE", "alerts_queue"),
         "inference_queue": os.getenv("INFERENCE_QUEUE", "inference_queue"),
+        "narrative_max_events": int(os.getenv("NARRATIVE_MAX_EVENTS", "50")),
     }
 
+# Contadores de versão de escrita: invalidam o cache de respostas da API
+EVENTS_VERSION_KEY = "write_version:events"
+PREDICTIONS_VERSION_KEY = "write_version:predictions"
+
 # --- NLP SETUP ---
 import spacy
 from spacy.language import Language
@@ -543,21 +553,22 @@ def extract_entities(text: str) -> dict:
     }
 
 
-def normalize_timestamp(value: str | None) -> str:
-    """Normaliza timestamps RSS para ISO 8601 em UTC"""
+def parse_timestamp(value: str | None) -> str | None:
+    """Data RSS em ISO 8601 UTC; None se ausente ou inválida"""
     if not value:
-        return datetime.utcnow().isoformat() + "Z"
+        return None
     try:
         parsed = parsedate_to_datetime(value)
         if parsed.tzinfo is None:
             parsed = parsed.replace(tzinfo=timezone.utc)
         return parsed.astimezone(timezone.utc).isoformat().replace("+00:00", "Z")
     except (TypeError, ValueError):
-        return datetime.utcnow().isoformat() + "Z"
+        return None
 
 
-    except (TypeError, ValueError):
-        return datetime.utcnow().isoformat() + "Z"
+def normalize_timestamp(value: str | None) -> str:
+    """Normaliza timestamps RSS para ISO 8601 em UTC (sem data válida: agora)"""
+    return parse_timestamp(value) or datetime.utcnow().isoformat() + "Z"
 
 
 def enrich_event(raw_event: dict) -> dict | None:
@@ -634,11 +645,189 @@ def enrich_event(raw_event: dict) -> dict | None:
     return enriched_event
 
 
-def cleanup_old_events(mongo_db, max_events: int = 1000) -> None:
-    """Mantém apenas os max_events mais recentes no banco."""
+# Campos que mudam a cada re-análise sem mudar o conteúdo do evento
+VOLATILE_EVENT_FIELDS = ("analyzed_at",)
+
+
+def event_content_hash(event: dict) -> str:
+    """Hash do conteúdo enriquecido: o collector reenvia os mesmos itens a cada ciclo."""
+    content = {k: v for k, v in event.items() if k not in VOLATILE_EVENT_FIELDS}
+    return hashlib.md5(
+        json.dumps(content, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")
+    ).hexdigest()
+
+
+def ensure_indexes(mongo_db) -> None:
+    """Índices de que o upsert por id, o cleanup por timestamp e as narrativas dependem (o resto é declarado na API)."""
+    specs = (
+        (mongo_db.events, [("id", ASCENDING)], {"unique": True}),
+        (mongo_db.events, [("timestamp", DESCENDING)], {}),
+        (mongo_db.narrative_buckets, [("hour", ASCENDING)], {}),
+        # TTL: o Mongo apaga o bucket quando expires_at passa
+        (mongo_db.narrative_buckets, [("expires_at", ASCENDING)], {"expireAfterSeconds": 0}),
+        (mongo_db.rollups, [("expires_at", ASCENDING)], {"expireAfterSeconds": 0}),
+    )
+    for collection, keys, options in specs:
+        try:
+            collection.create_index(keys, **options)
+        except OperationFailure as e:
+            print(f"[analysis] ⚠️  Índice {collection.name} {keys} não criado: {e}")
+
+
+# --- NARRATIVAS MATERIALIZADAS ---
+# GET /narratives lê, em vez de agregar 48h de eventos a cada chamada:
+#   narratives          {_id: setor, events: [últimos N eventos, cronológicos], updated_at}
+#   narrative_buckets   {_id: "setor:AAAA-MM-DDTHH", sector, hour, count, polarity_sum,
+#                        polarity_count, insights: {hash: {text, count}}, expires_at}
+# Cada evento novo faz um $push limitado ($slice) e um $inc no bucket da sua hora;
+# a API soma os buckets da janela (≤ setores × 49 docs; a hora mais antiga entra
+# inteira, então a janela efetiva é de 48–49h). Buckets expiram por TTL.
+NARRATIVE_WINDOW_HOURS = 48
+# Versão do formato dos docs de narrativa: docs de outra versão disparam o rebuild no startup
+# (2: id da timeline = str(_id) e filtro de fontes sociais)
+NARRATIVE_SCHEMA = 2
+
+
+def _narrative_hour(timestamp: str) -> str:
+    """Hora do evento ("AAAA-MM-DDTHH"): chave do bucket, comparável como string."""
+    return timestamp[:13]
+
+
+def _narrative_cutoff_hour() -> str:
+    return (datetime.utcnow() - timedelta(hours=NARRATIVE_WINDOW_HOURS)).isoformat()[:13]
+
+
+# Narrativa Social: só eventos de fontes sociais de fato (infer_sector também marca
+# como Social notícias que apenas citam reddit/wsb)
+SOCIAL_DOMAINS = ["reddit.com", "twitter.com", "x.com", "nitter."]
+
+
+def is_social_event(event: dict) -> bool:
+    """'link' (URL do item) ou 'source.url' (URL do feed) num domínio social."""
+    combined = (event.get("link", "") + " " + (event.get("source", {}).get("url", "") or "")).lower()
+    return any(domain in combined for domain in SOCIAL_DOMAINS)
+
+
+def record_narrative_event(mongo_db, event: dict, object_id, max_events: int = 50) -> None:
+    """
+    Incorpora um evento novo à narrativa do seu setor (eventos fora da janela são ignorados).
+    Na timeline, o evento tem id = str(_id), como em GET /events.
+    """
+    timestamp = event.get("timestamp") or ""
+    hour = _narrative_hour(timestamp)
+    if hour < _narrative_cutoff_hour():
+        return
+
+    sector = event.get("sector") or "Global"
+    if sector == "Social" and not is_social_event(event):
+        return
+    polarity = event.get("analytics", {}).get("sentiment", {}).get("polarity")
+    increments = {"count": 1}
+    if polarity is not None:
+        increments["polarity_sum"] = polarity
+        increments["polarity_count"] = 1
+    updates = {"$inc": increments}
+    insight = event.get("insight")
+    if insight:
+        # Hash como chave: o texto pode conter "." ou "$"
+        key = hashlib.md5(insight.encode("utf-8")).hexdigest()[:12]
+        increments[f"insights.{key}.count"] = 1
+        updates["$set"] = {f"insights.{key}.text": insight}
+
+    expires_at = datetime.strptime(hour, "%Y-%m-%dT%H") + timedelta(hours=NARRATIVE_WINDOW_HOURS + 1)
+    updates["$setOnInsert"] = {"sector": sector, "hour": hour, "expires_at": expires_at}
+    mongo_db.narrative_buckets.update_one({"_id": f"{sector}:{hour}"}, updates, upsert=True)
+
+    snapshot = {k: v for k, v in event.items() if k != "_id"}
+    snapshot["id"] = str(object_id)
+    mongo_db.narratives.update_one(
+        {"_id": sector},
+        {
+            "$push": {"events": {"$each": [snapshot], "$sort": {"timestamp": 1}, "$slice": -max_events}},
+            "$set": {"updated_at": datetime.utcnow().isoformat() + "Z", "schema": NARRATIVE_SCHEMA},
+        },
+        upsert=True,
+    )
+
+
+def rebuild_narratives(mongo_db, max_events: int = 50) -> int:
+    """Reconstrói as narrativas a partir dos eventos da janela (migração / collection vazia)."""
+    mongo_db.narratives.delete_many({})
+    mongo_db.narrative_buckets.delete_many({})
+    total = 0
+    query = {"timestamp": {"$gte": _narrative_cutoff_hour()}}
+    for event in mongo_db.events.find(query).sort("timestamp", 1):
+        record_narrative_event(mongo_db, event, event["_id"], max_events)
+        total += 1
+    print(f"[analysis] Narrativas reconstruídas a partir de {total} eventos.")
+    return total
+
+
+# --- ROLLUPS (SÉRIES TEMPORAIS) ---
+# Buckets de 1 minuto e 1 hora por setor e por país na collection `rollups`
+# (shared.rollups, o mesmo do inference, que soma as probabilidades).
+# Bucket = analyzed_at; retenção via TTL em expires_at.
+def record_event_rollups(mongo_db, event: dict) -> None:
+    """$inc do evento novo nos 4 buckets (1m/1h × setor/país) do seu analyzed_at."""
+    at = datetime.fromisoformat(event["analyzed_at"]).replace(tzinfo=None)
+    increments = {"count": 1, f"impact.{event.get('impact', 'low')}": 1}
+    polarity = event.get("analytics", {}).get("sentiment", {}).get("polarity")
+    if polarity is not None:
+        increments["sentiment_sum"] = polarity
+        increments["sentiment_count"] = 1
+
+    batch = RollupBatch()
+    batch.add(at, {"sector": event.get("sector"), "country": event.get("location", {}).get("country")}, increments)
+    batch.write(mongo_db.rollups)
+
+
+# --- MOOD INDEX ---
+# EWMA com decaimento exponencial da polaridade dos eventos novos, no Redis
+# (shared.mood, o mesmo script do inference, que soma a probabilidade).
+# Hash mood:sentiment:{escopo}:{meia_vida} com s, w, t; média = s / w.
+def record_mood(mood_script, event: dict) -> None:
+    """Atualiza o humor geral e o do setor com a polaridade do evento (uma chamada atômica)."""
+    polarity = event.get("analytics", {}).get("sentiment", {}).get("polarity")
+    if polarity is None:
+        return
+    keys, args = mood_update_args("sentiment", event.get("sector"), polarity)
+    mood_script(keys=keys, args=args)
+
+
+# --- STREAM (SSE) ---
+# Evento novo publicado no Redis (pub/sub) na view card de GET /events; a API
+# repassa aos dashboards conectados em GET /stream (ver services/api/app/stream.py).
+STREAM_EVENTS_CHANNEL = "stream:events"
+STREAM_EVENT_FIELDS = (
+    "title", "type", "impact", "urgency", "sector", "sub_sector", "insight", "analytics",
+    "link", "timestamp",
+)
+
+
+def publish_event(redis_client, event: dict, object_id) -> None:
+    """Publica o evento novo (id = _id do Mongo, como em GET /events)."""
+    item = {field: event[field] for field in STREAM_EVENT_FIELDS if field in event}
+    item["id"] = str(object_id)
+    item["location"] = {"country": event.get("location", {}).get("country")}
+    source = event.get("source", {})
+    item["source"] = {"name": source.get("name"), "url": source.get("url")}
+    message = {
+        "filter": {
+            "sector": event.get("sector"),
+            "impact": event.get("impact"),
+            "region": item["location"]["country"],
+            "type": event.get("type"),
+        },
+        "item": item,
+    }
+    redis_client.publish(STREAM_EVENTS_CHANNEL, json.dumps(message))
+
+
+def cleanup_old_events(mongo_db, max_events: int = 1000) -> int:
+    """Mantém apenas os max_events mais recentes no banco. Retorna nº de eventos removidos."""
     total = mongo_db.events.count_documents({})
     if total <= max_events:
-        return
+        return 0
 
     cutoff = list(
         mongo_db.events.find({}, {"timestamp": 1, "id": 1})
@@ -647,21 +836,33 @@ def cleanup_old_events(mongo_db, max_events: int = 1000) -> None:
         .limit(1)
     )
     if not cutoff:
-        return
+        return 0
 
     cutoff_ts = cutoff[0].get("timestamp")
 
     # IDs dos eventos antigos
-    old = list(mongo_db.events.find({"timestamp": {"$lte": cutoff_ts}}, {"id": 1, "_id": 0}))
+    old = list(mongo_db.events.find({"timestamp": {"$lte": cutoff_ts}}, {"id": 1, "_id": 1}))
     old_ids = [e.get("id") for e in old if e.get("id")]
 
     # Remove predições e eventos antigos
     if old_ids:
         mongo_db.predictions.delete_many({"event_id": {"$in": old_ids}})
+        mongo_db.narratives.update_many(
+            {}, {"$pull": {"events": {"id": {"$in": [str(e["_id"]) for e in old]}}}}
+        )
     deleted = mongo_db.events.delete_many({"timestamp": {"$lte": cutoff_ts}})
 
+    # Tombstones: o delta-sync da API avisa os dashboards das remoções
+    # (eventos são identificados pelo _id na API; predições, pelo event_id)
+    deleted_at = datetime.now(timezone.utc)
+    tombstones = [{"collection": "events", "id": str(e["_id"]), "deleted_at": deleted_at} for e in old]
+    tombstones += [{"collection": "predictions", "id": event_id, "deleted_at": deleted_at} for event_id in old_ids]
+    if tombstones:
+        mongo_db.tombstones.insert_many(tombstones, ordered=False)
+
     remaining = mongo_db.events.count_documents({})
     print(f"[analysis] 🧹 Cleanup: {deleted.deleted_count} eventos antigos removidos. {remaining}/{max_events} restantes.")
+    return deleted.deleted_count
 
 
 def run() -> None:
@@ -672,8 +873,13 @@ def run() -> None:
         port=settings["redis_port"],
         decode_responses=True,
     )
+    mood_script = redis_client.register_script(MOOD_UPDATE_SCRIPT)
     mongo_client = MongoClient(settings["mongo_uri"])
     mongo_db = mongo_client[settings["mongo_db"]]
+    ensure_indexes(mongo_db)
+    if mongo_db.narratives.estimated_document_count() == 0 or \
+            mongo_db.narratives.count_documents({"schema": {"$ne": NARRATIVE_SCHEMA}}, limit=1):
+        rebuild_narratives(mongo_db, settings["narrative_max_events"])
 
     print("[analysis] iniciado. Aguardando eventos na fila...")
 
@@ -700,31 +906,73 @@ def run() -> None:
                 print(f"[analysis] ✕ evento ignorado (filtro de ruído): {raw_event.get('title', '')[:40]}...")
                 continue
 
-            # Persistência única em MongoDB (Upsert para evitar duplicatas)
-            mongo_db.events.update_one(
-                {"id": enriched_event["id"]},
-                {"$set": enriched_event},
-                upsert=True
-            )
+            # Re-coletas do mesmo item: só grava se o conteúdo enriquecido mudou, para
+            # não mover updated_at (delta-sync) nem a versão de escrita (cache/ETag da API)
+            stored = mongo_db.events.find_one({"id": enriched_event["id"]}, {"content_hash": 1, "timestamp": 1})
+            if stored and stored.get("timestamp") and parse_timestamp(raw_event.get("created_at")) is None:
+                # Item sem data de publicação: fica o instante da primeira coleta,
+                # senão o "agora" de cada re-coleta mudaria o hash (e a data exibida)
+                enriched_event["timestamp"] = stored["timestamp"]
+            content_hash = event_content_hash(enriched_event)
+            changed = stored is None or stored.get("content_hash") != content_hash
+
+            upserted_id = None
+            if changed:
+                # Persistência única em MongoDB (Upsert para evitar duplicatas)
+                result = mongo_db.events.update_one(
+                    {"id": enriched_event["id"]},
+                    # updated_at (relógio do Mongo): cursor do delta-sync da API (GET /events?since=)
+                    {"$set": {**enriched_event, "content_hash": content_hash}, "$currentDate": {"updated_at": True}},
+                    upsert=True
+                )
+                upserted_id = result.upserted_id
+            # Só eventos novos entram na narrativa (re-análise não conta duas vezes).
+            # Views derivadas (reconstruíveis a partir de events): uma falha nelas é
+            # registrada e não impede o evento de seguir para alertas/inferência
+            if upserted_id is not None:
+                for view, record in (
+                    ("narrativa", lambda: record_narrative_event(
+                        mongo_db, enriched_event, upserted_id, settings["narrative_max_events"])),
+                    ("rollups", lambda: record_event_rollups(mongo_db, enriched_event)),
+                    ("humor", lambda: record_mood(mood_script, enriched_event)),
+                ):
+                    try:
+                        record()
+                    except Exception as e:
+                        print(f"[analysis] ⚠️  {view} não atualizado(a) para {enriched_event['id'][:8]}...: {e}")
+            if changed:
+                redis_client.incr(EVENTS_VERSION_KEY)
+            # Push aos dashboards depois do incr: quem recarregar ao receber já vê a versão nova
+            if upserted_id is not None:
+                try:
+                    publish_event(redis_client, enriched_event, upserted_id)
+                except Exception as e:
+                    # Clientes SSE recuperam pelo delta-sync (?since=)
+                    print(f"[analysis] ⚠️  push SSE falhou para {enriched_event['id'][:8]}...: {e}")
 
             # Publicação para notificação (remove _id inserido pelo Mongo)
             alert_payload = dict(enriched_event)
             alert_payload.pop("_id", None)
             redis_client.lpush(settings["alerts_queue"], json.dumps(alert_payload))
 
-            # Publicação para inferência de probabilidade de impacto (v1.1.0)
-            redis_client.lpush(settings["inference_queue"], json.dumps(alert_payload))
+            # Publicação para inferência de probabilidade de impacto (v1.1.0).
+            # Só evento novo/alterado: re-pontuar o mesmo conteúdo só moveria o
+            # updated_at e a versão de escrita das predições
+            if changed:
+                redis_client.lpush(settings["inference_queue"], json.dumps(alert_payload))
             
             print(
                 f"[analysis] ✓ evento {enriched_event['id'][:8]}... "
                 f"({enriched_event['type']}, {enriched_event['impact']}) "
-                f"processado e salvo"
+                f"{'processado e salvo' if changed else 'sem alterações'}"
             )
 
             # Auto-cleanup a cada 100 eventos processados
             event_counter += 1
             if event_counter % 100 == 0:
-                cleanup_old_events(mongo_db, max_events=1000)
+                if cleanup_old_events(mongo_db, max_events=1000):
+                    redis_client.incr(EVENTS_VERSION_KEY)
+                    redis_client.incr(PREDICTIONS_VERSION_KEY)
 
         except Exception as e:
             print(f"[analysis] erro ao processar evento: {e}")
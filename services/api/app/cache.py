@@ -0,0 +1,151 @@
+"""
+Response Cache — Cache de respostas dos endpoints de leitura do dashboard.
+
+Chave: (endpoint, parâmetros da query, versões de escrita das collections
+de que a resposta depende). As versões são contadores no Redis que quem
+escreve incrementa a cada escrita:
+
+    write_version:events        analysis (upsert de evento, cleanup), API (cleanup)
+    write_version:predictions   inference (flush do writer), analysis/API (cleanup)
+
+Uma escrita muda a versão → a chave muda → a próxima leitura recalcula.
+Sem escrita, todos os polls do dashboard saem da memória. `max_age` limita
+a idade de respostas que dependem do relógio (ex.: janela de 48h).
+
+Misses concorrentes da mesma chave são agrupados (single-flight): só a
+primeira requisição consulta o Mongo; as demais aguardam o mesmo resultado.
+Assim, 100 dashboards custam ~1 consulta por mudança (por processo da API).
+
+Se o Redis estiver indisponível, o cache é ignorado e a consulta roda direto.
+
+As mesmas versões geram o ETag das respostas (`etag_for`): um poll com
+If-None-Match de uma versão que não mudou recebe 304 sem corpo.
+
+Um FLUSH (ou restart sem persistência) do Redis zera os contadores, e a
+numeração recomeçaria do zero: versões já vistas voltariam a valer para
+conteúdo novo (304 e entradas de cache obsoletos). Por isso as versões
+levam a época `write_version:epoch`, um nonce criado com SET NX quando
+falta; sumiu junto com os contadores → época nova → ETags e chaves novas.
+"""
+
+import asyncio
+import hashlib
+import secrets
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable
+
+VERSION_KEYS = {
+    "events": "write_version:events",
+    "predictions": "write_version:predictions",
+}
+EPOCH_KEY = "write_version:epoch"
+
+
+class ResponseCache:
+    def __init__(self, redis_client, max_entries: int = 256, max_age: float = 30.0):
+        self.redis = redis_client  # redis.asyncio
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._entries: OrderedDict[tuple, tuple[float, Any]] = OrderedDict()
+        self._inflight: dict[tuple, asyncio.Task] = {}
+        self._hits = 0
+        self._misses = 0
+        self._coalesced = 0
+
+    async def _versions(self, depends_on: tuple[str, ...]) -> tuple:
+        values = await self.redis.mget([EPOCH_KEY] + [VERSION_KEYS[name] for name in depends_on])
+        epoch = values[0]
+        if epoch is None:
+            epoch = await self._new_epoch()
+        return (epoch,) + tuple(value or "0" for value in values[1:])
+
+    async def _new_epoch(self):
+        """Época dos contadores (primeiro uso ou Redis zerado); SET NX: todos os processos ficam com a mesma."""
+        await self.redis.set(EPOCH_KEY, secrets.token_hex(8), nx=True)
+        return await self.redis.get(EPOCH_KEY)
+
+    async def versions(self, depends_on: tuple[str, ...]) -> tuple | None:
+        """Versões atuais das collections (None se o Redis estiver indisponível)."""
+        try:
+            return await self._versions(depends_on)
+        except Exception as e:
+            print(f"[api/cache] Redis indisponível, sem cache: {e}")
+            return None
+
+    async def get_or_compute(
+        self,
+        endpoint: str,
+        params: dict,
+        depends_on: tuple[str, ...],
+        compute: Callable[[], Awaitable[Any]],
+        versions: tuple | None = None,
+    ) -> Any:
+        """
+        Resposta em cache para (endpoint, params) na versão atual das
+        collections em `depends_on`; senão executa `compute()` uma única vez.
+        `versions` (de `versions()`) evita reler o Redis quando o chamador
+        já as leu (ex.: para o ETag).
+        O valor retornado é compartilhado entre requisições: não mutar.
+        """
+        if versions is None:
+            versions = await self.versions(depends_on)
+        if versions is None:
+            return await compute()
+
+        key = (endpoint, tuple(sorted(params.items())), depends_on, versions)
+        entry = self._entries.get(key)
+        if entry is not None and time.monotonic() - entry[0] < self.max_age:
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[1]
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self._coalesced += 1
+        else:
+            self._misses += 1
+            task = asyncio.ensure_future(compute())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._store(key, done))
+        # shield: uma requisição cancelada não cancela a consulta das outras
+        return await asyncio.shield(task)
+
+    def _store(self, key: tuple, task: asyncio.Task) -> None:
+        self._inflight.pop(key, None)
+        if task.cancelled() or task.exception() is not None:
+            return
+        self._entries[key] = (time.monotonic(), task.result())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        lookups = self._hits + self._misses + self._coalesced
+        return {
+            "entries": len(self._entries),
+            "hits": self._hits,
+            "misses": self._misses,
+            "coalesced": self._coalesced,
+            "hit_rate": round((self._hits + self._coalesced) / lookups, 4) if lookups else 0.0,
+        }
+
+
+def etag_for(endpoint: str, params: dict, versions: tuple) -> str:
+    """
+    Base do ETag de (endpoint, params, versões de escrita com a época):
+    muda só quando uma escrita incrementa a versão ou o Redis é zerado. Quem monta a resposta acrescenta o
+    Content-Encoding e as aspas (cada codificação é uma representação).
+    """
+    digest = hashlib.blake2b(
+        repr((endpoint, tuple(sorted(params.items())), versions)).encode(), digest_size=8
+    ).hexdigest()
+    return f"{endpoint}-{digest}"
+
+
+async def bump(redis_client, *collections: str) -> None:
+    """Invalida as respostas que dependem das collections (redis.asyncio)."""
+    pipe = redis_client.pipeline(transaction=False)
+    for name in collections:
+        pipe.incr(VERSION_KEYS[name])
+    await pipe.execute()
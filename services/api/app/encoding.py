@@ -0,0 +1,77 @@
+"""
+Encoding — Corpo JSON serializado e comprimido uma vez por versão.
+
+O cache de respostas guarda um `EncodedBody` em vez do valor Python: a
+serialização (orjson) acontece no miss, e cada Content-Encoding (br,
+gzip) é comprimido na primeira requisição que o pede. Os polls seguintes
+na mesma versão só copiam bytes prontos.
+
+`negotiate` escolhe a codificação pelo Accept-Encoding (q-values; br
+antes de gzip no empate). Corpos pequenos vão sem compressão.
+"""
+
+import gzip
+
+import brotli
+import orjson
+
+MIN_COMPRESS_BYTES = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5  # 11 (padrão) é lento demais para JSON gerado por requisição
+
+_PREFERENCE = ("br", "gzip")
+
+
+class EncodedBody:
+    __slots__ = ("raw", "_encoded")
+
+    def __init__(self, value):
+        self.raw = orjson.dumps(value, default=str, option=orjson.OPT_NON_STR_KEYS)
+        self._encoded: dict[str, bytes] = {}
+
+    def get(self, encoding: str) -> bytes:
+        if encoding == "identity":
+            return self.raw
+        body = self._encoded.get(encoding)
+        if body is None:
+            if encoding == "br":
+                body = brotli.compress(self.raw, quality=BROTLI_QUALITY)
+            else:
+                body = gzip.compress(self.raw, compresslevel=GZIP_LEVEL)
+            self._encoded[encoding] = body
+        return body
+
+
+def negotiate(accept_encoding: str | None, size: int) -> str:
+    """Melhor codificação aceita pelo cliente para um corpo de `size` bytes."""
+    if not accept_encoding or size < MIN_COMPRESS_BYTES:
+        return "identity"
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[name.strip().lower()] = weight
+    best, best_weight = "identity", 0.0
+    for encoding in _PREFERENCE:
+        weight = weights.get(encoding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+def etag_matches(if_none_match: str | None, base: str) -> str | None:
+    """ETag do If-None-Match que corresponde à base (comparação fraca, RFC 9110), se houver."""
+    if not if_none_match:
+        return None
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        opaque = tag[2:] if tag.startswith("W/") else tag
+        if opaque.startswith(f'"{base}-'):
+            return tag
+    return None
@@ -0,0 +1,262 @@
+"""
+Indexes — Índices declarados das collections consultadas pela API.
+
+Cada consulta quente tem um índice que cobre filtro + ordenação (regra
+ESR: igualdade → ordenação → faixa), para que o Mongo percorra só o
+início do índice em vez de varrer e ordenar a collection inteira:
+
+    events        id (único)                       upsert do analysis
+                  timestamp                        GET /events, cleanup
+                  impact | type | location.country
+                    + timestamp                    filtros de GET /events
+    predictions   event_id (único)                 upsert do inference, cleanup ($in)
+                  predicted_at + probability       GET /predictions (?min_probability)
+                  sector + predicted_at
+                    + probability                  GET /predictions?sector
+    narrative_buckets
+                  hour (criado pelo analysis)      GET /narratives (buckets da janela)
+    narratives    —                                GET /narratives (1 doc por setor)
+    rollups       resolution + dimension
+                    (+ key) + bucket               GET /timeseries (TTL criado pelo analysis)
+    events,       updated_at                       GET /events|/predictions?since (delta-sync)
+      predictions
+    tombstones    collection + deleted_at          delta-sync
+                  deleted_at (TTL)                 TOMBSTONE_RETENTION_HOURS
+
+No startup, `ensure_indexes` cria só os que faltam (build online do
+Mongo ≥ 4.2: leituras e escritas seguem durante a construção) e compara
+as opções dos que já existem: um expireAfterSeconds diferente do
+declarado (ex.: TOMBSTONE_RETENTION_HOURS alterado) é aplicado com
+collMod; outras diferenças (unique, sparse, filtro parcial) exigem
+recriar o índice e só são reportadas, também em GET /admin/indexes. E
+`collection_scan_report` roda explain() nos formatos de consulta da API
+e aponta os que ainda caem em COLLSCAN ou em ordenação em memória.
+Índices não declarados aqui nunca são removidos.
+
+Os workers criam, no próprio startup, os índices únicos de que os seus
+upserts dependem (mesmas chaves e opções → mesmo nome, sem conflito).
+"""
+
+import os
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+INDEXES: dict[str, list[IndexModel]] = {
+    "events": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("timestamp", DESCENDING)]),
+        IndexModel([("impact", ASCENDING), ("timestamp", DESCENDING)]),
+        IndexModel([("type", ASCENDING), ("timestamp", DESCENDING)]),
+        IndexModel([("location.country", ASCENDING), ("timestamp", DESCENDING)]),
+        IndexModel([("updated_at", ASCENDING)]),
+    ],
+    "predictions": [
+        IndexModel([("event_id", ASCENDING)], unique=True),
+        IndexModel([("predicted_at", DESCENDING), ("probability", ASCENDING)]),
+        IndexModel([("sector", ASCENDING), ("predicted_at", DESCENDING), ("probability", ASCENDING)]),
+        IndexModel([("updated_at", ASCENDING)]),
+    ],
+    "rollups": [
+        IndexModel([("resolution", ASCENDING), ("dimension", ASCENDING), ("bucket", ASCENDING)]),
+        IndexModel([("resolution", ASCENDING), ("dimension", ASCENDING), ("key", ASCENDING), ("bucket", ASCENDING)]),
+    ],
+    "tombstones": [
+        IndexModel([("collection", ASCENDING), ("deleted_at", ASCENDING)]),
+        IndexModel(
+            [("deleted_at", ASCENDING)],
+            expireAfterSeconds=int(os.getenv("TOMBSTONE_RETENTION_HOURS", "72")) * 3600,
+        ),
+    ],
+}
+
+# Formatos das consultas da API e dos workers: (descrição, collection, filtro, ordenação)
+QUERY_SHAPES = [
+    ("GET /events", "events", {}, [("timestamp", DESCENDING)]),
+    ("GET /events?impact", "events", {"impact": "high"}, [("timestamp", DESCENDING)]),
+    ("GET /events?type", "events", {"type": "financial"}, [("timestamp", DESCENDING)]),
+    ("GET /events?region", "events", {"location.country": "BR"}, [("timestamp", DESCENDING)]),
+    ("GET /narratives buckets", "narrative_buckets", {"hour": {"$gte": ""}}, None),
+    ("GET /narratives", "narratives", {}, None),
+    ("upsert events.id", "events", {"id": ""}, None),
+    ("GET /events?since", "events", {"updated_at": {"$gt": ""}}, [("updated_at", ASCENDING)]),
+    ("GET /predictions", "predictions", {}, [("predicted_at", DESCENDING)]),
+    ("GET /predictions?min_probability", "predictions",
+     {"probability": {"$gte": 0.5}}, [("predicted_at", DESCENDING)]),
+    ("GET /predictions?sector", "predictions", {"sector": "Macro"}, [("predicted_at", DESCENDING)]),
+    ("GET /predictions?sector&min_probability", "predictions",
+     {"sector": "Macro", "probability": {"$gte": 0.5}}, [("predicted_at", DESCENDING)]),
+    ("upsert predictions.event_id", "predictions", {"event_id": ""}, None),
+    ("cleanup predictions.event_id $in", "predictions", {"event_id": {"$in": [""]}}, None),
+    ("GET /predictions?since", "predictions", {"updated_at": {"$gt": ""}}, [("updated_at", ASCENDING)]),
+    ("delta-sync tombstones", "tombstones", {"collection": "events", "deleted_at": {"$gt": ""}}, None),
+    ("GET /timeseries", "rollups", {"resolution": "1h", "dimension": "sector", "bucket": {"$gte": ""}}, None),
+    ("GET /timeseries?key", "rollups",
+     {"resolution": "1h", "dimension": "sector", "key": "Tech", "bucket": {"$gte": ""}}, None),
+]
+
+# Collections com 1 doc por setor: varrer é o plano certo, sem alerta de COLLSCAN
+SCAN_EXPECTED = {"narratives"}
+
+
+# Opções comparadas entre o índice declarado e o existente (mesmas chaves)
+COMPARED_OPTIONS = ("unique", "sparse", "expireAfterSeconds", "partialFilterExpression")
+
+
+def _key(spec) -> tuple:
+    return tuple((field, int(direction)) for field, direction in spec)
+
+
+def _options(document: dict) -> dict:
+    """Opções de um índice (declarado ou de index_information) em forma comparável."""
+    options = {}
+    for option in COMPARED_OPTIONS:
+        value = document.get(option)
+        if option in ("unique", "sparse"):
+            value = bool(value)
+        elif option == "expireAfterSeconds" and value is not None:
+            value = int(value)
+        options[option] = value
+    return options
+
+
+def _option_diff(index: IndexModel, info: dict) -> dict:
+    """{opção: {"declared", "existing"}} das opções que divergem."""
+    declared, existing = _options(index.document), _options(info)
+    return {
+        option: {"declared": declared[option], "existing": existing[option]}
+        for option in COMPARED_OPTIONS
+        if declared[option] != existing[option]
+    }
+
+
+async def _existing(collection) -> dict[tuple, tuple[str, dict]]:
+    """Índices existentes por chave: {chave: (nome, info)}."""
+    return {_key(info["key"]): (name, info) for name, info in (await collection.index_information()).items()}
+
+
+def _errmsg(e: OperationFailure):
+    return e.details.get("errmsg", e) if e.details else e
+
+
+async def ensure_indexes(db) -> dict:
+    """
+    Cria os índices declarados que ainda não existem e atualiza o TTL dos
+    que existem com outro expireAfterSeconds (motor).
+    Returns:
+        {collection: {"created": [nomes], "updated": [nomes], "mismatched": [nomes], "failed": [nomes]}}
+    """
+    report = {}
+    for collection_name, models in INDEXES.items():
+        collection = db[collection_name]
+        existing = await _existing(collection)
+        created, updated, mismatched, failed = [], [], [], []
+        for index in models:
+            name = index.document["name"]
+            found = existing.get(_key(index.document["key"].items()))
+            if found is not None:
+                name, info = found
+                diff = _option_diff(index, info)
+                ttl = diff.pop("expireAfterSeconds", None)
+                if ttl is not None and ttl["declared"] is not None:
+                    try:
+                        await db.command(
+                            "collMod", collection_name,
+                            index={"keyPattern": dict(index.document["key"]), "expireAfterSeconds": ttl["declared"]},
+                        )
+                        updated.append(name)
+                        print(
+                            f"[api/indexes] ✓ {collection_name}.{name}: expireAfterSeconds "
+                            f"{ttl['existing']} → {ttl['declared']}"
+                        )
+                    except OperationFailure as e:
+                        failed.append(name)
+                        print(f"[api/indexes] ✕ {collection_name}.{name} (collMod): {_errmsg(e)}")
+                elif ttl is not None:
+                    diff["expireAfterSeconds"] = ttl
+                if diff:
+                    # collMod não muda essas opções: recriar o índice é decisão manual
+                    mismatched.append(name)
+                    print(f"[api/indexes] ⚠️  {collection_name}.{name} difere do declarado: {diff}")
+                continue
+            try:
+                await collection.create_indexes([index])
+                created.append(name)
+                print(f"[api/indexes] ✓ {collection_name}.{name} criado")
+            except OperationFailure as e:
+                # Ex.: duplicatas antigas impedem o índice único
+                failed.append(name)
+                print(f"[api/indexes] ✕ {collection_name}.{name}: {_errmsg(e)}")
+        report[collection_name] = {"created": created, "updated": updated, "mismatched": mismatched, "failed": failed}
+    return report
+
+
+async def option_mismatches(db) -> list[dict]:
+    """Índices declarados que existem com outras opções (ex.: TTL ainda não aplicado)."""
+    mismatches = []
+    for collection_name, models in INDEXES.items():
+        existing = await _existing(db[collection_name])
+        for index in models:
+            found = existing.get(_key(index.document["key"].items()))
+            if found is None:
+                continue
+            diff = _option_diff(index, found[1])
+            if diff:
+                mismatches.append({"collection": collection_name, "index": found[0], "options": diff})
+    return mismatches
+
+
+def _plan_stages(plan: dict) -> list[str]:
+    """Estágios de um plano do explain (árvore inputStage/inputStages), da raiz às folhas."""
+    stages = []
+    pending = [plan]
+    while pending:
+        node = pending.pop()
+        if "stage" in node:
+            stages.append(node["stage"])
+        if "inputStage" in node:
+            pending.append(node["inputStage"])
+        pending.extend(node.get("inputStages", []))
+        # Mongo ≥ 7 (SBE): o plano vem aninhado em queryPlan
+        if "queryPlan" in node:
+            pending.append(node["queryPlan"])
+    return stages
+
+
+async def collection_scan_report(db) -> list[dict]:
+    """explain() de cada formato de consulta: quais varrem a collection ou ordenam em memória."""
+    report = []
+    for description, collection_name, query, sort in QUERY_SHAPES:
+        cursor = db[collection_name].find(query).limit(1)
+        if sort:
+            cursor = cursor.sort(sort)
+        try:
+            explain = await cursor.explain()
+        except Exception as e:
+            report.append({"query": description, "collection": collection_name, "error": str(e)})
+            continue
+        stages = _plan_stages(explain.get("queryPlanner", {}).get("winningPlan", {}))
+        report.append({
+            "query": description,
+            "collection": collection_name,
+            "stages": stages,
+            "collection_scan": "COLLSCAN" in stages,
+            "scan_expected": collection_name in SCAN_EXPECTED,
+            "in_memory_sort": "SORT" in stages,
+        })
+    return report
+
+
+async def manage_indexes(db) -> None:
+    """Tarefa de startup: cria os índices que faltam e reporta consultas sem índice."""
+    try:
+        await ensure_indexes(db)
+        for entry in await collection_scan_report(db):
+            if entry.get("error"):
+                print(f"[api/indexes] ⚠️  explain falhou para {entry['query']}: {entry['error']}")
+            elif (entry["collection_scan"] and not entry["scan_expected"]) or entry["in_memory_sort"]:
+                problem = "COLLSCAN" if entry["collection_scan"] else "SORT em memória"
+                print(f"[api/indexes] ⚠️  {entry['query']} → {problem} ({' ← '.join(entry['stages'])})")
+        print("[api/indexes] Verificação de índices concluída.")
+    except Exception as e:
+        print(f"[api/indexes] Erro na verificação de índices: {e}")
@@ -1,15 +1,23 @@
 import json
 import os
+import re
 from datetime import datetime, timedelta
 from typing import Literal
 
-from fastapi import FastAPI, Query, Header
+from fastapi import FastAPI, HTTPException, Query, Header, Request, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from motor.motor_asyncio import AsyncIOMotorClient
 from pydantic import BaseModel, AnyHttpUrl
-from pymongo import MongoClient
-from redis import Redis
+from redis import asyncio as aioredis
 import google.generativeai as genai
 
-app = FastAPI(title="SentinelWatch API")
+from .cache import ResponseCache, bump, etag_for
+from .encoding import EncodedBody, etag_matches, negotiate
+from .indexes import INDEXES, collection_scan_report, ensure_indexes, manage_indexes, option_mismatches
+from . import sync
+from .stream import FILTER_FIELDS, StreamHub
+
+app = FastAPI(title="SentinelWatch API", default_response_class=ORJSONResponse)
 
 
 class SourceCreate(BaseModel):
@@ -58,36 +66,83 @@ def get_settings() -> dict:
         "redis_host": os.getenv("REDIS_HOST", "localhost"),
         "redis_port": int(os.getenv("REDIS_PORT", "6379")),
         "tasks_queue": os.getenv("TASKS_QUEUE", "tasks_queue"),
+        "cache_max_age": float(os.getenv("RESPONSE_CACHE_MAX_AGE", "30")),
+        "cache_max_entries": int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "256")),
+        "mongo_max_pool_size": int(os.getenv("MONGO_MAX_POOL_SIZE", "50")),
+        "mongo_min_pool_size": int(os.getenv("MONGO_MIN_POOL_SIZE", "5")),
+        "redis_max_connections": int(os.getenv("REDIS_MAX_CONNECTIONS", "50")),
+        "sync_settle_seconds": float(os.getenv("SYNC_SETTLE_SECONDS", "2")),
+        "tombstone_retention_hours": int(os.getenv("TOMBSTONE_RETENTION_HOURS", "72")),
+        "stream_queue_size": int(os.getenv("STREAM_QUEUE_SIZE", "64")),
+        "stream_max_subscribers": int(os.getenv("STREAM_MAX_SUBSCRIBERS", "5000")),
+        "stream_heartbeat_seconds": float(os.getenv("STREAM_HEARTBEAT_SECONDS", "15")),
     }
 
 
 settings = get_settings()
 
-mongo_client = MongoClient(settings["mongo_uri"])
+# Clientes async: nenhuma consulta bloqueia o event loop. Os pools limitam
+# as conexões simultâneas; excesso de requisições espera por uma conexão livre
+mongo_client = AsyncIOMotorClient(
+    settings["mongo_uri"],
+    maxPoolSize=settings["mongo_max_pool_size"],
+    minPoolSize=settings["mongo_min_pool_size"],
+    maxIdleTimeMS=60_000,
+    waitQueueTimeoutMS=10_000,
+    serverSelectionTimeoutMS=5_000,
+)
 mongo_db = mongo_client[settings["mongo_db"]]
-redis_client = Redis(
-    host=settings["redis_host"],
-    port=settings["redis_port"],
-    decode_responses=True,
+redis_client = aioredis.Redis(
+    connection_pool=aioredis.BlockingConnectionPool(
+        host=settings["redis_host"],
+        port=settings["redis_port"],
+        decode_responses=True,
+        max_connections=settings["redis_max_connections"],
+        timeout=10,
+    )
+)
+response_cache = ResponseCache(
+    redis_client,
+    max_entries=settings["cache_max_entries"],
+    max_age=settings["cache_max_age"],
+)
+stream_hub = StreamHub(
+    redis_client,
+    queue_size=settings["stream_queue_size"],
+    max_subscribers=settings["stream_max_subscribers"],
 )
 
 
 import asyncio
 
+_background_tasks: set[asyncio.Task] = set()
+
+
 @app.on_event("startup")
 async def startup_event():
     """Start background tasks"""
     print(f"[api] Google GenAI Version: {genai.__version__}")
     # Seed Defaults
-    seed_defaults()
+    await seed_defaults()
     
-    # Start Scheduler
-    asyncio.create_task(scheduler_loop())
+    # Tarefas em background (referência guardada: o event loop só mantém weakrefs)
+    for coroutine in (scheduler_loop(), manage_indexes(mongo_db), stream_hub.run()):
+        task = asyncio.create_task(coroutine)
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    for task in _background_tasks:
+        task.cancel()
+    mongo_client.close()
+    await redis_client.aclose()
 
-def seed_defaults():
+
+async def seed_defaults():
     """Seed default sources if database is empty"""
-    count = mongo_db.sources.count_documents({})
+    count = await mongo_db.sources.count_documents({})
     if count == 0:
         print(f"[api] Seeding {len(DEFAULT_SOURCES)} default sources...")
         for src in DEFAULT_SOURCES:
@@ -97,7 +152,7 @@ def seed_defaults():
                 "source_type": src["source_type"],
                 "created_at": datetime.utcnow().isoformat() + "Z",
             }
-            result = mongo_db.sources.insert_one(source_doc)
+            result = await mongo_db.sources.insert_one(source_doc)
             
             # Queue for immediate collection
             task = {
@@ -105,7 +160,7 @@ def seed_defaults():
                 "url": src["url"],
                 "event_type": src["event_type"],
             }
-            redis_client.lpush(settings["tasks_queue"], json.dumps(task))
+            await redis_client.lpush(settings["tasks_queue"], json.dumps(task))
         print("[api] Seeding complete.")
 
 
@@ -114,14 +169,18 @@ async def scheduler_loop():
     while True:
         print("[scheduler] Running periodic collection...")
         try:
-            sources = list(mongo_db.sources.find({}))
-            for source in sources:
-                task = {
+            sources = await mongo_db.sources.find({}).to_list(None)
+            tasks = [
+                json.dumps({
                     "source_id": str(source["_id"]),
                     "url": source["url"],
                     "event_type": source["event_type"],
-                }
-                redis_client.lpush(settings["tasks_queue"], json.dumps(task))
+                })
+                for source in sources
+            ]
+            # Um único round-trip ao Redis para todas as fontes
+            if tasks:
+                await redis_client.lpush(settings["tasks_queue"], *tasks)
             print(f"[scheduler] Re-queued {len(sources)} sources.")
         except Exception as e:
             print(f"[scheduler] Error: {e}")
@@ -131,14 +190,42 @@ async def scheduler_loop():
 
 
 @app.get("/health")
-def health() -> dict:
-    return {"status": "ok"}
+async def health() -> dict:
+    return {"status": "ok", "response_cache": response_cache.stats(), "stream": stream_hub.stats()}
+
+
+@app.get("/stream")
+async def stream(
+    types: str = "events,predictions",
+    sector: str | None = None,
+    impact: str | None = None,
+    region: str | None = None,
+    event_type: str | None = Query(default=None, alias="type"),
+) -> StreamingResponse:
+    """
+    Server-Sent Events com os eventos/predições novos (view card).
+    Filtros opcionais: types=events,predictions, sector, impact, region, type.
+    """
+    kinds = frozenset(kind.strip() for kind in types.split(",")) & {"events", "predictions"}
+    if not kinds:
+        raise HTTPException(status_code=422, detail="types deve conter events e/ou predictions")
+    values = {"sector": sector, "impact": impact, "region": region, "type": event_type}
+    filters = {field: values[field] for field in FILTER_FIELDS if values[field] and values[field] != "all"}
+
+    if stream_hub.full():
+        raise HTTPException(status_code=503, detail="Limite de conexões de stream atingido")
+    return StreamingResponse(
+        stream_hub.frames(kinds, filters, settings["stream_heartbeat_seconds"]),
+        media_type="text/event-stream",
+        # X-Accel-Buffering: o nginx repassa cada frame sem bufferizar
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @app.post("/sources")
-def create_source(payload: SourceCreate) -> dict:
+async def create_source(payload: SourceCreate) -> dict:
     # Check if URL already exists to avoid duplicates
-    existing = mongo_db.sources.find_one({"url": str(payload.url)})
+    existing = await mongo_db.sources.find_one({"url": str(payload.url)})
     if existing:
         return {"id": str(existing["_id"]), "status": "already_exists"}
 
@@ -148,24 +235,116 @@ def create_source(payload: SourceCreate) -> dict:
         "source_type": payload.source_type,
         "created_at": datetime.utcnow().isoformat() + "Z",
     }
-    result = mongo_db.sources.insert_one(source_doc)
+    result = await mongo_db.sources.insert_one(source_doc)
 
     task = {
         "source_id": str(result.inserted_id),
         "url": source_doc["url"],
         "event_type": source_doc["event_type"],
     }
-    redis_client.lpush(settings["tasks_queue"], json.dumps(task))
+    await redis_client.lpush(settings["tasks_queue"], json.dumps(task))
 
     return {"id": str(result.inserted_id), "status": "queued"}
 
 
+# Views das listas: projeções aplicadas no Mongo, só com os campos que cada
+# tela renderiza. "full" (default) mantém o documento inteiro
+EVENT_VIEWS = {
+    "card": {
+        "_id": 1, "title": 1, "type": 1, "impact": 1, "urgency": 1, "sector": 1, "sub_sector": 1,
+        "insight": 1, "analytics": 1, "location.country": 1, "source.name": 1, "source.url": 1,
+        "link": 1, "timestamp": 1,
+    },
+    "map": {"_id": 1, "title": 1, "impact": 1, "sector": 1, "location": 1, "timestamp": 1},
+    "full": None,
+}
+PREDICTION_VIEWS = {
+    "card": {
+        "_id": 0, "event_id": 1, "event_title": 1, "sector": 1, "sub_sector": 1, "probability": 1,
+        "confidence": 1, "impact_category": 1, "top_features": 1, "llm_reasoning": 1, "llm_status": 1,
+        "model_version": 1, "cascade_tier": 1, "predicted_at": 1,
+    },
+    "map": {"_id": 0, "event_id": 1, "sector": 1, "country": 1, "probability": 1, "confidence": 1},
+    "full": {"_id": 0},
+}
+ListView = Literal["card", "map", "full"]
+
+
+async def conditional_json(
+    request: Request,
+    endpoint: str,
+    params: dict,
+    depends_on: tuple[str, ...],
+    compute,
+) -> Response:
+    """
+    Resposta JSON com ETag forte da versão de escrita e 304 quando o
+    If-None-Match ainda vale: um poll sem mudança custa só os headers.
+    `compute()` retorna (headers extras, valor); o corpo vai para o cache
+    já serializado e comprimido (EncodedBody), uma vez por versão.
+    """
+    versions = await response_cache.versions(depends_on)
+    base = etag_for(endpoint, params, versions) if versions is not None else None
+    headers = {"Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if base is not None:
+        matched = etag_matches(request.headers.get("if-none-match"), base)
+        if matched:
+            # Sem X-Sync-Cursor: o cliente mantém o do corpo que já tem
+            return Response(status_code=304, headers={**headers, "ETag": matched})
+
+    async def render() -> tuple[dict, EncodedBody]:
+        extra, value = await compute()
+        return extra, EncodedBody(value)
+
+    extra, body = await response_cache.get_or_compute(endpoint, params, depends_on, render, versions=versions)
+    return encoded_json(request, body, {**extra, **headers}, etag_base=base)
+
+
+def encoded_json(request: Request, body, headers: dict | None = None, etag_base: str | None = None) -> Response:
+    """Resposta JSON na melhor codificação aceita (br/gzip); `body` é EncodedBody ou valor."""
+    if not isinstance(body, EncodedBody):
+        body = EncodedBody(body)
+    headers = {"Cache-Control": "no-cache", "Vary": "Accept-Encoding", **(headers or {})}
+    encoding = negotiate(request.headers.get("accept-encoding"), len(body.raw))
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    if etag_base is not None:
+        headers["ETag"] = f'"{etag_base}-{encoding}"'
+    return Response(body.get(encoding), media_type="application/json", headers=headers)
+
+
 @app.get("/events")
-def list_events(
+async def list_events(
+    request: Request,
     impact: str | None = None,
     event_type: str | None = Query(default=None, alias="type"),
     region: str | None = None,
-) -> list[dict]:
+    view: ListView = "full",
+    since: int | None = Query(default=None, ge=0),
+) -> list[dict] | dict:
+    """
+    Últimos 500 eventos (header X-Sync-Cursor). Com ?since=<cursor>, só o
+    que mudou desde então: {items, deleted, cursor, has_more, reset}.
+    """
+    filters = _event_filters(impact, event_type, region)
+    if since is not None:
+        delta = await sync.delta(
+            mongo_db, "events", filters, EVENT_VIEWS[view], since,
+            settings["sync_settle_seconds"], settings["tombstone_retention_hours"],
+        )
+        _stringify_ids(delta["items"])
+        return encoded_json(request, delta)
+
+    return await conditional_json(
+        request,
+        "events",
+        {"impact": impact, "type": event_type, "region": region, "view": view},
+        ("events",),
+        lambda: _query_events(filters, view),
+    )
+
+
+def _event_filters(impact: str | None, event_type: str | None, region: str | None) -> dict:
     filters: dict = {}
     if impact:
         filters["impact"] = impact
@@ -174,24 +353,42 @@ def list_events(
     if region and region != "all":
         # Supports both "BR", "US", "GLOBAL", etc.
         filters["location.country"] = region
+    return filters
 
-    # Fetch events including _id (don't suppress it)
-    events = list(
-        mongo_db.events.find(filters).sort("timestamp", -1).limit(500)
-    )
-    
+
+def _stringify_ids(events: list[dict]) -> None:
     # Convert ObjectId to string id
     for event in events:
         if "_id" in event:
             event["id"] = str(event["_id"])
             del event["_id"]
-            
-    return events
+
+
+async def _query_events(filters: dict, view: str = "full") -> tuple[dict, list[dict]]:
+    # Cursor lido antes da consulta: escritas concorrentes reaparecem no próximo delta
+    cursor = sync.current_cursor(settings["sync_settle_seconds"])
+
+    # Fetch events including _id (don't suppress it)
+    events = await (
+        mongo_db.events.find(filters, EVENT_VIEWS[view]).sort("timestamp", -1).limit(500).to_list(500)
+    )
+    _stringify_ids(events)
+    return {sync.CURSOR_HEADER: str(cursor)}, events
 
 
 @app.get("/events/geo-summary")
-def geo_summary() -> dict:
+async def geo_summary(request: Request) -> dict:
     """Agrupa eventos por UF e retorna contagem por região"""
+    return await conditional_json(
+        request, "geo-summary", {}, ("events",), lambda: _no_headers(_query_geo_summary())
+    )
+
+
+async def _no_headers(query) -> tuple[dict, object]:
+    return {}, await query
+
+
+async def _query_geo_summary() -> dict:
     pipeline = [
         {
             "$group": {
@@ -204,7 +401,7 @@ def geo_summary() -> dict:
         },
     ]
     
-    results = list(mongo_db.events.aggregate(pipeline))
+    results = await mongo_db.events.aggregate(pipeline).to_list(None)
     
     # Converte resultado em dicionário { "UF": count }
     geo_data = {}
@@ -224,66 +421,55 @@ async def get_narratives() -> list[dict]:
     Agrupa eventos das últimas 48h em 'Narrativas de Mercado' por setor.
     Gera títulos via LLM (OpenAI) ou Fallback seguro.
     """
+    return await response_cache.get_or_compute("narratives", {}, ("events",), _build_narratives)
+
+
+async def _build_narratives() -> list[dict]:
     try:
-        # 1. Filtro Temporal (48h)
+        # 1. Filtro Temporal (48h, alinhado à hora dos buckets)
         cutoff = datetime.utcnow() - timedelta(hours=48)
-        cutoff_iso = cutoff.isoformat() + "Z"
-
-        pipeline = [
-            {"$match": {"timestamp": {"$gte": cutoff_iso}}},
-            {"$sort": {"timestamp": 1}},  # Cronológico para a timeline
-            {
-                "$group": {
-                    "_id": "$sector",
-                    "events": {"$push": "$$ROOT"},
-                    "avg_polarity": {"$avg": "$analytics.sentiment.polarity"},
-                    "event_count": {"$sum": 1}
-                }
-            }
-        ]
-
-        # Executa agregação (Sync wrapper for PyMongo)
-        groups = list(mongo_db.events.aggregate(pipeline))
+        cutoff_hour = cutoff.isoformat()[:13]
+
+        # Narrativas materializadas pelo analysis: 1 doc por setor + buckets horários
+        # da janela (ver record_narrative_event). Leitura O(setores), sem $push de eventos
+        docs = await mongo_db.narratives.find({}).to_list(None)
+        buckets = await mongo_db.narrative_buckets.find(
+            {"hour": {"$gte": cutoff_hour}}, {"_id": 0, "expires_at": 0}
+        ).to_list(None)
+
+        totals: dict[str, dict] = {}
+        for bucket in buckets:
+            total = totals.setdefault(
+                bucket["sector"], {"count": 0, "polarity_sum": 0.0, "polarity_count": 0, "insights": {}}
+            )
+            total["count"] += bucket.get("count", 0)
+            total["polarity_sum"] += bucket.get("polarity_sum", 0.0)
+            total["polarity_count"] += bucket.get("polarity_count", 0)
+            for insight in bucket.get("insights", {}).values():
+                total["insights"][insight["text"]] = total["insights"].get(insight["text"], 0) + insight["count"]
+
+        groups = []
+        for doc in docs:
+            sector = doc["_id"]
+            total = totals.get(sector)
+            if not total or total["count"] == 0:
+                continue
+            # Cronológico para a timeline; descarta os que saíram da janela
+            events = [e for e in doc.get("events", []) if e.get("timestamp", "") >= cutoff_hour]
+            groups.append((sector, total, events))
 
         # Se não houver dados suficientes, retorna MOCK (Fallback)
         if not groups:
             return generate_mock_narratives()
 
-        # Preparar tasks para geração de títulos em paralelo
-        tasks = []
-        for group in groups:
-            sector = group["_id"] or "Global"
-            events = group["events"]
-            tasks.append(generate_narrative_title(events, sector))
-        
-        # Executar chamadas LLM e aguardar
-        titles = await asyncio.gather(*tasks)
+        # Executar chamadas LLM de título em paralelo e aguardar
+        titles = await asyncio.gather(
+            *(generate_narrative_title(events, sector) for sector, _total, events in groups)
+        )
 
         narratives = []
-        for i, group in enumerate(groups):
-            sector = group["_id"] or "Global"
-            events = group["events"]
-            avg_polarity = group.get("avg_polarity", 0)
-            
-            # Fix IDs in events
-            for evt in events:
-                if "_id" in evt:
-                    evt["id"] = str(evt["_id"])
-                    del evt["_id"]
-
-            # STRICT FILTER: Social Sector contains ONLY Reddit/Twitter
-            if sector == "Social":
-                # Filter events using CORRECT fields: 'link' (article URL) and 'source.url' (feed URL)
-                social_domains = ["reddit.com", "twitter.com", "x.com", "nitter."]
-                def is_social_event(e):
-                    combined = (e.get("link", "") + " " + (e.get("source", {}).get("url", "") or "")).lower()
-                    return any(d in combined for d in social_domains)
-                events = [e for e in events if is_social_event(e)]
-                # Update event count after filtering
-                group["event_count"] = len(events)
-            
-            # If Social became empty but had events, maybe title is now wrong? 
-            # It's fine, we just want to suppress non-social noise.
+        for (sector, total, events), title in zip(groups, titles):
+            avg_polarity = total["polarity_sum"] / total["polarity_count"] if total["polarity_count"] else 0
 
             sentiment_label = "Neutral"
             if avg_polarity > 0.05:
@@ -291,18 +477,18 @@ async def get_narratives() -> list[dict]:
             elif avg_polarity < -0.05:
                 sentiment_label = "Bearish"
 
-            # Compute most common insight from events
-            event_insights = [e.get("insight", "") for e in events if e.get("insight")]
-            most_common_insight = max(set(event_insights), key=event_insights.count) if event_insights else f"Monitorar impacto em {sector}."
+            # Insight mais frequente na janela
+            insights = total["insights"]
+            most_common_insight = max(insights, key=insights.get) if insights else f"Monitorar impacto em {sector}."
 
             narrative = {
                 # Deterministic ID for persistence (Watchlist)
                 "id": f"narrative-{sector.lower()}",
-                "title": titles[i], # Título gerado via LLM
+                "title": title, # Título gerado via LLM
                 "sector": sector,
                 "overall_sentiment": sentiment_label,
                 "insight": most_common_insight,
-                "event_count": group["event_count"],
+                "event_count": total["count"],
                 "last_updated": datetime.utcnow().isoformat() + "Z",
                 "events": events
             }
@@ -333,17 +519,148 @@ async def get_narratives() -> list[dict]:
         return generate_mock_narratives()
 
 
+# --- Séries temporais (rollups mantidos pelo analysis e pelo inference) ---
+
+ROLLUP_STEPS = {"1m": timedelta(minutes=1), "1h": timedelta(hours=1)}
+
+
+@app.get("/timeseries")
+async def get_timeseries(
+    resolution: Literal["1m", "1h"] = "1h",
+    dimension: Literal["sector", "country"] = "sector",
+    key: str | None = None,
+    points: int = Query(default=24, ge=1, le=1440),
+) -> dict:
+    """
+    Série dos últimos `points` buckets por setor ou país: contagem de
+    eventos, mix de impacto, sentimento médio e probabilidade média do
+    modelo. Buckets sem eventos vêm zerados (prontos para sparklines).
+    """
+    return await response_cache.get_or_compute(
+        "timeseries",
+        {"resolution": resolution, "dimension": dimension, "key": key, "points": points},
+        ("events", "predictions"),
+        lambda: _query_timeseries(resolution, dimension, key, points),
+    )
+
+
+async def _query_timeseries(resolution: str, dimension: str, key: str | None, points: int) -> dict:
+    step = ROLLUP_STEPS[resolution]
+    now = datetime.utcnow()
+    if resolution == "1h":
+        end = now.replace(minute=0, second=0, microsecond=0)
+    else:
+        end = now.replace(second=0, microsecond=0)
+    start = end - step * (points - 1)
+
+    query = {"resolution": resolution, "dimension": dimension, "bucket": {"$gte": start}}
+    if key:
+        query["key"] = key
+    docs = await mongo_db.rollups.find(query, {"_id": 0, "expires_at": 0}).to_list(None)
+
+    by_key: dict[str, dict] = {}
+    for doc in docs:
+        by_key.setdefault(doc["key"], {})[doc["bucket"]] = doc
+
+    series = {}
+    for name in sorted(by_key):
+        buckets = by_key[name]
+        values = []
+        for i in range(points):
+            bucket = start + step * i
+            doc = buckets.get(bucket, {})
+            impact = doc.get("impact", {})
+            sentiment_count = doc.get("sentiment_count", 0)
+            probability_count = doc.get("probability_count", 0)
+            values.append({
+                "t": bucket.isoformat() + "Z",
+                "count": doc.get("count", 0),
+                "impact": {level: impact.get(level, 0) for level in ("high", "medium", "low")},
+                "avg_sentiment": round(doc["sentiment_sum"] / sentiment_count, 4) if sentiment_count else None,
+                "avg_probability": round(doc["probability_sum"] / probability_count, 4) if probability_count else None,
+            })
+        series[name] = values
+
+    return {
+        "resolution": resolution,
+        "dimension": dimension,
+        "start": start.isoformat() + "Z",
+        "step_seconds": int(step.total_seconds()),
+        "series": series,
+    }
+
+
+# --- Humor do mercado (EWMA mantida no Redis pelo analysis e pelo inference) ---
+
+MOOD_KEYS_SET = "mood:keys"
+
+
+def _half_life_label(seconds: int) -> str:
+    if seconds % 3600 == 0:
+        return f"{seconds // 3600}h"
+    if seconds % 60 == 0:
+        return f"{seconds // 60}m"
+    return f"{seconds}s"
+
+
+@app.get("/mood")
+async def get_mood() -> dict:
+    """
+    Humor atual do mercado, sem tocar no Mongo: média exponencial da
+    polaridade (sentiment) e da probabilidade de impacto (probability),
+    geral ("all") e por setor, para cada meia-vida configurada.
+    `activity` é o peso decaído até agora (~ eventos recentes).
+    """
+    keys = sorted(await redis_client.smembers(MOOD_KEYS_SET))
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.time()
+    for key in keys:
+        pipe.hmget(key, "s", "w", "t")
+    results = await pipe.execute()
+    seconds, micros = results[0]
+    now = seconds + micros / 1_000_000
+
+    mood: dict = {"sentiment": {}, "probability": {}}
+    overall: dict[int, float] = {}  # meia-vida → sentimento geral
+    for key, (s, w, t) in zip(keys, results[1:]):
+        _prefix, metric, *scope, half_life = key.split(":")
+        if s is None or w is None or float(w) <= 0:
+            continue
+        half_life, scope = int(half_life), ":".join(scope)
+        value = round(float(s) / float(w), 4)
+        mood.setdefault(metric, {}).setdefault(scope, {})[_half_life_label(half_life)] = {
+            "value": value,
+            "activity": round(float(w) * 2 ** (-max(now - float(t), 0) / half_life), 3),
+        }
+        if metric == "sentiment" and scope == "all":
+            overall[half_life] = value
+
+    # Rótulo pela meia-vida mais curta do humor geral (mesmos limiares das narrativas)
+    value = overall[min(overall)] if overall else 0.0
+    label = "Neutral"
+    if value > 0.05:
+        label = "Bullish"
+    elif value < -0.05:
+        label = "Bearish"
+
+    return {"label": label, "value": value, "updated_at": datetime.utcfromtimestamp(now).isoformat() + "Z", **mood}
+
+
 # --- v1.1.0: Predictions Endpoint ---
 
 @app.get("/predictions")
-def get_predictions(
+async def get_predictions(
+    request: Request,
     sector: str | None = None,
     min_probability: float = Query(default=0.0, ge=0.0, le=1.0),
     limit: int = Query(default=500, ge=1, le=500),
+    view: ListView = "full",
+    since: int | None = Query(default=None, ge=0),
 ):
     """
     Retorna predições de probabilidade de impacto.
-    Filtros opcionais: sector, min_probability, limit.
+    Filtros opcionais: sector, min_probability, limit; view=card|map|full.
+    Com ?since=<X-Sync-Cursor>, só as predições novas/alteradas e as removidas.
     """
     query = {}
     if sector:
@@ -351,20 +668,45 @@ def get_predictions(
     if min_probability > 0:
         query["probability"] = {"$gte": min_probability}
 
-    predictions = list(
-        mongo_db.predictions.find(query, {"_id": 0})
+    if since is not None:
+        delta = await sync.delta(
+            mongo_db, "predictions", query, PREDICTION_VIEWS[view], since,
+            settings["sync_settle_seconds"], settings["tombstone_retention_hours"],
+        )
+        return encoded_json(request, delta)
+
+    return await conditional_json(
+        request,
+        "predictions",
+        {"sector": sector, "min_probability": min_probability, "limit": limit, "view": view},
+        ("predictions",),
+        lambda: _query_predictions(query, limit, view),
+    )
+
+
+async def _query_predictions(query: dict, limit: int, view: str = "full") -> tuple[dict, list[dict]]:
+    cursor = sync.current_cursor(settings["sync_settle_seconds"])
+    predictions = await (
+        mongo_db.predictions.find(query, PREDICTION_VIEWS[view])
         .sort("predicted_at", -1)
         .limit(limit)
+        .to_list(limit)
     )
-    return predictions
+    return {sync.CURSOR_HEADER: str(cursor)}, predictions
 
 
 @app.get("/predictions/stats")
-def get_predictions_stats():
+async def get_predictions_stats(request: Request):
     """
     Retorna estatísticas totais de predições no MongoDB (sem limit).
     Usado pelo dashboard para mostrar contadores reais.
     """
+    return await conditional_json(
+        request, "predictions-stats", {}, ("predictions",), lambda: _no_headers(_query_predictions_stats())
+    )
+
+
+async def _query_predictions_stats() -> dict:
     pipeline = [
         {
             "$group": {
@@ -374,7 +716,7 @@ def get_predictions_stats():
             }
         }
     ]
-    groups = list(mongo_db.predictions.aggregate(pipeline))
+    groups = await mongo_db.predictions.aggregate(pipeline).to_list(None)
 
     stats = {"total": 0, "high": 0, "medium": 0, "low": 0, "avg_probability": 0.0}
     total_prob = 0.0
@@ -390,14 +732,33 @@ def get_predictions_stats():
     return stats
 
 
+@app.get("/admin/indexes")
+async def admin_indexes(create: bool = False) -> dict:
+    """
+    Índices existentes por collection, os que diferem do declarado
+    (opções, ex.: TTL) e explain dos formatos de consulta (quais caem em
+    COLLSCAN). Com ?create=true, cria antes os que faltam e aplica o TTL.
+    """
+    created = await ensure_indexes(mongo_db) if create else None
+    existing = {}
+    for name in INDEXES:
+        existing[name] = sorted(await mongo_db[name].index_information())
+    return {
+        "created": created,
+        "indexes": existing,
+        "mismatched": await option_mismatches(mongo_db),
+        "queries": await collection_scan_report(mongo_db),
+    }
+
+
 @app.post("/admin/cleanup")
-def cleanup_old_data(keep_events: int = Query(default=1000, ge=100, le=5000)):
+async def cleanup_old_data(keep_events: int = Query(default=1000, ge=100, le=5000)):
     """
     Mantém apenas os N eventos mais recentes e suas predições.
     Remove eventos e predições mais antigos.
     """
-    total_events = mongo_db.events.count_documents({})
-    total_predictions = mongo_db.predictions.count_documents({})
+    total_events = await mongo_db.events.count_documents({})
+    total_predictions = await mongo_db.predictions.count_documents({})
 
     if total_events <= keep_events:
         return {
@@ -411,11 +772,12 @@ def cleanup_old_data(keep_events: int = Query(default=1000, ge=100, le=5000)):
         }
 
     # Find the timestamp cutoff (keep_events most recent)
-    cutoff_event = list(
+    cutoff_event = await (
         mongo_db.events.find({}, {"timestamp": 1})
         .sort("timestamp", -1)
         .skip(keep_events)
         .limit(1)
+        .to_list(1)
     )
 
     if not cutoff_event:
@@ -424,26 +786,35 @@ def cleanup_old_data(keep_events: int = Query(default=1000, ge=100, le=5000)):
     cutoff_ts = cutoff_event[0].get("timestamp")
 
     # Get IDs of events to delete
-    old_events = list(
-        mongo_db.events.find(
-            {"timestamp": {"$lte": cutoff_ts}},
-            {"id": 1, "_id": 1}
-        )
-    )
+    old_events = await mongo_db.events.find(
+        {"timestamp": {"$lte": cutoff_ts}},
+        {"id": 1, "_id": 1}
+    ).to_list(None)
     old_event_ids = [e.get("id", str(e["_id"])) for e in old_events]
 
     # Delete old predictions
-    pred_result = mongo_db.predictions.delete_many(
+    pred_result = await mongo_db.predictions.delete_many(
         {"event_id": {"$in": old_event_ids}}
     )
+    # Remove os eventos apagados das narrativas materializadas
+    await mongo_db.narratives.update_many(
+        {}, {"$pull": {"events": {"id": {"$in": [str(e["_id"]) for e in old_events]}}}}
+    )
 
     # Delete old events
-    event_result = mongo_db.events.delete_many(
+    event_result = await mongo_db.events.delete_many(
         {"timestamp": {"$lte": cutoff_ts}}
     )
 
-    events_after = mongo_db.events.count_documents({})
-    preds_after = mongo_db.predictions.count_documents({})
+    # Tombstones para o delta-sync (eventos pelo _id, como em GET /events)
+    await sync.record_deletes(mongo_db, "events", [str(e["_id"]) for e in old_events])
+    await sync.record_deletes(mongo_db, "predictions", old_event_ids)
+
+    # Invalida o cache de respostas (events e predictions mudaram)
+    await bump(redis_client, "events", "predictions")
+
+    events_after = await mongo_db.events.count_documents({})
+    preds_after = await mongo_db.predictions.count_documents({})
 
     return {
         "message": f"Limpeza concluída. Mantidos os {keep_events} eventos mais recentes.",
@@ -549,12 +920,136 @@ Gere uma análise de MERCADO FINANCEIRO em PORTUGUÊS com:
 Seja profissional e analítico. Use os dados reais fornecidos."""
 
 
+# Métricas dos módulos crash/market: um $facet por collection, calculado no
+# Mongo. A API recebe só os totais (tamanho constante), não os documentos
+AI_SECTORS = ["Market", "Macro", "Commodities", "Tech", "Crypto", "Social"]
+CRISIS_KEYWORDS = ["crash", "colapso", "recessão", "recession", "default", "crise", "crisis", "guerra", "war"]
+URGENCY_WEIGHTS = {"critical": 3, "urgent": 2, "normal": 1, "low": 0}
+
+
+def _count_if(condition: dict) -> dict:
+    return {"$sum": {"$cond": [condition, 1, 0]}}
+
+
+_IS_BULLISH = {"$eq": ["$analytics.sentiment.label", "Bullish"]}
+_IS_BEARISH = {"$eq": ["$analytics.sentiment.label", "Bearish"]}
+_IS_HIGH = {"$eq": ["$impact", "high"]}
+
+
+async def _crash_metrics() -> dict:
+    crisis_pattern = "|".join(re.escape(k) for k in CRISIS_KEYWORDS)
+    urgency_weight = {
+        "$switch": {
+            "branches": [
+                {"case": {"$eq": ["$urgency", level]}, "then": weight}
+                for level, weight in URGENCY_WEIGHTS.items()
+            ],
+            "default": 1,
+        }
+    }
+    events_pipeline = [
+        {"$facet": {
+            "totals": [{"$group": {
+                "_id": None,
+                "total": {"$sum": 1},
+                "high": _count_if(_IS_HIGH),
+                "bullish": _count_if(_IS_BULLISH),
+                "bearish": _count_if(_IS_BEARISH),
+                "crisis": _count_if({"$regexMatch": {
+                    "input": {"$concat": [
+                        {"$ifNull": ["$title", ""]}, " ", {"$ifNull": ["$description", ""]},
+                    ]},
+                    "regex": crisis_pattern,
+                    "options": "i",
+                }}),
+                "urgency_sum": {"$sum": urgency_weight},
+            }}],
+            "top_alert_sectors": [
+                {"$match": {"impact": "high"}},
+                {"$group": {"_id": {"$ifNull": ["$sector", "Other"]}, "count": {"$sum": 1}}},
+                {"$sort": {"count": -1, "_id": 1}},
+                {"$limit": 3},
+            ],
+        }}
+    ]
+    predictions_pipeline = [
+        {"$group": {
+            "_id": None,
+            "count": {"$sum": 1},
+            "avg_probability": {"$avg": {"$ifNull": ["$probability", 0]}},
+            "ml_high": _count_if({"$gte": [{"$ifNull": ["$probability", 0]}, 0.75]}),
+        }}
+    ]
+    facets, ml = await asyncio.gather(
+        mongo_db.events.aggregate(events_pipeline).to_list(1),
+        mongo_db.predictions.aggregate(predictions_pipeline).to_list(1),
+    )
+    totals = (facets[0]["totals"] or [{}])[0] if facets else {}
+    top_sectors = facets[0]["top_alert_sectors"] if facets else []
+    ml = ml[0] if ml else {}
+
+    total = totals.get("total", 0)
+    high = totals.get("high", 0)
+    bullish = totals.get("bullish", 0)
+    bearish = totals.get("bearish", 0)
+    return {
+        "total_events": total,
+        "high_impact": high,
+        "high_pct": (high / max(total, 1)) * 100,
+        "bullish": bullish,
+        "bearish": bearish,
+        "neutral": total - bullish - bearish,
+        "bear_ratio": (bearish / max(total, 1)) * 100,
+        "top_alert_sectors": ", ".join(f"{s['_id']}({s['count']})" for s in top_sectors) or "nenhum",
+        "avg_urgency": f"{totals.get('urgency_sum', 0) / max(total, 1):.1f}/3.0",
+        "crisis_count": totals.get("crisis", 0),
+        "avg_ml_prob": ml.get("avg_probability") or 0.0,
+        "ml_high_count": ml.get("ml_high", 0),
+    }
+
+
+async def _market_sector_data() -> list[dict]:
+    match = {"$match": {"sector": {"$in": AI_SECTORS}}}
+    events_pipeline = [match, {"$group": {
+        "_id": "$sector",
+        "count": {"$sum": 1},
+        "bullish": _count_if(_IS_BULLISH),
+        "bearish": _count_if(_IS_BEARISH),
+        "high": _count_if(_IS_HIGH),
+    }}]
+    predictions_pipeline = [match, {"$group": {
+        "_id": "$sector",
+        "avg_prob": {"$avg": {"$ifNull": ["$probability", 0]}},
+    }}]
+    event_groups, prediction_groups = await asyncio.gather(
+        mongo_db.events.aggregate(events_pipeline).to_list(None),
+        mongo_db.predictions.aggregate(predictions_pipeline).to_list(None),
+    )
+    by_sector = {g["_id"]: g for g in event_groups}
+    avg_prob = {g["_id"]: g["avg_prob"] for g in prediction_groups}
+
+    sector_data = []
+    for sector in AI_SECTORS:
+        group = by_sector.get(sector)
+        if not group:
+            continue
+        sector_data.append({
+            "sector": sector,
+            "count": group["count"],
+            "bullish": group["bullish"],
+            "bearish": group["bearish"],
+            "high": group["high"],
+            "avg_prob": avg_prob.get(sector) or 0.0,
+        })
+    return sector_data
+
+
 async def _call_llm(prompt: str, provider: str, api_key: str) -> str:
     """Chama o LLM escolhido e retorna o texto."""
     if provider == "openai":
-        from openai import OpenAI
-        client = OpenAI(api_key=api_key)
-        response = client.chat.completions.create(
+        from openai import AsyncOpenAI
+        client = AsyncOpenAI(api_key=api_key)
+        response = await client.chat.completions.create(
             model="gpt-4o-mini",
             messages=[{"role": "user", "content": prompt}],
             max_tokens=2000,
@@ -565,7 +1060,7 @@ async def _call_llm(prompt: str, provider: str, api_key: str) -> str:
     elif provider == "gemini":
         genai.configure(api_key=api_key)
         model = genai.GenerativeModel("gemini-2.0-flash")
-        response = model.generate_content(prompt)
+        response = await model.generate_content_async(prompt)
         return response.text
 
     return "Provider não suportado."
@@ -586,85 +1081,28 @@ async def ai_analyze(
 
         if module == "summary":
             # Top 10 eventos por probabilidade ML
-            predictions = list(
+            predictions = await (
                 mongo_db.predictions.find({}, {"_id": 0})
                 .sort("probability", -1)
                 .limit(10)
+                .to_list(10)
             )
             event_ids = [p["event_id"] for p in predictions]
-            events = list(
-                mongo_db.events.find({"id": {"$in": event_ids}}, {"_id": 0})
-            )
+            events = await mongo_db.events.find({"id": {"$in": event_ids}}, {"_id": 0}).to_list(None)
             prompt = _build_summary_prompt(events, predictions)
 
         elif module == "crash":
-            # Métricas agregadas
-            all_events = list(mongo_db.events.find({}, {"_id": 0}))
-            all_preds = list(mongo_db.predictions.find({}, {"_id": 0}))
-
-            total = len(all_events)
-            high = sum(1 for e in all_events if e.get("impact") == "high")
-            bullish = sum(1 for e in all_events if e.get("analytics", {}).get("sentiment", {}).get("label") == "Bullish")
-            bearish = sum(1 for e in all_events if e.get("analytics", {}).get("sentiment", {}).get("label") == "Bearish")
-            neutral = total - bullish - bearish
-
-            # Crisis keywords
-            crisis_kw = ["crash", "colapso", "recessão", "recession", "default", "crise", "crisis", "guerra", "war"]
-            crisis_count = sum(
-                1 for e in all_events
-                if any(k in (e.get("title", "") + " " + e.get("description", "")).lower() for k in crisis_kw)
+            # Métricas agregadas (no servidor; cacheadas até a próxima escrita)
+            metrics = await response_cache.get_or_compute(
+                "ai-crash-metrics", {}, ("events", "predictions"), _crash_metrics
             )
-
-            # Urgency
-            urg_map = {"critical": 3, "urgent": 2, "normal": 1, "low": 0}
-            avg_urg = sum(urg_map.get(e.get("urgency", "normal"), 1) for e in all_events) / max(total, 1)
-
-            # Top alert sectors
-            sector_alerts = {}
-            for e in all_events:
-                if e.get("impact") == "high":
-                    s = e.get("sector", "Other")
-                    sector_alerts[s] = sector_alerts.get(s, 0) + 1
-            top_sectors = sorted(sector_alerts.items(), key=lambda x: -x[1])[:3]
-            top_sectors_str = ", ".join(f"{s}({c})" for s, c in top_sectors) or "nenhum"
-
-            # ML metrics
-            avg_ml = sum(p.get("probability", 0) for p in all_preds) / max(len(all_preds), 1)
-            ml_high = sum(1 for p in all_preds if p.get("probability", 0) >= 0.75)
-
-            metrics = {
-                "total_events": total,
-                "high_impact": high,
-                "high_pct": (high / max(total, 1)) * 100,
-                "bullish": bullish,
-                "bearish": bearish,
-                "neutral": neutral,
-                "bear_ratio": (bearish / max(total, 1)) * 100,
-                "top_alert_sectors": top_sectors_str,
-                "avg_urgency": f"{avg_urg:.1f}/3.0",
-                "crisis_count": crisis_count,
-                "avg_ml_prob": avg_ml,
-                "ml_high_count": ml_high,
-            }
             prompt = _build_crash_prompt(metrics)
 
         elif module == "market":
             # Dados por setor
-            sectors = ["Market", "Macro", "Commodities", "Tech", "Crypto", "Social"]
-            sector_data = []
-            for sector in sectors:
-                events = list(mongo_db.events.find({"sector": sector}, {"_id": 0}))
-                preds = list(mongo_db.predictions.find({"sector": sector}, {"_id": 0}))
-                if not events:
-                    continue
-                sector_data.append({
-                    "sector": sector,
-                    "count": len(events),
-                    "bullish": sum(1 for e in events if e.get("analytics", {}).get("sentiment", {}).get("label") == "Bullish"),
-                    "bearish": sum(1 for e in events if e.get("analytics", {}).get("sentiment", {}).get("label") == "Bearish"),
-                    "high": sum(1 for e in events if e.get("impact") == "high"),
-                    "avg_prob": sum(p.get("probability", 0) for p in preds) / max(len(preds), 1),
-                })
+            sector_data = await response_cache.get_or_compute(
+                "ai-market-sectors", {}, ("events", "predictions"), _market_sector_data
+            )
             prompt = _build_market_prompt(sector_data)
 
         else:
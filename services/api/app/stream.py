@@ -0,0 +1,158 @@
+"""
+Stream — Push de eventos e predições novos para os dashboards (SSE).
+
+Os workers publicam cada item novo no Redis (pub/sub), já na view card
+de GET /events e GET /predictions:
+
+    stream:events        analysis (evento novo)
+    stream:predictions   inference (predição nova, no flush do writer)
+
+    mensagem: {"filter": {"sector", "impact", "region", "type"}, "item": {...}}
+              (predições só têm sector e region no filtro)
+
+Cada processo da API mantém UMA assinatura no Redis (StreamHub) e
+repassa as mensagens aos clientes conectados em GET /stream, conforme o
+filtro de cada um (sector/impact/region/type). O frame SSE é montado uma
+vez por mensagem e compartilhado entre os clientes: uma conexão custa só
+o seu filtro e uma fila curta de referências.
+
+Frames:
+    event: events | predictions    data: item (view card)
+    event: resync                  data: {}   mensagens perdidas (fila cheia
+                                              ou Redis reconectou): o cliente
+                                              refaz o delta-sync (?since=)
+    : ping                         heartbeat (mantém proxies abertos)
+
+Change streams do Mongo exigiriam replica set; o Mongo do compose é standalone.
+"""
+
+import asyncio
+import json
+import os
+
+CHANNELS = {"stream:events": "events", "stream:predictions": "predictions"}
+FILTER_FIELDS = ("sector", "impact", "region", "type")
+
+RESYNC_FRAME = b"event: resync\ndata: {}\n\n"
+PING_FRAME = b": ping\n\n"
+
+
+class Subscriber:
+    __slots__ = ("kinds", "filters", "queue", "overflow")
+
+    def __init__(self, kinds: frozenset, filters: dict, queue_size: int):
+        self.kinds = kinds
+        self.filters = filters
+        self.queue: asyncio.Queue = asyncio.Queue(queue_size)
+        self.overflow = False
+
+    def matches(self, kind: str, fields: dict) -> bool:
+        if kind not in self.kinds:
+            return False
+        # Campo ausente na mensagem não filtra (predições não têm impact/type)
+        for field, value in self.filters.items():
+            if field in fields and fields[field] != value:
+                return False
+        return True
+
+
+class StreamHub:
+    def __init__(self, redis_client, queue_size: int = 64, max_subscribers: int = 5000):
+        self.redis = redis_client  # redis.asyncio
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self.subscribers: set[Subscriber] = set()
+        self._published = 0
+        self._delivered = 0
+        self._dropped = 0
+
+    def full(self) -> bool:
+        """Processo no limite de conexões (STREAM_MAX_SUBSCRIBERS)."""
+        return len(self.subscribers) >= self.max_subscribers
+
+    def dispatch(self, kind: str, fields: dict, frame: bytes) -> None:
+        self._published += 1
+        for subscriber in self.subscribers:
+            if not subscriber.matches(kind, fields):
+                continue
+            try:
+                subscriber.queue.put_nowait(frame)
+                self._delivered += 1
+            except asyncio.QueueFull:
+                # Cliente lento: descarta e pede resync em vez de acumular memória
+                subscriber.overflow = True
+                self._dropped += 1
+
+    def _resync_all(self) -> None:
+        for subscriber in self.subscribers:
+            try:
+                subscriber.queue.put_nowait(RESYNC_FRAME)
+            except asyncio.QueueFull:
+                subscriber.overflow = True
+
+    async def run(self) -> None:
+        """Tarefa de background: assina os canais e repassa (reconecta se o Redis cair)."""
+        while True:
+            pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(*CHANNELS)
+                print(f"[api/stream] Assinando {', '.join(CHANNELS)}")
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    kind = CHANNELS.get(message["channel"])
+                    try:
+                        payload = json.loads(message["data"])
+                    except (TypeError, ValueError):
+                        continue
+                    frame = f"event: {kind}\ndata: {json.dumps(payload.get('item', {}))}\n\n".encode()
+                    self.dispatch(kind, payload.get("filter") or {}, frame)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[api/stream] Erro na assinatura, reconectando: {e}")
+                self._resync_all()
+                await asyncio.sleep(1)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+    async def frames(self, kinds: frozenset, filters: dict, heartbeat: float):
+        """Frames SSE de um cliente (gerador do StreamingResponse); registra e remove o cliente."""
+        subscriber = Subscriber(kinds, filters, self.queue_size)
+        self.subscribers.add(subscriber)
+        try:
+            yield b"retry: 5000\n: connected\n\n"
+            while True:
+                if subscriber.overflow:
+                    subscriber.overflow = False
+                    while not subscriber.queue.empty():
+                        subscriber.queue.get_nowait()
+                    yield RESYNC_FRAME
+                try:
+                    yield await asyncio.wait_for(subscriber.queue.get(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield PING_FRAME
+        finally:
+            self.subscribers.discard(subscriber)
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": len(self.subscribers),
+            "published": self._published,
+            "delivered": self._delivered,
+            "dropped": self._dropped,
+            "process_rss_mb": _rss_mb(),
+        }
+
+
+def _rss_mb() -> float | None:
+    """Memória residente do processo (Linux), para medir o custo por conexão."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return round(pages * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024, 1)
+    except (OSError, ValueError, IndexError):
+        return None
@@ -0,0 +1,106 @@
+"""
+Sync — Delta-sync de GET /events e GET /predictions por cursor.
+
+Quem escreve marca cada documento com `updated_at` (relógio do Mongo,
+via $currentDate) a cada upsert; quem apaga registra um tombstone
+`{collection, id, deleted_at}` na collection `tombstones` (TTL de
+TOMBSTONE_RETENTION_HOURS). O cursor é um instante em epoch ms:
+
+    GET /events                → lista completa + header X-Sync-Cursor
+    GET /events?since=<cursor> → {"items":    alterados desde o cursor,
+                                  "deleted":  ids removidos desde o cursor,
+                                  "cursor":   próximo cursor,
+                                  "has_more": página cheia, pedir de novo já,
+                                  "reset":    cursor expirou, recarregar tudo}
+
+O cliente aplica primeiro `deleted` e depois `items` (um id apagado e
+reinserido volta em `items`, com o estado atual).
+
+O cursor nunca passa de `agora - SYNC_SETTLE_SECONDS`: uma escrita que
+o Mongo carimbou há pouco pode ainda não estar visível para a leitura
+(ou o relógio do Mongo e o da API podem divergir); deixá-la sempre acima
+do cursor garante que ela vem no próximo delta. Reentregas são
+idempotentes no cliente (merge por id).
+"""
+
+from datetime import datetime, timedelta, timezone
+
+CURSOR_HEADER = "X-Sync-Cursor"
+DELTA_PAGE_SIZE = 500
+
+
+def _to_ms(at: datetime) -> int:
+    return int(at.replace(tzinfo=timezone.utc).timestamp() * 1000)
+
+
+def _from_ms(ms: int) -> datetime:
+    """Epoch ms → datetime UTC sem tzinfo (como o pymongo devolve)."""
+    return datetime.fromtimestamp(ms / 1000, timezone.utc).replace(tzinfo=None)
+
+
+def current_cursor(settle_seconds: float) -> int:
+    """Cursor de uma leitura completa feita agora."""
+    return _to_ms(datetime.utcnow() - timedelta(seconds=settle_seconds))
+
+
+async def record_deletes(db, collection: str, ids: list[str]) -> None:
+    """Tombstones dos ids apagados de `collection` (motor)."""
+    if not ids:
+        return
+    deleted_at = datetime.utcnow()
+    await db.tombstones.insert_many(
+        [{"collection": collection, "id": str(doc_id), "deleted_at": deleted_at} for doc_id in ids],
+        ordered=False,
+    )
+
+
+async def delta(
+    db,
+    collection: str,
+    filters: dict,
+    projection: dict | None,
+    since: int,
+    settle_seconds: float,
+    retention_hours: int,
+) -> dict:
+    """Documentos de `collection` alterados e ids removidos no intervalo (since, cursor]."""
+    now = datetime.utcnow()
+    if _from_ms(since) < now - timedelta(hours=retention_hours):
+        # Tombstones mais antigos já expiraram: o delta não seria completo
+        return {"items": [], "deleted": [], "cursor": since, "has_more": False, "reset": True}
+
+    since_dt = _from_ms(since)
+    upper = max(since_dt, _from_ms(current_cursor(settle_seconds)))
+    if projection and any(value for value in projection.values()):
+        # Projeção de inclusão (views card/map): updated_at é preciso para paginar
+        projection = {**projection, "updated_at": 1}
+
+    query = {**filters, "updated_at": {"$gt": since_dt, "$lte": upper}}
+    items = await (
+        db[collection].find(query, projection)
+        .sort("updated_at", 1)
+        .limit(DELTA_PAGE_SIZE + 1)
+        .to_list(DELTA_PAGE_SIZE + 1)
+    )
+
+    has_more = len(items) > DELTA_PAGE_SIZE
+    if has_more:
+        # Corta a página num instante fechado: o bulk_write de um flush pode
+        # carimbar centenas de documentos no mesmo milissegundo, e `$gt` no
+        # próximo delta pularia os que ficassem de fora da página.
+        upper = items[DELTA_PAGE_SIZE - 1]["updated_at"]
+        items = [item for item in items if item["updated_at"] < upper]
+        items += await db[collection].find({**filters, "updated_at": upper}, projection).to_list(None)
+
+    tombstones = await db.tombstones.find(
+        {"collection": collection, "deleted_at": {"$gt": since_dt, "$lte": upper}},
+        {"_id": 0, "id": 1},
+    ).to_list(None)
+
+    return {
+        "items": items,
+        "deleted": list(dict.fromkeys(t["id"] for t in tombstones)),
+        "cursor": max(since, _to_ms(upper)),
+        "has_more": has_more,
+        "reset": False,
+    }
@@ -0,0 +1,150 @@
+"""
+loadtest.py — Teste de carga da API (concorrência entre endpoints lentos e rápidos)
+
+Dispara, ao mesmo tempo, clientes num endpoint pesado (consulta real ao
+Mongo, com parâmetros aleatórios para não sair do cache de respostas) e
+clientes num endpoint leve. Com handlers bloqueando o event loop, a
+latência do endpoint leve sobe junto com a do pesado; com a API async,
+ela fica estável.
+
+Com --payloads, mede em vez disso o tamanho da resposta de cada view
+(?view=card|map|full) de /events e /predictions: bytes crus, bytes
+trafegados (Accept-Encoding: br, gzip), tempo de resposta e o custo de
+um poll repetido (If-None-Match → 304).
+
+Requer httpx (pip install httpx). Uso:
+    python services/api/loadtest.py
+    python services/api/loadtest.py --base-url http://localhost:8000 --duration 30
+    python services/api/loadtest.py --slow-clients 50 --fast-clients 20 \\
+        --slow "/predictions?min_probability={rand}&limit=500" --fast "/health"
+    python services/api/loadtest.py --payloads
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+import httpx
+import numpy as np
+
+
+async def worker(client: httpx.AsyncClient, template: str, deadline: float, latencies: list, errors: list) -> None:
+    while time.perf_counter() < deadline:
+        path = template.format(rand=round(random.random() * 0.5, 6))
+        start = time.perf_counter()
+        try:
+            response = await client.get(path)
+            response.raise_for_status()
+            latencies.append((time.perf_counter() - start) * 1000)
+        except Exception as e:
+            errors.append(type(e).__name__)
+
+
+def report(name: str, latencies: list, errors: list, duration: float) -> None:
+    if not latencies:
+        print(f"   {name:<6s} sem respostas ({len(errors)} erros)")
+        return
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    print(
+        f"   {name:<6s} {len(latencies) / duration:>8.1f} req/s | "
+        f"p50 {p50:>8.1f} | p95 {p95:>8.1f} | p99 {p99:>8.1f} ms | erros {len(errors)}"
+    )
+
+
+async def run(args) -> None:
+    limits = httpx.Limits(max_connections=args.slow_clients + args.fast_clients)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=args.timeout) as client:
+        deadline = time.perf_counter() + args.duration
+        slow = ([], [])
+        fast = ([], [])
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(worker(client, args.slow, deadline, *slow) for _ in range(args.slow_clients)),
+            *(worker(client, args.fast, deadline, *fast) for _ in range(args.fast_clients)),
+        )
+        elapsed = time.perf_counter() - start
+
+    print(f"\n⏱️  Resultados ({elapsed:.1f}s):")
+    report("lento", *slow, elapsed)
+    report("rápido", *fast, elapsed)
+    print()
+
+
+PAYLOAD_ENDPOINTS = ("/events", "/predictions?limit=500")
+VIEWS = ("full", "card", "map")
+
+
+async def payloads(args) -> None:
+    """Tamanho e tempo de resposta de cada view (2ª requisição sai do cache da API; 3ª revalida o ETag)."""
+    print(f"\n📦 Payload por view:")
+    print(
+        f"   {'endpoint':<14s} {'view':<5s} {'itens':>6s} {'bytes':>10s} {'no fio':>14s} "
+        f"{'1ª (ms)':>9s} {'cache (ms)':>10s} {'304 (ms)':>9s}"
+    )
+    headers = {"Accept-Encoding": "br, gzip"}
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, headers=headers) as client:
+        for endpoint in PAYLOAD_ENDPOINTS:
+            full_size = None
+            for view in VIEWS:
+                separator = "&" if "?" in endpoint else "?"
+                path = f"{endpoint}{separator}view={view}"
+                timings = []
+                for _ in range(2):
+                    start = time.perf_counter()
+                    response = await client.get(path)
+                    response.raise_for_status()
+                    timings.append((time.perf_counter() - start) * 1000)
+                body = response.content
+                wire = response.num_bytes_downloaded
+                encoding = response.headers.get("content-encoding", "identity")
+                full_size = full_size or len(body)
+
+                # Poll repetido: só headers se a versão de escrita não mudou
+                etag = response.headers.get("etag")
+                revalidation = "-"
+                if etag:
+                    start = time.perf_counter()
+                    conditional = await client.get(path, headers={"If-None-Match": etag})
+                    elapsed = (time.perf_counter() - start) * 1000
+                    revalidation = f"{elapsed:.1f}" if conditional.status_code == 304 else str(conditional.status_code)
+                print(
+                    f"   {endpoint.split('?')[0]:<14s} {view:<5s} {len(response.json()):>6d} "
+                    f"{len(body):>10,d} {wire:>8,d} {encoding:<5s} "
+                    f"{timings[0]:>9.1f} {timings[1]:>10.1f} {revalidation:>9s}"
+                    + (f"   ({len(body) / full_size:.0%} do full)" if view != "full" else "")
+                )
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga da API")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--duration", type=float, default=20.0, help="Duração em segundos")
+    parser.add_argument("--slow", default="/predictions?min_probability={rand}&limit=500",
+                        help="Endpoint pesado ({rand} = número aleatório, evita o cache)")
+    parser.add_argument("--fast", default="/health", help="Endpoint leve")
+    parser.add_argument("--slow-clients", type=int, default=50)
+    parser.add_argument("--fast-clients", type=int, default=20)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--payloads", action="store_true", help="Só mede o tamanho das views e sai")
+    args = parser.parse_args()
+
+    if args.payloads:
+        asyncio.run(payloads(args))
+        return
+
+    print(f"\n{'='*60}")
+    print(f"  OpenFinance Intel — Load Test")
+    print(f"{'='*60}")
+    print(f"  Base URL:    {args.base_url}")
+    print(f"  Duração:     {args.duration:.0f}s")
+    print(f"  Lento:       {args.slow} ({args.slow_clients} clientes)")
+    print(f"  Rápido:      {args.fast} ({args.fast_clients} clientes)")
+    print(f"{'='*60}")
+
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+streambench.py — Benchmark do push SSE (GET /stream) com muitos assinantes
+
+Abre N conexões em GET /stream (metade com filtro sector=Tech, metade
+sem filtro), publica M mensagens sintéticas direto no canal Redis
+`stream:events` (setores alternando entre Tech e Energy) e mede:
+
+    - entregas recebidas vs esperadas (o filtro por setor é respeitado?)
+    - latência publish → cliente (p50/p95/p99/máx)
+    - memória do processo da API antes/depois das conexões (/health)
+
+As mensagens sintéticas chegam também aos dashboards abertos: rodar
+contra um ambiente de desenvolvimento. Com vários workers do uvicorn,
+/health reflete só o processo que respondeu.
+
+Requer httpx e redis (pip install httpx redis). Uso:
+    python services/api/streambench.py
+    python services/api/streambench.py --subscribers 1000 --messages 200 --rate 50
+    python services/api/streambench.py --base-url http://localhost:8000 --redis-host localhost
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+import numpy as np
+from redis import asyncio as aioredis
+
+CHANNEL = "stream:events"
+SECTORS = ("Tech", "Energy")
+
+
+async def subscriber(client: httpx.AsyncClient, sector: str | None, connected: list, latencies: list, received: list, errors: list) -> None:
+    params = {"types": "events"}
+    if sector:
+        params["sector"] = sector
+    count = 0
+    try:
+        async with client.stream("GET", "/stream", params=params) as response:
+            response.raise_for_status()
+            connected.append(1)
+            async for line in response.aiter_lines():
+                if line.startswith(": connected"):
+                    continue
+                if not line.startswith("data:"):
+                    continue
+                item = json.loads(line[5:])
+                if "bench_sent_at" in item:
+                    latencies.append((time.time() - item["bench_sent_at"]) * 1000)
+                    count += 1
+                    if item.get("bench_last"):
+                        break
+    except Exception as e:
+        errors.append(type(e).__name__)
+    finally:
+        received.append(count)
+
+
+async def stream_stats(client: httpx.AsyncClient) -> dict:
+    response = await client.get("/health")
+    response.raise_for_status()
+    return response.json().get("stream", {})
+
+
+async def run(args) -> None:
+    redis_client = aioredis.Redis(host=args.redis_host, port=args.redis_port)
+    limits = httpx.Limits(max_connections=args.subscribers + 10)
+    timeout = httpx.Timeout(args.timeout, read=None)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=timeout) as client:
+        before = await stream_stats(client)
+        connected, latencies, received, errors = [], [], [], []
+        tasks = [
+            asyncio.create_task(subscriber(
+                client, SECTORS[0] if i % 2 else None, connected, latencies, received, errors
+            ))
+            for i in range(args.subscribers)
+        ]
+
+        # Espera as conexões se registrarem na API
+        deadline = time.perf_counter() + args.timeout
+        while time.perf_counter() < deadline:
+            stats = await stream_stats(client)
+            if stats.get("subscribers", 0) - before.get("subscribers", 0) >= args.subscribers:
+                break
+            await asyncio.sleep(0.2)
+        during = await stream_stats(client)
+        print(f"   Conectados: {len(connected)}/{args.subscribers} ({len(errors)} erros)")
+
+        # Publica as mensagens (a última, sem filtro de setor, encerra todos os assinantes)
+        start = time.perf_counter()
+        for i in range(args.messages):
+            last = i == args.messages - 1
+            sector = SECTORS[0] if last else SECTORS[i % 2]
+            message = {
+                "filter": {"sector": sector, "impact": "high", "region": "BR", "type": "financial"},
+                "item": {"id": f"bench-{i}", "title": "streambench", "bench_sent_at": time.time(), "bench_last": last},
+            }
+            await redis_client.publish(CHANNEL, json.dumps(message))
+            await asyncio.sleep(1 / args.rate)
+        published = time.perf_counter() - start
+
+        try:
+            await asyncio.wait_for(asyncio.gather(*tasks), args.timeout)
+        except asyncio.TimeoutError:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        after = await stream_stats(client)
+    await redis_client.aclose()
+
+    # Sem filtro: todas as mensagens; sector=Tech: só as de Tech
+    tech_messages = sum(1 for i in range(args.messages) if i == args.messages - 1 or i % 2 == 0)
+    unfiltered = (args.subscribers + 1) // 2
+    expected = unfiltered * args.messages + (args.subscribers - unfiltered) * tech_messages
+
+    print(f"\n⏱️  Resultados ({published:.1f}s publicando):")
+    print(f"   Entregas:   {sum(received):,d} / {expected:,d} esperadas "
+          f"(descartadas pela API: {after.get('dropped', 0) - before.get('dropped', 0)})")
+    if latencies:
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        print(f"   Latência:   p50 {p50:.1f} | p95 {p95:.1f} | p99 {p99:.1f} | máx {max(latencies):.1f} ms")
+    rss_before, rss_during = before.get("process_rss_mb"), during.get("process_rss_mb")
+    if rss_before is not None and rss_during is not None:
+        connections = max(during.get("subscribers", 0) - before.get("subscribers", 0), 1)
+        per_connection = (rss_during - rss_before) * 1024 / connections
+        print(f"   Memória:    {rss_before:.1f} → {rss_during:.1f} MB (~{per_connection:.1f} KB por conexão)")
+    if errors:
+        print(f"   Erros:      {', '.join(sorted(set(errors)))}")
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do push SSE (GET /stream)")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--redis-host", default="localhost")
+    parser.add_argument("--redis-port", type=int, default=6379)
+    parser.add_argument("--subscribers", type=int, default=1000)
+    parser.add_argument("--messages", type=int, default=100)
+    parser.add_argument("--rate", type=float, default=20.0, help="Mensagens publicadas por segundo")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    print(f"\n{'='*60}")
+    print(f"  OpenFinance Intel — Stream Benchmark")
+    print(f"{'='*60}")
+    print(f"  Base URL:    {args.base_url}")
+    print(f"  Redis:       {args.redis_host}:{args.redis_port} ({CHANNEL})")
+    print(f"  Assinantes:  {args.subscribers} (metade com sector={SECTORS[0]})")
+    print(f"  Mensagens:   {args.messages} a {args.rate:.0f}/s")
+    print(f"{'='*60}")
+
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Fixtures da API com Mongo e Redis em memória (mongomock-motor, fakeredis).
+
+Rodar a partir de services/api:
+    pip install -r requirements.txt -r requirements-test.txt
+    python -m pytest tests
+
+`inference_app` carrega services/inference/app como pacote (o nome
+`app` já é o da API), para testar o caminho inference → API de ponta a ponta.
+"""
+
+import importlib
+import sys
+import types
+from pathlib import Path
+
+import fakeredis
+import mongomock
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+API_ROOT = Path(__file__).resolve().parents[1]
+INFERENCE_APP = API_ROOT.parent / "inference" / "app"
+
+sys.path.insert(0, str(API_ROOT))
+# Pacote shared/ (usado pelo inference), como no PYTHONPATH da imagem
+sys.path.insert(1, str(API_ROOT.parent))
+
+
+@pytest.fixture
+def stores():
+    """Mongo e Redis compartilhados entre a API (async) e os workers (sync)."""
+    return mongomock.MongoClient(), fakeredis.FakeServer()
+
+
+@pytest.fixture
+def api(stores, monkeypatch):
+    """Módulo app.main apontado para os stores em memória (cache de respostas zerado)."""
+    from app import main
+    from app.cache import ResponseCache
+
+    mongo, server = stores
+    mongo_client = AsyncMongoMockClient(mock_mongo_client=mongo)
+    redis_client = fakeredis.FakeAsyncRedis(server=server, decode_responses=True)
+    monkeypatch.setattr(main, "mongo_client", mongo_client)
+    monkeypatch.setattr(main, "mongo_db", mongo_client[main.settings["mongo_db"]])
+    monkeypatch.setattr(main, "redis_client", redis_client)
+    monkeypatch.setattr(main, "response_cache", ResponseCache(redis_client))
+    return main
+
+
+@pytest.fixture
+def inference_app():
+    """Pacote services/inference/app importável como `inference_app`."""
+    if "inference_app" not in sys.modules:
+        package = types.ModuleType("inference_app")
+        package.__path__ = [str(INFERENCE_APP)]
+        sys.modules["inference_app"] = package
+    return sys.modules["inference_app"]
+
+
+@pytest.fixture
+def inference_main(inference_app):
+    return importlib.import_module("inference_app.main")
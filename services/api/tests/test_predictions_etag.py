@@ -0,0 +1,92 @@
+"""
+ETag de GET /predictions diante das re-coletas do collector: re-pontuar um
+evento sem mudança não pode trocar a versão de escrita, senão o dashboard
+nunca recebe 304.
+"""
+
+import asyncio
+
+import fakeredis
+import httpx
+
+EVENT = {
+    "id": "evt-1",
+    "title": "Central bank raises interest rates by 50bp",
+    "summary": "Monetary policy tightening surprises markets",
+    "sector": "Finance",
+    "impact": "high",
+    "type": "Market",
+    "source_type": "Market",
+    "location": {"country": "Brazil"},
+    "analytics": {"sentiment": {"polarity": -0.4}},
+}
+
+
+def _writer(inference_main, stores):
+    """PredictionWriter do inference ligado aos stores, como em inference run()."""
+    mongo, server = stores
+    settings = inference_main.get_settings()
+    redis_client = fakeredis.FakeRedis(server=server, decode_responses=True)
+    return inference_main.PredictionWriter(
+        mongo[settings["mongo_db"]].predictions,
+        on_flush=lambda _changed: redis_client.incr(inference_main.PREDICTIONS_VERSION_KEY),
+    )
+
+
+def _score(inference_main, writer, event, probability, latency_ms):
+    """Uma passada do loop do inference para o evento (features reais, score fixo)."""
+    row = inference_main.extract_feature_matrix([event])[0]
+    inference_main.process_event(
+        writer, event, inference_main.row_to_features(row), probability, "rf_v1",
+        {"model_latency_ms": latency_ms, "top_features": [], "shadow": None},
+    )
+    writer.flush()
+
+
+async def _get_predictions(client, etag=None):
+    headers = {"If-None-Match": etag} if etag else {}
+    return await client.get("/predictions", headers=headers)
+
+
+def _run(api, scenario):
+    """Roda o cenário num único event loop (o cliente Redis async fica preso ao loop)."""
+    async def main():
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://api") as client:
+            await scenario(client)
+
+    asyncio.run(main())
+
+
+def test_rescoring_unchanged_event_keeps_predictions_etag(api, inference_main, stores):
+    writer = _writer(inference_main, stores)
+
+    async def scenario(client):
+        _score(inference_main, writer, EVENT, 0.62, latency_ms=1.8)
+        first = await _get_predictions(client)
+        assert first.status_code == 200
+        etag = first.headers["ETag"]
+
+        # Re-coleta: mesmo evento, novo predicted_at e outra latência do lote
+        _score(inference_main, writer, EVENT, 0.62, latency_ms=3.1)
+        again = await _get_predictions(client, etag)
+        assert again.status_code == 304
+        assert again.headers["ETag"] == etag
+
+    _run(api, scenario)
+
+
+def test_changed_prediction_changes_predictions_etag(api, inference_main, stores):
+    writer = _writer(inference_main, stores)
+
+    async def scenario(client):
+        _score(inference_main, writer, EVENT, 0.62, latency_ms=1.8)
+        etag = (await _get_predictions(client)).headers["ETag"]
+
+        changed = {**EVENT, "title": "Central bank raises rates by 75bp"}
+        _score(inference_main, writer, changed, 0.71, latency_ms=1.8)
+        response = await _get_predictions(client, etag)
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+
+    _run(api, scenario)
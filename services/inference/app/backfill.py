@@ -0,0 +1,263 @@
+"""
+Backfill — Re-scoring das predições existentes com um novo modelo.
+
+Quando um modelo novo é promovido, as predições já gravadas continuam
+com a probabilidade do modelo antigo até o evento ser recoletado (o que
+quase nunca acontece). Este comando percorre a collection `events` em
+ordem de _id, em faixas de --chunk-size eventos, e pontua cada faixa num
+pool de processos:
+
+    processo principal: lê só os _id, corta as faixas e despacha
+    cada worker:        busca a faixa → feature store (load_matrix, com
+                        recálculo sob demanda) → predict_matrix → bulk_write
+                        não-ordenado em `predictions`, com model_version
+
+Retomada: o maior _id de um prefixo contíguo de faixas concluídas é
+gravado em `backfill_checkpoints` (uma entrada por model_version). Uma
+execução interrompida recomeça dali; faixas já gravadas depois do
+checkpoint são só reescritas (os $set são idempotentes).
+
+Predições re-pontuadas mantêm predicted_at (a ordem do feed não muda)
+e ganham rescored_at. Ajustes do LLM não são reaplicados.
+
+Uso:
+    python -m app.backfill
+    python -m app.backfill --version rf_v2 --workers 4 --chunk-size 2000
+    python -m app.backfill --restart
+"""
+
+import argparse
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+from pymongo import MongoClient, UpdateOne
+from redis import Redis
+
+from . import model
+from .feature_store import FeatureStore
+from .features import FEATURE_VERSION, row_to_features
+from .writer import PREDICTIONS_VERSION_KEY
+from .scoring import impact_category
+
+# Campos do evento usados pela extração de features e pelo documento de predição
+EVENT_PROJECTION = {
+    "_id": 0, "id": 1, "title": 1, "description": 1, "sector": 1, "sub_sector": 1,
+    "keywords": 1, "entities": 1, "analytics": 1, "source": 1, "link": 1,
+    "urgency": 1, "impact": 1, "timestamp": 1,
+}
+
+# Estado por processo do pool (preenchido em _init_worker)
+_db = None
+_store: FeatureStore | None = None
+_loaded: model.LoadedModel | None = None
+
+
+def get_settings() -> dict:
+    return {
+        "mongo_uri": os.getenv("MONGO_URI", "mongodb://localhost:27017"),
+        "mongo_db": os.getenv("MONGO_DB", "sentinelwatch"),
+        "redis_host": os.getenv("REDIS_HOST", "localhost"),
+        "redis_port": int(os.getenv("REDIS_PORT", 6379)),
+    }
+
+
+def _init_worker(mongo_uri: str, mongo_db: str, version: str | None) -> None:
+    """Cada processo abre o próprio MongoClient (pymongo não é fork-safe)."""
+    global _db, _store, _loaded
+    _db = MongoClient(mongo_uri)[mongo_db]
+    _store = FeatureStore(_db.features)
+    if version:
+        _loaded = model.load_version(version)
+        if _loaded is None:
+            raise RuntimeError(f"Não foi possível carregar a versão {version}")
+
+
+def build_operations(events: list[dict], x, results, rescored_at: str) -> list[UpdateOne]:
+    """Upserts das predições re-pontuadas de um lote (sem LLM)."""
+    operations = []
+    for event, row, (probability, model_version, top_features) in zip(events, x, results):
+        event_id = event.get("id")
+        if not event_id:
+            continue
+        features = row_to_features(row)
+        operations.append(UpdateOne(
+            {"event_id": event_id},
+            {
+                "$set": {
+                    "event_id": event_id,
+                    "event_title": event.get("title", "Sem título"),
+                    "sector": event.get("sector", ""),
+                    "sub_sector": event.get("sub_sector", ""),
+                    "country": event.get("location", {}).get("country", ""),
+                    "probability": probability,
+                    "confidence": model.get_confidence_label(probability),
+                    "impact_category": impact_category(
+                        event.get("sector", ""), features.get("has_policy_keyword")
+                    ),
+                    "features_used": list(features.values()),
+                    "feature_version": FEATURE_VERSION,
+                    "top_features": top_features,
+                    # Score novo sem LLM: o raciocínio do ajuste antigo não vale mais
+                    "llm_reasoning": None,
+                    "llm_status": None,
+                    "model_version": model_version,
+                    "rescored_at": rescored_at,
+                },
+                # content_hash descrevia a predição do loop, não a re-pontuada
+                "$unset": {"llm_adjustment": "", "content_hash": ""},
+                "$currentDate": {"updated_at": True},
+                # Eventos sem predição: entram no feed na posição do evento
+                "$setOnInsert": {
+                    "predicted_at": event.get("timestamp") or rescored_at,
+                },
+            },
+            upsert=True,
+        ))
+    return operations
+
+
+def score_range(first_id, last_id) -> tuple[int, int, int]:
+    """
+    Pontua e grava os eventos com _id em [first_id, last_id].
+    Returns:
+        (nº de eventos, nº de predições gravadas, nº de vetores recalculados)
+    """
+    events = list(_db.events.find({"_id": {"$gte": first_id, "$lte": last_id}}, EVENT_PROJECTION))
+    if not events:
+        return 0, 0, 0
+
+    x, n_recomputed = _store.load_matrix(events)
+    results = model.predict_matrix_explained(x, _loaded)
+    operations = build_operations(events, x, results, datetime.now(timezone.utc).isoformat())
+    if operations:
+        _db.predictions.bulk_write(operations, ordered=False)
+    return len(events), len(operations), n_recomputed
+
+
+def iter_ranges(events_collection, after_id, chunk_size: int):
+    """Percorre só os _id (cursor leve) e produz faixas (primeiro, último, tamanho)."""
+    query = {"_id": {"$gt": after_id}} if after_id is not None else {}
+    chunk = []
+    for doc in events_collection.find(query, {"_id": 1}).sort("_id", 1).batch_size(10_000):
+        chunk.append(doc["_id"])
+        if len(chunk) >= chunk_size:
+            yield chunk[0], chunk[-1], len(chunk)
+            chunk = []
+    if chunk:
+        yield chunk[0], chunk[-1], len(chunk)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-pontua as predições existentes com o modelo atual")
+    parser.add_argument("--version", help="Versão do registry (default: a de produção)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="Processos no pool")
+    parser.add_argument("--chunk-size", type=int, default=2000, help="Eventos por faixa")
+    parser.add_argument("--restart", action="store_true", help="Ignora o checkpoint e recomeça do início")
+    args = parser.parse_args()
+
+    settings = get_settings()
+    version = args.version or model.current_versions()["production"]
+    pinned = args.version  # None → cada worker usa a produção que carregou
+
+    db = MongoClient(settings["mongo_uri"])[settings["mongo_db"]]
+    redis_client = Redis(host=settings["redis_host"], port=settings["redis_port"], decode_responses=True)
+    checkpoints = db.backfill_checkpoints
+    checkpoint_id = f"predictions:{version}"
+    checkpoint = None if args.restart else checkpoints.find_one({"_id": checkpoint_id})
+    after_id = checkpoint.get("last_id") if checkpoint else None
+    processed = checkpoint.get("processed", 0) if checkpoint else 0
+
+    remaining = db.events.count_documents({"_id": {"$gt": after_id}} if after_id is not None else {})
+
+    print(f"\n{'='*60}")
+    print(f"  OpenFinance Intel — Backfill de Predições")
+    print(f"{'='*60}")
+    print(f"  Modelo:      {version}")
+    print(f"  Workers:     {args.workers}")
+    print(f"  Chunk Size:  {args.chunk_size}")
+    print(f"  Pendentes:   {remaining} eventos")
+    if after_id is not None:
+        print(f"  Retomando:   após _id {after_id} ({processed} já processados)")
+    print(f"{'='*60}\n")
+
+    if remaining == 0:
+        print("✅ Nada a fazer.")
+        return
+
+    def save_checkpoint(last_id, done: bool = False) -> None:
+        checkpoints.update_one(
+            {"_id": checkpoint_id},
+            {"$set": {
+                "model_version": version,
+                "last_id": last_id,
+                "processed": processed,
+                "done": done,
+                "updated_at": datetime.now(timezone.utc).isoformat(),
+            }},
+            upsert=True,
+        )
+        # Predições mudaram: invalida o cache de respostas da API
+        try:
+            redis_client.incr(PREDICTIONS_VERSION_KEY)
+        except Exception as e:
+            print(f"   ⚠️  Redis indisponível, cache da API não invalidado: {e}")
+
+    start = time.perf_counter()
+    events_done = written = recomputed = 0
+    # Faixas em voo, em ordem de _id: o checkpoint só avança por prefixo contíguo
+    in_flight: deque = deque()
+    max_in_flight = args.workers * 2
+    last_id = after_id
+
+    # spawn: os workers não herdam o MongoClient do processo principal
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(
+        max_workers=args.workers,
+        mp_context=context,
+        initializer=_init_worker,
+        initargs=(settings["mongo_uri"], settings["mongo_db"], pinned),
+    ) as pool:
+
+        def drain(block: bool) -> None:
+            nonlocal events_done, written, recomputed, processed, last_id
+            advanced = False
+            while in_flight and (block or in_flight[0][0].done()):
+                future, range_last_id = in_flight.popleft()
+                n_events, n_written, n_recomputed = future.result()
+                events_done += n_events
+                written += n_written
+                recomputed += n_recomputed
+                processed += n_events
+                last_id = range_last_id
+                advanced = True
+                block = block and len(in_flight) >= max_in_flight
+            if advanced:
+                save_checkpoint(last_id)
+                elapsed = time.perf_counter() - start
+                rate = events_done / elapsed * 60 if elapsed > 0 else 0.0
+                eta = (remaining - events_done) / (rate / 60) if rate > 0 else 0.0
+                print(
+                    f"   {events_done}/{remaining} ({events_done / remaining:.0%}) "
+                    f"| {rate:,.0f} ev/min | ETA {eta:.0f}s | recalculados {recomputed}"
+                )
+
+        for first_id, range_last_id, _size in iter_ranges(db.events, after_id, args.chunk_size):
+            in_flight.append((pool.submit(score_range, first_id, range_last_id), range_last_id))
+            drain(block=len(in_flight) >= max_in_flight)
+
+        while in_flight:
+            drain(block=True)
+
+    save_checkpoint(last_id, done=True)
+    elapsed = time.perf_counter() - start
+    print(f"\n✅ Backfill concluído: {events_done} eventos, {written} predições ({version})")
+    print(f"   Tempo: {elapsed:.1f}s | {events_done / elapsed * 60 if elapsed > 0 else 0:,.0f} ev/min")
+    print(f"   Vetores recalculados: {recomputed}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Cascade — Roteamento em camadas: heurística → RandomForest → LLM.
+
+    1. Heurística (_heuristic_predict vetorizada): resolve os casos óbvios,
+       com score ≤ CASCADE_HEURISTIC_LOW ou ≥ CASCADE_HEURISTIC_HIGH.
+    2. RandomForest: pontua o resto do lote numa única chamada.
+    3. LLM: só para probabilidades do forest dentro da faixa de incerteza
+       [CASCADE_LLM_LOW, CASCADE_LLM_HIGH], onde o ajuste de ±0.2 pode
+       mudar o label de confiança.
+
+Com CASCADE_ENABLED=false todo evento vai ao forest (e ao LLM, se ligado),
+como antes. Os defaults foram escolhidos sobre o dataset de treino: nas
+duas pontas da heurística o forest sempre dá o mesmo label de confiança.
+
+Contagem e latência por camada ficam em `stats` (loop da fila, exposto
+no /health e no /metrics). As chamadas what-if de POST /score e
+/score/batch contam em `http_stats`, à parte: um lote de 1000 linhas da
+API não distorce as taxas da pipeline.
+"""
+
+import os
+import threading
+import time
+
+import numpy as np
+
+from .model import HEURISTIC_VERSION, heuristic_explained, predict_matrix_explained, top_contributors
+
+CASCADE_ENABLED = os.getenv("CASCADE_ENABLED", "true").lower() == "true"
+HEURISTIC_LOW = float(os.getenv("CASCADE_HEURISTIC_LOW", "0.10"))
+HEURISTIC_HIGH = float(os.getenv("CASCADE_HEURISTIC_HIGH", "0.75"))
+LLM_LOW = float(os.getenv("CASCADE_LLM_LOW", "0.30"))
+LLM_HIGH = float(os.getenv("CASCADE_LLM_HIGH", "0.80"))
+
+TIERS = ("heuristic", "forest", "llm")
+
+
+class TierStats:
+    """Contadores por camada: eventos resolvidos e latência acumulada."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._total = 0
+        self._count = dict.fromkeys(TIERS, 0)
+        self._latency_ms = dict.fromkeys(TIERS, 0.0)
+
+    def record_total(self, n: int) -> None:
+        with self._lock:
+            self._total += n
+
+    def record(self, tier: str, n: int, latency_ms: float) -> None:
+        """`latency_ms` é o tempo total gasto na camada para os `n` eventos."""
+        with self._lock:
+            self._count[tier] += n
+            self._latency_ms[tier] += latency_ms
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            total = self._total
+            return {
+                "enabled": CASCADE_ENABLED,
+                "events": total,
+                "tiers": {
+                    tier: {
+                        "count": self._count[tier],
+                        # heuristic/forest: fração resolvida; llm: fração escalada
+                        "hit_rate": round(self._count[tier] / total, 4) if total else 0.0,
+                        "avg_latency_ms": round(self._latency_ms[tier] / self._count[tier], 4)
+                        if self._count[tier] else 0.0,
+                    }
+                    for tier in TIERS
+                },
+            }
+
+
+stats = TierStats()
+http_stats = TierStats()
+
+
+def route(x: np.ndarray, tier_stats: TierStats | None = None) -> list[tuple[float, str, str, list | None]]:
+    """
+    Pontua um lote passando pelas camadas heurística e forest.
+    `tier_stats` recebe as contagens (default: `stats`, o da pipeline).
+
+    Returns:
+        lista de (probability, model_version, tier, top_features), na ordem das linhas
+    """
+    n = len(x)
+    if n == 0:
+        return []
+    if tier_stats is None:
+        tier_stats = stats
+    tier_stats.record_total(n)
+
+    results: list[tuple[float, str, str, list | None] | None] = [None] * n
+    remaining = np.arange(n)
+
+    if CASCADE_ENABLED:
+        start = time.perf_counter()
+        heuristic, contributions = heuristic_explained(x)
+        clear = (heuristic <= HEURISTIC_LOW) | (heuristic >= HEURISTIC_HIGH)
+        for i in np.flatnonzero(clear):
+            results[i] = (float(heuristic[i]), HEURISTIC_VERSION, "heuristic", top_contributors(contributions[i]))
+        tier_stats.record("heuristic", int(clear.sum()), (time.perf_counter() - start) * 1000)
+        remaining = np.flatnonzero(~clear)
+
+    if remaining.size:
+        start = time.perf_counter()
+        scored = predict_matrix_explained(x[remaining])
+        latency_ms = (time.perf_counter() - start) * 1000
+        # Sem modelo carregado, predict_matrix já cai na heurística
+        tier = "heuristic" if scored[0][1] == HEURISTIC_VERSION else "forest"
+        for i, (probability, model_version, top) in zip(remaining, scored):
+            results[i] = (probability, model_version, tier, top)
+        tier_stats.record(tier, int(remaining.size), latency_ms)
+
+    return results
+
+
+def needs_llm(probability: float, tier: str) -> bool:
+    """Escala para o LLM só o que o forest deixou na faixa de incerteza."""
+    if not CASCADE_ENABLED:
+        return True
+    return tier == "forest" and LLM_LOW <= probability <= LLM_HIGH
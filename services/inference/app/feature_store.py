@@ -0,0 +1,154 @@
+"""
+Feature Store — Vetores de features persistidos por evento.
+
+Collection `features`:
+    {"event_id", "feature_version", "values": [14 floats, ordem de FEATURE_NAMES],
+     "computed_at"}
+
+A inferência grava o vetor de cada evento que pontua; o treinamento e o
+re-scoring leem em bulk. Vetores de outra FEATURE_VERSION (ou ausentes)
+são recalculados sob demanda a partir do evento e regravados.
+
+No loop de inferência os vetores vão para um buffer (`stage`) gravado em
+bulk pelo flush periódico, como o PredictionWriter: o lote não espera a
+ida ao Mongo antes de pontuar. Backfill e treino usam `put_many` (síncrono).
+"""
+
+import threading
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+from pymongo import UpdateOne
+from pymongo.errors import OperationFailure
+
+from .features import FEATURE_NAMES, FEATURE_VERSION, extract_feature_matrix
+from .metrics import MONGO_WRITE_SECONDS
+
+
+def _operation(event_id: str, values: list[float], computed_at: str) -> UpdateOne:
+    return UpdateOne(
+        {"event_id": event_id},
+        {"$set": {
+            "event_id": event_id,
+            "feature_version": FEATURE_VERSION,
+            "values": values,
+            "computed_at": computed_at,
+        }},
+        upsert=True,
+    )
+
+
+class FeatureStore:
+    def __init__(self, collection, max_batch: int = 500, flush_interval: float = 1.0):
+        self.collection = collection
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self._pending: dict[str, tuple[list[float], str]] = {}  # event_id → (valores, computed_at)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._thread: threading.Thread | None = None
+
+    def ensure_indexes(self) -> None:
+        try:
+            self.collection.create_index("event_id", unique=True)
+        except OperationFailure as e:
+            print(f"[inference] ⚠️  Índice features.event_id não criado: {e}")
+
+    def put_many(self, event_ids: list[str], matrix: np.ndarray) -> None:
+        """Grava (upsert) os vetores de um lote numa única ida ao banco (ids vazios são ignorados)."""
+        computed_at = datetime.now(timezone.utc).isoformat()
+        operations = [
+            _operation(event_id, row.tolist(), computed_at)
+            for event_id, row in zip(event_ids, matrix)
+            if event_id
+        ]
+        if operations:
+            start = time.perf_counter()
+            self.collection.bulk_write(operations, ordered=False)
+            MONGO_WRITE_SECONDS.observe(time.perf_counter() - start, collection="features")
+
+    def stage(self, event_ids: list[str], matrix: np.ndarray) -> None:
+        """Agenda a gravação dos vetores de um lote (o flush manda em bulk)."""
+        computed_at = datetime.now(timezone.utc).isoformat()
+        with self._lock:
+            for event_id, row in zip(event_ids, matrix):
+                if event_id:
+                    self._pending[event_id] = (row.tolist(), computed_at)
+
+    def maybe_flush(self) -> int:
+        """Faz flush se o buffer encheu ou o intervalo venceu."""
+        if len(self._pending) >= self.max_batch or time.monotonic() - self._last_flush >= self.flush_interval:
+            return self.flush()
+        return 0
+
+    def flush(self) -> int:
+        """Envia o buffer num bulk_write não-ordenado; se falhar, os vetores voltam ao buffer."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+            if not batch:
+                return 0
+            operations = [_operation(event_id, values, at) for event_id, (values, at) in batch.items()]
+            start = time.perf_counter()
+            try:
+                self.collection.bulk_write(operations, ordered=False)
+            except Exception as e:
+                print(f"[inference] ✕ Erro ao gravar feature store ({len(operations)} vetores); reenfileirando: {e}")
+                with self._lock:
+                    # Não sobrescreve vetores mais novos do mesmo evento
+                    for event_id, entry in batch.items():
+                        self._pending.setdefault(event_id, entry)
+                return 0
+            finally:
+                MONGO_WRITE_SECONDS.observe(time.perf_counter() - start, collection="features")
+            return len(operations)
+
+    def start(self) -> None:
+        """Inicia a thread de flush periódico (fora do loop de inferência)."""
+        if self._thread is not None:
+            return
+
+        def _loop():
+            while True:
+                time.sleep(self.flush_interval)
+                self.maybe_flush()
+
+        self._thread = threading.Thread(target=_loop, name="feature-store-writer", daemon=True)
+        self._thread.start()
+
+    def get_many(self, event_ids: list[str]) -> dict[str, list[float]]:
+        """Vetores da versão atual para os event_ids pedidos (ausentes/obsoletos ficam de fora)."""
+        cursor = self.collection.find(
+            {"event_id": {"$in": event_ids}, "feature_version": FEATURE_VERSION},
+            {"_id": 0, "event_id": 1, "values": 1},
+        )
+        return {doc["event_id"]: doc["values"] for doc in cursor}
+
+    def load_matrix(self, events: list[dict]) -> tuple[np.ndarray, int]:
+        """
+        Matriz de features de um lote de eventos, lida do store.
+        Eventos sem vetor na versão atual são recalculados e regravados.
+
+        Returns:
+            (matriz float32 na ordem de `events`, nº de vetores recalculados)
+        """
+        matrix = np.empty((len(events), len(FEATURE_NAMES)), dtype=np.float32)
+        stored = self.get_many([event.get("id", "") for event in events])
+
+        missing = []
+        for i, event in enumerate(events):
+            values = stored.get(event.get("id", ""))
+            if values is not None and len(values) == len(FEATURE_NAMES):
+                matrix[i] = values
+            else:
+                missing.append(i)
+
+        if missing:
+            computed = extract_feature_matrix([events[i] for i in missing])
+            matrix[missing] = computed
+            self.put_many([events[i].get("id") for i in missing], computed)
+
+        return matrix, len(missing)
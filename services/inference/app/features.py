@@ -3,6 +3,10 @@ Feature Engineering — Extrai features numéricas de um evento enriquecido
 para alimentar o modelo de ML.
 """
 
+import re
+
+import numpy as np
+
 # Setores e sub-setores mapeados para encoding numérico
 SECTOR_MAP = {
     "Crypto": 0, "Tech": 1, "Market": 2,
@@ -36,10 +40,41 @@ POLICY_KEYWORDS = [
 ]
 
 
-def extract_features(event: dict) -> dict:
-    """
-    Converte um evento enriquecido em um dicionário de features numéricas.
-    """
+SOCIAL_DOMAINS = ["reddit.com", "twitter.com", "x.com", "nitter."]
+
+URGENCY_MAP = {"critical": 3, "urgent": 2, "normal": 1, "low": 0}
+IMPACT_MAP = {"high": 3, "medium": 2, "low": 1}
+
+# Versão do schema de features: incremente ao mudar a extração ou as
+# colunas — vetores de versões antigas no feature store são recalculados.
+FEATURE_VERSION = 1
+
+# Ordem canônica das colunas (usada no treinamento e na inferência)
+FEATURE_NAMES = [
+    "sentiment_polarity", "sentiment_abs", "impact_score",
+    "sector_encoded", "sub_sector_encoded",
+    "keyword_count", "entity_count",
+    "title_length", "description_length",
+    "has_crisis_keyword", "has_policy_keyword",
+    "is_social_source", "urgency_encoded", "impact_encoded",
+]
+
+# Features contínuas (as demais são inteiras / flags)
+FLOAT_FEATURES = {"sentiment_polarity", "sentiment_abs"}
+
+
+def _compile_matcher(terms: list[str]) -> re.Pattern:
+    """Uma única regex de alternância — equivale a any(t in texto for t in terms)."""
+    return re.compile("|".join(re.escape(term) for term in terms))
+
+
+CRISIS_MATCHER = _compile_matcher(CRISIS_KEYWORDS)
+POLICY_MATCHER = _compile_matcher(POLICY_KEYWORDS)
+SOCIAL_MATCHER = _compile_matcher(SOCIAL_DOMAINS)
+
+
+def _feature_row(event: dict) -> tuple:
+    """Calcula as features de um evento como tupla na ordem de FEATURE_NAMES."""
     analytics = event.get("analytics", {})
     sentiment = analytics.get("sentiment", {})
     title = event.get("title", "")
@@ -48,59 +83,60 @@ def extract_features(event: dict) -> dict:
     source = event.get("source", {})
     source_url = (source.get("url", "") or "").lower()
     link = (event.get("link", "") or "").lower()
+    polarity = sentiment.get("polarity", 0.0)
 
-    # --- Features ---
-    features = {
+    return (
         # Sentimento
-        "sentiment_polarity": sentiment.get("polarity", 0.0),
-        "sentiment_abs": abs(sentiment.get("polarity", 0.0)),
-
+        polarity,
+        abs(polarity),
         # Score atual do Analysis service
-        "impact_score": analytics.get("score", 0),
-
+        analytics.get("score", 0),
         # Setor e sub-setor (label encoding)
-        "sector_encoded": SECTOR_MAP.get(event.get("sector", ""), 5),
-        "sub_sector_encoded": SUB_SECTOR_MAP.get(event.get("sub_sector", ""), 4),
-
+        SECTOR_MAP.get(event.get("sector", ""), 5),
+        SUB_SECTOR_MAP.get(event.get("sub_sector", ""), 4),
         # Contagem de informações extraídas
-        "keyword_count": len(event.get("keywords", [])),
-        "entity_count": len(event.get("entities", [])),
-
+        len(event.get("keywords", [])),
+        len(event.get("entities", [])),
         # Comprimento do texto (proxy de profundidade)
-        "title_length": len(title),
-        "description_length": len(description),
-
+        len(title),
+        len(description),
         # Indicadores binários
-        "has_crisis_keyword": 1 if any(k in full_text for k in CRISIS_KEYWORDS) else 0,
-        "has_policy_keyword": 1 if any(k in full_text for k in POLICY_KEYWORDS) else 0,
-
+        1 if CRISIS_MATCHER.search(full_text) else 0,
+        1 if POLICY_MATCHER.search(full_text) else 0,
         # Fonte social (Reddit/Twitter)
-        "is_social_source": 1 if any(
-            d in source_url or d in link
-            for d in ["reddit.com", "twitter.com", "x.com", "nitter."]
-        ) else 0,
-
-        # Urgência encoding
-        "urgency_encoded": {"critical": 3, "urgent": 2, "normal": 1, "low": 0}.get(
-            event.get("urgency", "normal"), 1
-        ),
-
-        # Impacto encoding
-        "impact_encoded": {"high": 3, "medium": 2, "low": 1}.get(
-            event.get("impact", "low"), 1
-        ),
-    }
+        1 if SOCIAL_MATCHER.search(source_url) or SOCIAL_MATCHER.search(link) else 0,
+        # Urgência / impacto encoding
+        URGENCY_MAP.get(event.get("urgency", "normal"), 1),
+        IMPACT_MAP.get(event.get("impact", "low"), 1),
+    )
+
+
+def extract_features(event: dict) -> dict:
+    """
+    Converte um evento enriquecido em um dicionário de features numéricas.
+    """
+    return dict(zip(FEATURE_NAMES, _feature_row(event)))
 
-    return features
+
+def extract_feature_matrix(events: list[dict]) -> np.ndarray:
+    """
+    Converte um lote de eventos direto para a matriz de entrada do modelo
+    (float32, colunas na ordem de FEATURE_NAMES), sem dicts intermediários.
+    """
+    matrix = np.empty((len(events), len(FEATURE_NAMES)), dtype=np.float32)
+    for i, event in enumerate(events):
+        matrix[i] = _feature_row(event)
+    return matrix
+
+
+def row_to_features(row: np.ndarray) -> dict:
+    """Converte uma linha da matriz de volta para o dict de features (persistência)."""
+    return {
+        name: round(float(value), 4) if name in FLOAT_FEATURES else int(value)
+        for name, value in zip(FEATURE_NAMES, row.tolist())
+    }
 
 
 def feature_names() -> list[str]:
     """Retorna lista ordenada de nomes de features (usado no treinamento)."""
-    return [
-        "sentiment_polarity", "sentiment_abs", "impact_score",
-        "sector_encoded", "sub_sector_encoded",
-        "keyword_count", "entity_count",
-        "title_length", "description_length",
-        "has_crisis_keyword", "has_policy_keyword",
-        "is_social_source", "urgency_encoded", "impact_encoded",
-    ]
+    return list(FEATURE_NAMES)
@@ -0,0 +1,268 @@
+"""
+Forest — Avaliador vetorizado de RandomForest sobre arrays planos.
+
+O modelo sklearn é achatado em arrays contíguos (feature, threshold,
+left, right, value) com índices globais de nó. A avaliação percorre
+todas as árvores ao mesmo tempo, um nível por iteração, para uma linha
+ou para um lote inteiro — sem o overhead Python/joblib do predict_proba.
+
+Formato compacto em disco (.forest), carregado via np.memmap — sem
+unpickling, e vários workers compartilham as mesmas páginas:
+
+    header (64 bytes, little-endian):
+        magic ("OFIFRST" + NUL) | format u32 | n_trees u32 | n_nodes u32 |
+        n_features u32 | n_classes u32 | max_depth u32 | index_bytes u32
+    roots      int32[n_trees]
+    feature    int16[n_nodes]
+    threshold  float32[n_nodes]
+    left       int16|int32[n_nodes]   (int16 se n_nodes < 32768)
+    right      int16|int32[n_nodes]
+    value      float64[n_nodes, n_classes]
+
+Os thresholds float64 do sklearn viram o maior float32 <= threshold:
+para X em float32 (mesmo cast do sklearn), x <= t64 ⇔ x <= t32, então
+a predição continua bit a bit idêntica.
+
+Uso (converter o modelo treinado):
+    python -m app.forest convert models/impact_model_v1.joblib models/impact_model_v1.forest
+"""
+
+import argparse
+import os
+import struct
+
+import numpy as np
+
+MAGIC = b"OFIFRST\0"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<8s7I")
+HEADER_SIZE = 64
+
+
+class FlatForest:
+    """Floresta achatada. Folhas apontam para si mesmas (left = right = nó)."""
+
+    def __init__(
+        self,
+        feature: np.ndarray,
+        threshold: np.ndarray,
+        left: np.ndarray,
+        right: np.ndarray,
+        value: np.ndarray,
+        roots: np.ndarray,
+        max_depth: int,
+        n_features: int | None = None,
+    ):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.n_features = int(n_features) if n_features is not None else int(feature.max()) + 1
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.feature)
+
+    @property
+    def n_classes(self) -> int:
+        return self.value.shape[1]
+
+    @classmethod
+    def from_sklearn(cls, model) -> "FlatForest":
+        """Achata um RandomForestClassifier (sklearn) já treinado."""
+        trees = [estimator.tree_ for estimator in model.estimators_]
+        if any(tree.n_outputs != 1 for tree in trees):
+            raise ValueError("FlatForest suporta apenas modelos com uma saída.")
+
+        n_classes = int(model.n_classes_)
+        sizes = np.array([tree.node_count for tree in trees], dtype=np.int64)
+        roots = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.int32)
+        n_nodes = int(sizes.sum())
+
+        feature = np.zeros(n_nodes, dtype=np.int32)
+        threshold = np.zeros(n_nodes, dtype=np.float64)
+        left = np.zeros(n_nodes, dtype=np.int32)
+        right = np.zeros(n_nodes, dtype=np.int32)
+        value = np.zeros((n_nodes, n_classes), dtype=np.float64)
+
+        for offset, tree in zip(roots, trees):
+            count = tree.node_count
+            nodes = slice(offset, offset + count)
+            local = np.arange(count)
+            is_leaf = tree.children_left == -1
+
+            feature[nodes] = np.where(is_leaf, 0, tree.feature)
+            threshold[nodes] = np.where(is_leaf, 0.0, tree.threshold)
+            left[nodes] = offset + np.where(is_leaf, local, tree.children_left)
+            right[nodes] = offset + np.where(is_leaf, local, tree.children_right)
+            # Desde o sklearn 1.4, tree_.value já guarda frações por classe
+            value[nodes] = tree.value[:, 0, :n_classes]
+
+        max_depth = max(tree.max_depth for tree in trees)
+        return cls(feature, threshold, left, right, value, roots, max_depth, model.n_features_in_)
+
+    def apply(self, X: np.ndarray) -> np.ndarray:
+        """
+        Retorna o índice (global) da folha de cada árvore para cada linha.
+        Shape: (n_trees, n_linhas).
+        """
+        # Mesmo cast do sklearn: X em float32, comparado com threshold float64
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+
+        rows = np.arange(X.shape[0])
+        node = np.repeat(self.roots[:, None], X.shape[0], axis=1)
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            node = np.where(go_left, self.left[node], self.right[node])
+        return node
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """Equivalente bit a bit ao RandomForestClassifier.predict_proba."""
+        leaf_values = self.value[self.apply(X)]
+
+        # Redução no eixo externo soma árvore a árvore, na mesma ordem do sklearn
+        proba = leaf_values.sum(axis=0)
+        proba /= self.n_trees
+        return proba
+
+    def predict_proba_contrib(self, X: np.ndarray, class_index: int = -1) -> tuple[np.ndarray, np.ndarray, float]:
+        """
+        predict_proba + atribuição por feature (Saabas) no mesmo percurso.
+
+        A cada nível, a variação de valor (da classe `class_index`) entre o
+        nó e o filho escolhido é creditada à feature do split. Por linha:
+        bias + contribuições.sum() == proba[:, class_index] (a menos de
+        arredondamento).
+
+        Returns:
+            (proba idêntico ao predict_proba, contribuições (n_linhas × n_features), bias)
+        """
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+
+        n_rows = X.shape[0]
+        rows = np.arange(n_rows)
+        # Índice linear linha*n_features, para acumular com um único bincount por nível
+        row_offset = np.broadcast_to(rows * self.n_features, (self.n_trees, n_rows))
+        class_value = self.value[:, class_index]
+        contributions = np.zeros(n_rows * self.n_features, dtype=np.float64)
+
+        node = np.repeat(self.roots[:, None], n_rows, axis=1)
+        for _ in range(self.max_depth):
+            split_feature = self.feature[node]
+            go_left = X[rows, split_feature] <= self.threshold[node]
+            child = np.where(go_left, self.left[node], self.right[node])
+            # Folhas apontam para si mesmas: delta zero, não contribuem
+            delta = class_value[child] - class_value[node]
+            contributions += np.bincount(
+                (row_offset + split_feature).ravel(),
+                weights=delta.ravel(),
+                minlength=contributions.size,
+            )
+            node = child
+
+        proba = self.value[node].sum(axis=0)
+        proba /= self.n_trees
+        contributions /= self.n_trees
+        bias = float(class_value[self.roots].mean())
+        return proba, contributions.reshape(n_rows, self.n_features), bias
+
+    def save(self, path: str) -> None:
+        """Grava no formato compacto .forest (escrita atômica)."""
+        index_dtype = np.int16 if self.n_nodes < np.iinfo(np.int16).max else np.int32
+        arrays = [
+            np.ascontiguousarray(self.roots, dtype="<i4"),
+            np.ascontiguousarray(self.feature, dtype="<i2"),
+            np.ascontiguousarray(_floor_float32(self.threshold), dtype="<f4"),
+            np.ascontiguousarray(self.left, dtype=np.dtype(index_dtype).newbyteorder("<")),
+            np.ascontiguousarray(self.right, dtype=np.dtype(index_dtype).newbyteorder("<")),
+            np.ascontiguousarray(self.value, dtype="<f8"),
+        ]
+        header = HEADER.pack(
+            MAGIC, FORMAT_VERSION, self.n_trees, self.n_nodes, self.n_features,
+            self.n_classes, self.max_depth, np.dtype(index_dtype).itemsize,
+        )
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(header.ljust(HEADER_SIZE, b"\0"))
+            for array in arrays:
+                f.write(b"\0" * (-f.tell() % 8))  # alinhamento de 8 bytes
+                f.write(array.tobytes())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "FlatForest":
+        """Mapeia um .forest em memória (np.memmap, somente leitura)."""
+        data = np.memmap(path, dtype=np.uint8, mode="r")
+        magic, version, n_trees, n_nodes, n_features, n_classes, max_depth, index_bytes = \
+            HEADER.unpack(bytes(data[:HEADER.size]))
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"Arquivo .forest inválido ou de versão não suportada: {path}")
+
+        index_dtype = "<i2" if index_bytes == 2 else "<i4"
+        offset = HEADER_SIZE
+
+        def take(dtype: str, count: int) -> np.ndarray:
+            nonlocal offset
+            offset += -offset % 8
+            size = np.dtype(dtype).itemsize * count
+            array = data[offset:offset + size].view(dtype)
+            offset += size
+            return array
+
+        roots = take("<i4", n_trees)
+        feature = take("<i2", n_nodes)
+        threshold = take("<f4", n_nodes)
+        left = take(index_dtype, n_nodes)
+        right = take(index_dtype, n_nodes)
+        value = take("<f8", n_nodes * n_classes).reshape(n_nodes, n_classes)
+        return cls(feature, threshold, left, right, value, roots, max_depth, n_features)
+
+
+def _floor_float32(values: np.ndarray) -> np.ndarray:
+    """Maior float32 <= cada valor float64 (preserva x <= t para x float32)."""
+    rounded = np.asarray(values, dtype=np.float64).astype(np.float32)
+    too_big = rounded.astype(np.float64) > values
+    rounded[too_big] = np.nextafter(rounded[too_big], np.float32(-np.inf))
+    return rounded
+
+
+def convert(joblib_path: str, forest_path: str) -> FlatForest:
+    """Converte um RandomForest .joblib para o formato compacto .forest."""
+    import joblib
+
+    forest = FlatForest.from_sklearn(joblib.load(joblib_path))
+    forest.save(forest_path)
+    return forest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Converte RandomForest (.joblib) para o formato compacto")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    conv = sub.add_parser("convert", help="Converte .joblib → .forest")
+    conv.add_argument("input", help="Modelo sklearn (.joblib)")
+    conv.add_argument("output", help="Arquivo de saída (.forest)")
+    args = parser.parse_args()
+
+    forest = convert(args.input, args.output)
+    size_kb = os.path.getsize(args.output) / 1024
+    print(
+        f"[inference/forest] ✓ {forest.n_trees} árvores, {forest.n_nodes} nós, "
+        f"profundidade {forest.max_depth} → {args.output} ({size_kb:.1f} KB)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,47 +1,79 @@
 """
 LLM Layer (Opcional) — Análise contextual profunda via OpenAI.
 Desligada por padrão. Ativada quando OPENAI_API_KEY + ENABLE_LLM_LAYER=true.
+
+Roda como worker assíncrono (thread própria com event loop): o consumer
+grava o score do modelo na hora e o ajuste do LLM é aplicado depois, via
+callback. Concorrência limitada, timeout por chamada e cache por hash do
+conteúdo do prompt.
+
+Para testar contra um servidor local (ver app/llm_stub.py):
+    OPENAI_BASE_URL=http://localhost:8089/v1 OPENAI_API_KEY=stub ENABLE_LLM_LAYER=true
 """
 
+import asyncio
+import hashlib
+import json
 import os
+import threading
+from collections import OrderedDict
+from typing import Callable
 
 ENABLE_LLM = os.getenv("ENABLE_LLM_LAYER", "false").lower() == "true"
 OPENAI_KEY = os.getenv("OPENAI_API_KEY", "")
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
+LLM_MODEL = os.getenv("LLM_MODEL", "gpt-4o-mini")
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "4"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "15"))
+LLM_MAX_PENDING = int(os.getenv("LLM_MAX_PENDING", "500"))
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "2048"))
 
 _client = None
 
 if ENABLE_LLM and OPENAI_KEY:
     try:
-        from openai import OpenAI
-        _client = OpenAI(api_key=OPENAI_KEY)
-        print("[inference/llm] ✓ Camada LLM ativada (OpenAI).")
+        from openai import AsyncOpenAI
+        _client = AsyncOpenAI(
+            api_key=OPENAI_KEY,
+            base_url=OPENAI_BASE_URL,
+            timeout=LLM_TIMEOUT,
+            max_retries=0,
+        )
+        print(f"[inference/llm] ✓ Camada LLM ativada (OpenAI{' @ ' + OPENAI_BASE_URL if OPENAI_BASE_URL else ''}).")
     except Exception as e:
         print(f"[inference/llm] ✕ Falha ao inicializar OpenAI: {e}")
 else:
     print("[inference/llm] Camada LLM desativada. Usando apenas modelo local.")
 
 
-async def analyze_context(event: dict) -> dict | None:
-    """
-    Analisa um evento com LLM para obter reasoning contextual
-    e ajuste de confiança.
+# Cache LRU: sha256(modelo + prompt) → resultado já parseado
+_cache: OrderedDict[str, dict] = OrderedDict()
+_cache_lock = threading.Lock()
 
-    Returns:
-        {
-            "reasoning": "Texto explicativo da análise...",
-            "confidence_adjustment": 0.1  # delta entre -0.2 e +0.2
-        }
-        ou None se LLM não estiver ativo.
-    """
-    if not _client:
-        return None
 
+def _cache_get(key: str) -> dict | None:
+    with _cache_lock:
+        result = _cache.get(key)
+        if result is not None:
+            _cache.move_to_end(key)
+        return result
+
+
+def _cache_put(key: str, result: dict) -> None:
+    with _cache_lock:
+        _cache[key] = result
+        _cache.move_to_end(key)
+        while len(_cache) > LLM_CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def build_prompt(event: dict) -> str:
     title = event.get("title", "")
     description = event.get("description", "")
     sector = event.get("sector", "")
     sentiment_label = event.get("analytics", {}).get("sentiment", {}).get("label", "Neutral")
 
-    prompt = f"""Você é um analista sênior de risco financeiro.
+    return f"""Você é um analista sênior de risco financeiro.
 
 Evento: "{title}"
 Descrição: {description[:300]}
@@ -55,15 +87,39 @@ Responda em JSON com exatamente dois campos:
 
 Responda APENAS o JSON, sem markdown."""
 
+
+async def analyze_context(event: dict) -> dict | None:
+    """
+    Analisa um evento com LLM para obter reasoning contextual
+    e ajuste de confiança.
+
+    Returns:
+        {
+            "reasoning": "Texto explicativo da análise...",
+            "confidence_adjustment": 0.1  # delta entre -0.2 e +0.2
+        }
+        ou None se LLM não estiver ativo (ou a chamada falhar / estourar timeout).
+    """
+    if not _client:
+        return None
+
+    prompt = build_prompt(event)
+    cache_key = hashlib.sha256(f"{LLM_MODEL}\n{prompt}".encode("utf-8")).hexdigest()
+    cached = _cache_get(cache_key)
+    if cached is not None:
+        return cached
+
     try:
-        response = _client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.3,
-            max_tokens=150,
+        response = await asyncio.wait_for(
+            _client.chat.completions.create(
+                model=LLM_MODEL,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=0.3,
+                max_tokens=150,
+            ),
+            timeout=LLM_TIMEOUT,
         )
 
-        import json
         content = response.choices[0].message.content.strip()
         result = json.loads(content)
 
@@ -71,11 +127,73 @@ Responda APENAS o JSON, sem markdown."""
         adj = float(result.get("confidence_adjustment", 0.0))
         adj = max(-0.2, min(0.2, adj))
 
-        return {
+        result = {
             "reasoning": result.get("reasoning", ""),
             "confidence_adjustment": adj,
         }
+        _cache_put(cache_key, result)
+        return result
 
+    except asyncio.TimeoutError:
+        print(f"[inference/llm] Timeout ({LLM_TIMEOUT}s) na análise LLM.")
+        return None
     except Exception as e:
         print(f"[inference/llm] Erro na análise LLM: {e}")
         return None
+
+
+class LLMWorker:
+    """
+    Executa analyze_context() em background, com no máximo
+    LLM_CONCURRENCY chamadas simultâneas e LLM_MAX_PENDING na fila.
+    O callback recebe o resultado (None em caso de erro/timeout) e roda
+    fora do event loop (pode bloquear).
+    """
+
+    def __init__(self, concurrency: int = LLM_CONCURRENCY, max_pending: int = LLM_MAX_PENDING):
+        self.concurrency = concurrency
+        self.max_pending = max_pending
+        self._loop = asyncio.new_event_loop()
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._thread: threading.Thread | None = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._loop.run_forever, name="llm-worker", daemon=True)
+        self._thread.start()
+
+    def submit(self, event: dict, on_result: Callable[[dict | None], None]) -> bool:
+        """
+        Agenda a análise de um evento. Retorna False (sem agendar) se o
+        worker não está ativo ou a fila está cheia — o score do modelo segue
+        valendo sozinho.
+        """
+        if self._thread is None:
+            return False
+        with self._lock:
+            if self._pending >= self.max_pending:
+                return False
+            self._pending += 1
+        asyncio.run_coroutine_threadsafe(self._process(event, on_result), self._loop)
+        return True
+
+    async def _process(self, event: dict, on_result: Callable[[dict | None], None]) -> None:
+        try:
+            async with self._semaphore:
+                result = await analyze_context(event)
+            await self._loop.run_in_executor(None, on_result, result)
+        except Exception as e:
+            print(f"[inference/llm] ✕ Erro ao aplicar resultado LLM: {e}")
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+
+worker = LLMWorker()
@@ -0,0 +1,88 @@
+"""
+LLM Stub — Servidor local compatível com /v1/chat/completions da OpenAI.
+
+Responde sempre o mesmo JSON de análise, com latência configurável,
+para exercitar a camada LLM (concorrência, timeout, cache) sem custo.
+
+Uso:
+    python -m app.llm_stub --port 8089 --delay 0.5
+    OPENAI_BASE_URL=http://localhost:8089/v1 OPENAI_API_KEY=stub ENABLE_LLM_LAYER=true python -m app.main
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    delay = 0.0
+    adjustment = 0.05
+    calls = 0
+    _lock = threading.Lock()
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+
+        with StubHandler._lock:
+            StubHandler.calls += 1
+            call = StubHandler.calls
+
+        time.sleep(self.delay)
+
+        content = json.dumps({
+            "reasoning": f"Resposta stub #{call}.",
+            "confidence_adjustment": self.adjustment,
+        })
+        body = json.dumps({
+            "id": f"chatcmpl-stub-{call}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        }).encode("utf-8")
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(port: int, delay: float, adjustment: float) -> ThreadingHTTPServer:
+    """Sobe o stub em background e retorna o servidor (use .shutdown() para parar)."""
+    StubHandler.delay = delay
+    StubHandler.adjustment = adjustment
+    server = ThreadingHTTPServer(("127.0.0.1", port), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub local da API de chat da OpenAI")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--delay", type=float, default=0.5, help="Latência simulada (s)")
+    parser.add_argument("--adjustment", type=float, default=0.05, help="confidence_adjustment retornado")
+    args = parser.parse_args()
+
+    serve(args.port, args.delay, args.adjustment)
+    print(f"[inference/llm-stub] Ouvindo em http://127.0.0.1:{args.port}/v1 (delay={args.delay}s)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
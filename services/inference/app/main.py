@@ -4,17 +4,35 @@ Consome eventos enriquecidos da fila 'inference_queue',
 calcula probabilidade de impacto e salva em MongoDB.
 """
 
+import atexit
 import json
 import os
+import signal
+import sys
 import time
 from datetime import datetime, timezone
 
+import numpy as np
 from pymongo import MongoClient
 from redis import Redis
 
-from .features import extract_features
-from .model import predict, get_confidence_label
-from .llm_layer import analyze_context, ENABLE_LLM
+from .features import FEATURE_VERSION, extract_feature_matrix, row_to_features
+from .model import (
+    current_versions,
+    get_confidence_label,
+    maybe_reload,
+    prediction_cache,
+    shadow_predict_matrix,
+)
+from . import cascade
+from .metrics import FEATURE_SECONDS, LLM_SECONDS, MODEL_SECONDS, PROBABILITY
+from .scoring import impact_category
+from .llm_layer import ENABLE_LLM, worker as llm_worker
+from .feature_store import FeatureStore
+from .writer import PREDICTIONS_VERSION_KEY, PredictionWriter
+from . import rollups
+from .mood import MoodIndex
+from .stream import publish_predictions
 
 
 def get_settings() -> dict:
@@ -24,9 +42,165 @@ def get_settings() -> dict:
         "redis_host": os.getenv("REDIS_HOST", "localhost"),
         "redis_port": int(os.getenv("REDIS_PORT", 6379)),
         "inference_queue": os.getenv("INFERENCE_QUEUE", "inference_queue"),
+        "batch_size": int(os.getenv("INFERENCE_BATCH_SIZE", "64")),
+        "batch_wait_ms": int(os.getenv("INFERENCE_BATCH_WAIT_MS", "50")),
+        "write_batch_size": int(os.getenv("PREDICTION_WRITE_BATCH", "500")),
+        "write_flush_interval": float(os.getenv("PREDICTION_FLUSH_INTERVAL", "1.0")),
+        "http_port": int(os.getenv("INFERENCE_HTTP_PORT", "8001")),
+        "stats_interval": float(os.getenv("CASCADE_STATS_INTERVAL", "60")),
     }
 
 
+def collect_batch(redis_client: Redis, queue: str, batch_size: int, wait_ms: int) -> list[str]:
+    """
+    Micro-batching: bloqueia até o primeiro evento chegar e então drena
+    a fila até juntar batch_size eventos ou estourar wait_ms.
+    Com fila vazia o custo é o mesmo do brpop simples; com backlog,
+    o lote enche na hora e o modelo é chamado uma vez por lote.
+    """
+    item = redis_client.brpop(queue, timeout=5)
+    if not item:
+        return []
+
+    _queue, payload = item
+    payloads = [payload]
+    deadline = time.monotonic() + wait_ms / 1000.0
+
+    while len(payloads) < batch_size:
+        more = redis_client.rpop(queue, batch_size - len(payloads))
+        if more:
+            payloads.extend(more)
+            continue
+        if time.monotonic() >= deadline:
+            break
+        time.sleep(0.005)
+
+    return payloads
+
+
+def decode_events(payloads: list[str]) -> list[dict]:
+    """Decodifica payloads JSON, descartando os inválidos."""
+    events = []
+    for payload in payloads:
+        try:
+            events.append(json.loads(payload))
+        except json.JSONDecodeError as e:
+            print(f"[inference] ✕ Erro ao decodificar evento: {e}")
+    return events
+
+
+def apply_llm_result(
+    writer: PredictionWriter,
+    event_id: str,
+    predicted_at: str,
+    ml_probability: float,
+    model_version: str,
+    llm_result: dict | None,
+) -> None:
+    """
+    Aplica (depois) o ajuste do LLM sobre o score do modelo já salvo.
+    O filtro por predicted_at evita sobrescrever uma predição mais nova
+    do mesmo evento. Sem resultado (erro/timeout), só marca o status.
+    """
+    if not llm_result:
+        writer.patch(event_id, predicted_at, {"llm_status": "failed"})
+        return
+
+    adj = llm_result.get("confidence_adjustment", 0.0)
+    probability = round(min(max(ml_probability + adj, 0.0), 1.0), 3)
+    writer.patch(event_id, predicted_at, {
+        "probability": probability,
+        "confidence": get_confidence_label(probability),
+        "llm_reasoning": llm_result.get("reasoning"),
+        "llm_adjustment": adj,
+        "llm_status": "done",
+        "model_version": model_version + "+llm",
+    })
+    print(f"[inference] 🤖 {event_id[:8]}... LLM ajustou P {ml_probability:.1%} → {probability:.1%}")
+
+
+def process_event(
+    writer: PredictionWriter,
+    event: dict,
+    features: dict,
+    probability: float,
+    model_version: str,
+    extra: dict | None = None,
+    tier: str = "forest",
+) -> None:
+    """
+    Classifica e persiste a predição de um evento; agenda o LLM (opcional).
+    `extra` carrega campos adicionais do lote (latência, resultado shadow);
+    `tier` é a camada da cascata que resolveu o evento.
+    """
+    event_id = event.get("id", "unknown")
+    title = event.get("title", "Sem título")
+
+    # 4. Classificar confiança
+    confidence = get_confidence_label(probability)
+
+    # 5. Determinar categoria de impacto
+    sector = event.get("sector", "")
+    category = impact_category(sector, features.get("has_policy_keyword"))
+
+    PROBABILITY.observe(probability, model_version=model_version, sector=sector or "unknown")
+
+    # 6. Construir documento de predição (score do modelo gravado na hora)
+    # LLM só na faixa de incerteza do forest (ver cascade.py)
+    escalate = ENABLE_LLM and cascade.needs_llm(probability, tier)
+    predicted_at = datetime.now(timezone.utc).isoformat()
+    prediction_doc = {
+        "event_id": event_id,
+        "event_title": title,
+        "sector": sector,
+        "sub_sector": event.get("sub_sector", ""),
+        "country": event.get("location", {}).get("country", ""),
+        "probability": probability,
+        "confidence": confidence,
+        "impact_category": category,
+        # Vetor compacto, na ordem de FEATURE_NAMES da versão gravada ao lado
+        "features_used": list(features.values()),
+        "feature_version": FEATURE_VERSION,
+        "llm_reasoning": None,
+        "llm_status": "pending" if escalate else None,
+        "model_version": model_version,
+        "cascade_tier": tier,
+        "predicted_at": predicted_at,
+        **(extra or {}),
+    }
+
+    # 7. Salvar no MongoDB (upsert por event_id, via bulk_write em lote)
+    writer.upsert(event_id, prediction_doc)
+
+    # 8. LLM Layer (opcional): ajuste aplicado em background, sem bloquear o lote
+    if escalate:
+        submitted = time.perf_counter()
+
+        def on_result(llm_result: dict | None) -> None:
+            # Latência ponta a ponta da camada LLM (inclui espera na fila do worker)
+            elapsed = time.perf_counter() - submitted
+            cascade.stats.record("llm", 1, elapsed * 1000)
+            LLM_SECONDS.observe(elapsed)
+            apply_llm_result(writer, event_id, predicted_at, probability, model_version, llm_result)
+
+        scheduled = llm_worker.submit(event, on_result)
+        if not scheduled:
+            # Fila do LLM cheia: fica só o score do modelo
+            writer.patch(event_id, predicted_at, {"llm_status": "skipped"})
+
+    # Log
+    emoji = "🔴" if probability >= 0.75 else "🟡" if probability >= 0.45 else "🟢"
+    print(
+        f"[inference] {emoji} {event_id[:8]}... "
+        f"P={probability:.1%} ({confidence}) "
+        f"| {category} | {title[:50]}..."
+    )
+
+
+def _ms(seconds: float | None) -> str:
+    return "-" if seconds is None else f"{seconds * 1000:.2f}ms"
+
+
 def run() -> None:
     """Loop principal do Inference Service."""
     settings = get_settings()
@@ -38,93 +212,152 @@ def run() -> None:
     )
     mongo_client = MongoClient(settings["mongo_uri"])
     mongo_db = mongo_client[settings["mongo_db"]]
+    mood = MoodIndex(redis_client)
+
+    def on_insert(docs: list[dict]) -> None:
+        # Só predições novas: o collector reenvia os mesmos itens a cada coleta
+        rollups.record_predictions(mongo_db.rollups, docs)
+        mood.record_many("probability", [
+            (doc.get("sector"), doc["probability"]) for doc in docs if doc.get("probability") is not None
+        ])
+        publish_predictions(redis_client, docs)
+
+    writer = PredictionWriter(
+        mongo_db.predictions,
+        max_batch=settings["write_batch_size"],
+        flush_interval=settings["write_flush_interval"],
+        # Só flushes que inseriram/alteraram documentos invalidam o cache da API
+        on_flush=lambda _changed: redis_client.incr(PREDICTIONS_VERSION_KEY),
+        on_insert=on_insert,
+    )
+    writer.ensure_indexes()
+    writer.start()
+    feature_store = FeatureStore(
+        mongo_db.features,
+        max_batch=settings["write_batch_size"],
+        flush_interval=settings["write_flush_interval"],
+    )
+    feature_store.ensure_indexes()
+    feature_store.start()
+    # Flush final no shutdown (docker stop envia SIGTERM)
+    atexit.register(writer.flush)
+    atexit.register(feature_store.flush)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+
+    if ENABLE_LLM:
+        llm_worker.start()
+
+    # API HTTP de scoring (mesmo processo → mesmo modelo em memória)
+    if settings["http_port"] > 0:
+        from .server import start_in_background
+        start_in_background(settings["http_port"])
 
     print("[inference] ✓ Inference Service iniciado.")
     print(f"[inference]   Queue: {settings['inference_queue']}")
+    print(f"[inference]   Batch: até {settings['batch_size']} eventos / {settings['batch_wait_ms']}ms")
+    print(f"[inference]   Modelos: {current_versions()}")
+    if settings["http_port"] > 0:
+        print(f"[inference]   HTTP: :{settings['http_port']} (POST /score, /score/batch)")
     print(f"[inference]   LLM Layer: {'ON' if ENABLE_LLM else 'OFF'}")
+    if cascade.CASCADE_ENABLED:
+        print(
+            f"[inference]   Cascata: heurística ≤{cascade.HEURISTIC_LOW} / ≥{cascade.HEURISTIC_HIGH}"
+            f" | LLM em [{cascade.LLM_LOW}, {cascade.LLM_HIGH}]"
+        )
+    else:
+        print("[inference]   Cascata: OFF (todo evento vai ao forest)")
     print("[inference]   Aguardando eventos na fila...")
 
+    last_stats = time.monotonic()
     while True:
-        item = redis_client.brpop(settings["inference_queue"], timeout=5)
-        if not item:
+        # Hot reload: troca de modelo sem reiniciar o serviço
+        maybe_reload()
+
+        payloads = collect_batch(
+            redis_client,
+            settings["inference_queue"],
+            settings["batch_size"],
+            settings["batch_wait_ms"],
+        )
+        if not payloads:
             time.sleep(0.5)
             continue
 
-        _queue, payload = item
-        try:
-            event = json.loads(payload)
-        except json.JSONDecodeError as e:
-            print(f"[inference] ✕ Erro ao decodificar evento: {e}")
+        events = decode_events(payloads)
+        if not events:
             continue
 
+        # 1. Feature Engineering (matriz float32 direto, sem dict por evento)
+        start = time.perf_counter()
         try:
-            event_id = event.get("id", "unknown")
-            title = event.get("title", "Sem título")
-
-            # 1. Feature Engineering
-            features = extract_features(event)
-
-            # 2. ML Prediction
-            probability, model_version = predict(features)
-
-            # 3. LLM Layer (opcional)
-            llm_result = None
-            if ENABLE_LLM:
-                import asyncio
-                llm_result = asyncio.get_event_loop().run_until_complete(
-                    analyze_context(event)
-                )
-                if llm_result:
-                    # Ajusta probabilidade com delta do LLM
-                    adj = llm_result.get("confidence_adjustment", 0.0)
-                    probability = round(min(max(probability + adj, 0.0), 1.0), 3)
-                    model_version += "+llm"
-
-            # 4. Classificar confiança
-            confidence = get_confidence_label(probability)
-
-            # 5. Determinar categoria de impacto
-            sector = event.get("sector", "")
-            if features.get("has_policy_keyword"):
-                impact_category = "Impacto de Políticas Públicas"
-            elif sector in ("Macro", "Commodities", "Market"):
-                impact_category = "Impacto Macroeconômico"
-            else:
-                impact_category = "Impacto Setorial"
-
-            # 6. Construir documento de predição
-            prediction_doc = {
-                "event_id": event_id,
-                "event_title": title,
-                "sector": sector,
-                "sub_sector": event.get("sub_sector", ""),
-                "probability": probability,
-                "confidence": confidence,
-                "impact_category": impact_category,
-                "features_used": features,
-                "llm_reasoning": llm_result.get("reasoning") if llm_result else None,
-                "model_version": model_version,
-                "predicted_at": datetime.now(timezone.utc).isoformat(),
-            }
-
-            # 7. Salvar no MongoDB (upsert por event_id)
-            mongo_db.predictions.update_one(
-                {"event_id": event_id},
-                {"$set": prediction_doc},
-                upsert=True,
-            )
+            x = extract_feature_matrix(events)
+        except Exception:
+            # Algum evento malformado: isola por evento para não perder o lote
+            valid, rows = [], []
+            for event in events:
+                try:
+                    rows.append(extract_feature_matrix([event]))
+                    valid.append(event)
+                except Exception as e:
+                    print(f"[inference] ✕ Erro ao extrair features: {e}")
+            if not valid:
+                continue
+            events, x = valid, np.vstack(rows)
+        FEATURE_SECONDS.observe(time.perf_counter() - start)
+
+        # 1b. Feature store: vetores do lote para treino/re-scoring (gravados em bulk pelo flush)
+        feature_store.stage([event.get("id") for event in events], x)
+
+        # 2. Cascata: heurística nos casos óbvios, forest no resto (uma chamada por lote)
+        start = time.perf_counter()
+        results = cascade.route(x)
+        model_seconds = time.perf_counter() - start
+        MODEL_SECONDS.observe(model_seconds)
+        model_latency_ms = round(model_seconds * 1000, 3)
+
+        # 2b. Shadow: candidato pontua o mesmo lote; resultado salvo ao lado
+        shadow = shadow_predict_matrix(x)
+        shadow_results = shadow[0] if shadow else [None] * len(events)
+        shadow_latency_ms = round(shadow[1], 3) if shadow else None
 
-            # Log
-            emoji = "🔴" if probability >= 0.75 else "🟡" if probability >= 0.45 else "🟢"
+        for event, row, (probability, model_version, tier, top_features), shadow_result in zip(
+            events, x, results, shadow_results
+        ):
+            # Latências são do lote inteiro (mesma base para produção e shadow)
+            extra = {"model_latency_ms": model_latency_ms, "top_features": top_features, "shadow": None}
+            if shadow_result:
+                extra["shadow"] = {
+                    "model_version": shadow_result[1],
+                    "probability": shadow_result[0],
+                    "latency_ms": shadow_latency_ms,
+                }
+            try:
+                process_event(writer, event, row_to_features(row), probability, model_version, extra, tier)
+            except Exception as e:
+                print(f"[inference] ✕ Erro ao processar evento: {e}")
+                continue
+
+        # 3. Persistência: flush se o buffer encheu ou o intervalo venceu
+        writer.maybe_flush()
+        feature_store.maybe_flush()
+
+        if time.monotonic() - last_stats >= settings["stats_interval"]:
+            last_stats = time.monotonic()
+            snapshot = cascade.stats.snapshot()
+            print(f"[inference] 📊 Cascata ({snapshot['events']} eventos): " + " | ".join(
+                f"{tier} {t['hit_rate']:.1%} ~{t['avg_latency_ms']:.3f}ms"
+                for tier, t in snapshot["tiers"].items()
+            ))
             print(
-                f"[inference] {emoji} {event_id[:8]}... "
-                f"P={probability:.1%} ({confidence}) "
-                f"| {impact_category} | {title[:50]}..."
+                f"[inference] 📊 Latência p50/p99: features "
+                f"{_ms(FEATURE_SECONDS.quantile(0.5))}/{_ms(FEATURE_SECONDS.quantile(0.99))}"
+                f" | modelo {_ms(MODEL_SECONDS.quantile(0.5))}/{_ms(MODEL_SECONDS.quantile(0.99))}"
+            )
+            cache_stats = prediction_cache.stats()
+            print(
+                f"[inference] 📊 Cache de predições: {cache_stats['hit_rate']:.1%} hits "
+                f"({cache_stats['size']}/{cache_stats['max_size']})"
             )
-
-        except Exception as e:
-            print(f"[inference] ✕ Erro ao processar evento: {e}")
-            continue
 
 
 if __name__ == "__main__":
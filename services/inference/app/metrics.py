@@ -0,0 +1,154 @@
+"""
+Metrics — Histogramas do inference service, no formato texto do Prometheus.
+
+    inference_feature_seconds        extração de features (por lote)
+    inference_model_seconds          cascata heurística + forest (por lote)
+    inference_llm_seconds            chamada LLM, ponta a ponta (por evento)
+    inference_mongo_write_seconds    bulk_write no MongoDB {collection}
+    inference_probability            probabilidade gravada {model_version, sector}
+
+Mais os contadores da cascata e do cache de predições. Exportado em
+GET /metrics pelo servidor HTTP (server.py); sem dependência externa.
+
+Os histogramas são cumulativos desde o start do processo: latência do
+SLO via histogram_quantile() e drift do modelo comparando a distribuição
+de probability entre model_versions depois de um retreino.
+"""
+
+import math
+import threading
+
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+PROBABILITY_BUCKETS = (0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Histograma de buckets fixos, com uma série por combinação de labels."""
+
+    def __init__(self, name: str, help_text: str, buckets: tuple, label_names: tuple = ()):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets) + (math.inf,)
+        self.label_names = label_names
+        self._series: dict[tuple, list] = {}  # labels → [contagens por bucket, soma, total]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def quantile(self, q: float, **labels) -> float | None:
+        """Estimativa do quantil por interpolação linear no bucket (como histogram_quantile)."""
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None or series[2] == 0:
+                return None
+            counts, total = list(series[0]), series[2]
+        rank = q * total
+        cumulative, lower = 0, 0.0
+        for bound, count in zip(self.buckets, counts):
+            if count and cumulative + count >= rank:
+                # Bucket +Inf: o melhor palpite é o maior limite finito
+                if bound == math.inf:
+                    return lower
+                return lower + (bound - lower) * (rank - cumulative) / count
+            cumulative += count
+            lower = bound
+        return lower
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = {key: (list(s[0]), s[1], s[2]) for key, s in self._series.items()}
+        for key, (counts, total_sum, total_count) in sorted(snapshot.items()):
+            labels = dict(zip(self.label_names, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = _format_labels({**labels, "le": _format_value(bound)})
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {total_sum!r}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {total_count}")
+        return lines
+
+
+FEATURE_SECONDS = Histogram(
+    "inference_feature_seconds", "Tempo de extração de features por lote.", LATENCY_BUCKETS,
+)
+MODEL_SECONDS = Histogram(
+    "inference_model_seconds", "Tempo da cascata (heurística + forest) por lote.", LATENCY_BUCKETS,
+)
+LLM_SECONDS = Histogram(
+    "inference_llm_seconds", "Tempo da camada LLM por evento (inclui fila do worker).", LATENCY_BUCKETS,
+)
+MONGO_WRITE_SECONDS = Histogram(
+    "inference_mongo_write_seconds", "Tempo de cada bulk_write no MongoDB.", LATENCY_BUCKETS,
+    ("collection",),
+)
+PROBABILITY = Histogram(
+    "inference_probability", "Probabilidade de impacto gravada.", PROBABILITY_BUCKETS,
+    ("model_version", "sector"),
+)
+
+HISTOGRAMS = (FEATURE_SECONDS, MODEL_SECONDS, LLM_SECONDS, MONGO_WRITE_SECONDS, PROBABILITY)
+
+
+def _simple_metric(name: str, help_text: str, samples: list[tuple[dict, float]], kind: str = "counter") -> list[str]:
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    lines.extend(f"{name}{_format_labels(labels)} {value}" for labels, value in samples)
+    return lines
+
+
+def render() -> str:
+    """Todas as métricas no formato de exposição texto do Prometheus (0.0.4)."""
+    # Import tardio: writer/feature_store usam este módulo sem carregar o modelo
+    from . import cascade
+    from .model import prediction_cache
+
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.render())
+
+    snapshot = cascade.stats.snapshot()
+    lines.extend(_simple_metric(
+        "inference_cascade_events_total", "Eventos resolvidos (ou escalados, no llm) por camada.",
+        [({"tier": tier}, stats["count"]) for tier, stats in snapshot["tiers"].items()],
+    ))
+    cache = prediction_cache.stats()
+    lines.extend(_simple_metric(
+        "inference_prediction_cache_requests_total", "Consultas ao cache de predições.",
+        [({"result": "hit"}, cache["hits"]), ({"result": "miss"}, cache["misses"])],
+    ))
+    lines.extend(_simple_metric(
+        "inference_prediction_cache_size", "Entradas no cache de predições.",
+        [({}, cache["size"])], kind="gauge",
+    ))
+    return "\n".join(lines) + "\n"
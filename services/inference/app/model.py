@@ -1,48 +1,180 @@
 """
 Model — Carrega modelo ML treinado (RandomForest) e expõe predict().
 Se modelo não estiver disponível, usa fallback heurístico.
+
+Quando existe um registry (ver registry.py), o modelo de produção e o
+candidato em shadow vêm dele e são trocados a quente por maybe_reload().
+Sem registry, carrega o artefato legado impact_model_v1.joblib.
+
+Se existe um .forest ao lado do .joblib (formato compacto, ver forest.py),
+ele tem precedência: é mapeado via np.memmap, sem unpickling nem sklearn.
 """
 
 import os
+import time
+
 import numpy as np
 
+from . import registry
 from .features import feature_names
-
-# Tenta carregar joblib (pode falhar se modelo não existe ainda)
-try:
-    import joblib
-    JOBLIB_AVAILABLE = True
-except ImportError:
-    JOBLIB_AVAILABLE = False
+from .forest import FlatForest
+from .prediction_cache import PredictionCache
 
 MODEL_PATH = os.path.join(
     os.path.dirname(os.path.dirname(__file__)),
     "models", "impact_model_v1.joblib"
 )
+LEGACY_VERSION = "rf_v1"
+HEURISTIC_VERSION = "heuristic_v1"
 
-_model = None
-_model_version = "heuristic_v1"  # default
+# Intervalo mínimo (s) entre checagens do registry.json
+RELOAD_INTERVAL = float(os.getenv("MODEL_RELOAD_INTERVAL", "10"))
 
+# Nº de features com maior |contribuição| guardadas em cada predição
+TOP_CONTRIBUTORS = int(os.getenv("TOP_CONTRIBUTORS", "3"))
 
-def _load_model():
-    """Tenta carregar o modelo treinado do disco."""
-    global _model, _model_version
 
-    if not JOBLIB_AVAILABLE:
-        print("[inference/model] joblib não disponível. Usando fallback heurístico.")
-        return
+def _flatten(model) -> FlatForest | None:
+    """Achata o RandomForest para o avaliador vetorizado (None se não suportado)."""
+    if not hasattr(model, "estimators_"):
+        return None
+    try:
+        forest = FlatForest.from_sklearn(model)
+        print(f"[inference/model] ✓ Avaliador vetorizado: {forest.n_trees} árvores, {forest.n_nodes} nós")
+        return forest
+    except Exception as e:
+        print(f"[inference/model] Avaliador vetorizado indisponível, usando sklearn: {e}")
+        return None
+
+
+class LoadedModel:
+    """Modelo carregado em memória + avaliador vetorizado + versão."""
+
+    def __init__(self, model, version: str, forest: FlatForest | None = None):
+        self.model = model  # None quando carregado direto do .forest
+        self.version = version
+        # versão achatada (avaliador vetorizado)
+        self.forest = forest if forest is not None else _flatten(model)
+
+    def predict_proba(self, x: np.ndarray) -> np.ndarray:
+        """Probabilidade da classe 1 (alto impacto) para cada linha."""
+        # predict_proba retorna [[prob_class_0, prob_class_1], ...]
+        # O avaliador vetorizado é bit a bit idêntico ao sklearn, só mais rápido
+        if self.forest is not None or hasattr(self.model, "predict_proba"):
+            proba = self.forest.predict_proba(x) if self.forest is not None else self.model.predict_proba(x)
+            # Classe 1 = alto impacto
+            return proba[:, 1 if proba.shape[1] > 1 else 0]
+        # Fallback para predict()
+        return self.model.predict(x)
+
+    def predict_proba_contrib(self, x: np.ndarray) -> tuple[np.ndarray, np.ndarray | None]:
+        """
+        Probabilidade da classe 1 + contribuição de cada feature (Saabas),
+        no mesmo percurso das árvores. Sem avaliador vetorizado: (proba, None).
+        """
+        if self.forest is None:
+            return self.predict_proba(x), None
+        class_index = 1 if self.forest.n_classes > 1 else 0
+        proba, contributions, _bias = self.forest.predict_proba_contrib(x, class_index)
+        return proba[:, class_index], contributions
+
 
-    if os.path.exists(MODEL_PATH):
+# Trocados por referência (atômico): leitores pegam um snapshot do global
+_production: LoadedModel | None = None
+_shadow: LoadedModel | None = None
+_registry_mtime: float | None = None
+_last_reload_check = 0.0
+
+# LRU (model_version, features) → probabilidade; limpo a cada carga de modelo
+prediction_cache = PredictionCache()
+
+
+def _load_artifact(path: str, version: str) -> LoadedModel | None:
+    """
+    Carrega um modelo do disco: o .forest irmão (memmap) se existir,
+    senão o .joblib. None em caso de erro.
+    """
+    forest_path = os.path.splitext(path)[0] + ".forest"
+    try:
+        if os.path.exists(forest_path):
+            loaded = LoadedModel(None, version, FlatForest.load(forest_path))
+            print(f"[inference/model] ✓ Modelo carregado (memmap): {version} ({forest_path})")
+            return loaded
+        # joblib (e o sklearn, no unpickle) só são importados neste caminho
         try:
-            _model = joblib.load(MODEL_PATH)
-            _model_version = "rf_v1"
-            print(f"[inference/model] ✓ Modelo carregado: {MODEL_PATH}")
-        except Exception as e:
-            print(f"[inference/model] ✕ Erro ao carregar modelo: {e}")
-            _model = None
+            import joblib
+        except ImportError:
+            print("[inference/model] joblib não disponível. Usando fallback heurístico.")
+            return None
+        loaded = LoadedModel(joblib.load(path), version)
+        print(f"[inference/model] ✓ Modelo carregado: {version} ({path})")
+        return loaded
+    except Exception as e:
+        print(f"[inference/model] ✕ Erro ao carregar modelo {version}: {e}")
+        return None
+
+
+def load_version(version: str) -> LoadedModel | None:
+    """Carrega uma versão do registry fora do ciclo de hot reload (ex.: backfill)."""
+    return _load_artifact(registry.artifact_path(version), version)
+
+
+def _load_model():
+    """Tenta carregar o modelo treinado do disco (registry ou artefato legado)."""
+    global _production, _shadow, _registry_mtime
+
+    _registry_mtime = registry.pointers_mtime()
+    pointers = registry.read_pointers()
+
+    if pointers["production"]:
+        production = _load_artifact(registry.artifact_path(pointers["production"]), pointers["production"])
+    elif os.path.exists(MODEL_PATH) or os.path.exists(os.path.splitext(MODEL_PATH)[0] + ".forest"):
+        production = _load_artifact(MODEL_PATH, LEGACY_VERSION)
     else:
+        production = None
         print(f"[inference/model] Modelo não encontrado em {MODEL_PATH}. Usando fallback heurístico.")
 
+    shadow = None
+    if pointers["shadow"]:
+        shadow = _load_artifact(registry.artifact_path(pointers["shadow"]), pointers["shadow"])
+
+    # Falha ao carregar uma nova produção não derruba a que já está servindo
+    if production is not None or _production is None:
+        _production = production
+    _shadow = shadow
+    prediction_cache.clear()
+
+
+def maybe_reload() -> bool:
+    """
+    Hot reload: se o registry.json mudou desde a última carga, carrega
+    os novos modelos e troca as referências. Retorna True se recarregou.
+    Barato para chamar a cada lote (checa no máximo a cada RELOAD_INTERVAL).
+    """
+    global _last_reload_check
+
+    now = time.monotonic()
+    if now - _last_reload_check < RELOAD_INTERVAL:
+        return False
+    _last_reload_check = now
+
+    if registry.pointers_mtime() == _registry_mtime:
+        return False
+
+    previous = current_versions()
+    _load_model()
+    print(f"[inference/model] ↻ Registry alterado: {previous} → {current_versions()}")
+    return True
+
+
+def current_versions() -> dict:
+    """Versões servidas no momento (produção e shadow)."""
+    production, shadow = _production, _shadow
+    return {
+        "production": production.version if production else HEURISTIC_VERSION,
+        "shadow": shadow.version if shadow else None,
+    }
+
 
 def _heuristic_predict(features: dict) -> float:
     """
@@ -82,38 +214,160 @@ def _heuristic_predict(features: dict) -> float:
     return round(min(max(score, 0.0), 1.0), 3)
 
 
-def predict(features: dict) -> tuple[float, str]:
+def heuristic_explained(x: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
     """
-    Prediz a probabilidade de impacto de um evento.
+    _heuristic_predict() vetorizado sobre a matriz de features (mesmas
+    regras, mesma ordem das somas → resultado idêntico por linha).
+    A heurística é aditiva: cada parcela já é a contribuição da sua feature.
 
     Returns:
-        (probability, model_version)
-        probability: float 0.0 – 1.0
-        model_version: str identifica qual modelo/método foi usado
+        (scores, contribuições (n_linhas × n_features))
     """
-    if _model is not None:
-        try:
-            # Constrói array ordenado de features
-            names = feature_names()
-            x = np.array([[features.get(name, 0) for name in names]])
-
-            # predict_proba retorna [[prob_class_0, prob_class_1]]
-            if hasattr(_model, "predict_proba"):
-                proba = _model.predict_proba(x)[0]
-                # Classe 1 = alto impacto
-                probability = float(proba[1]) if len(proba) > 1 else float(proba[0])
-            else:
-                # Fallback para predict()
-                prediction = _model.predict(x)[0]
-                probability = float(prediction)
-
-            return round(min(max(probability, 0.0), 1.0), 3), _model_version
+    column = {name: i for i, name in enumerate(feature_names())}
+    x = np.asarray(x, dtype=np.float64)
+
+    terms = {
+        "sentiment_polarity": np.abs(x[:, column["sentiment_polarity"]]) * 0.15,
+        "impact_score": np.minimum(x[:, column["impact_score"]] / 10.0, 1.0) * 0.30,
+        "has_crisis_keyword": np.where(x[:, column["has_crisis_keyword"]] != 0, 0.20, 0.0),
+        "has_policy_keyword": np.where(x[:, column["has_policy_keyword"]] != 0, 0.15, 0.0),
+        "sector_encoded": np.where(np.isin(x[:, column["sector_encoded"]], (2, 3)), 0.10, 0.0),
+        "urgency_encoded": np.where(x[:, column["urgency_encoded"]] >= 2, 0.10, 0.0),
+    }
+    contributions = np.zeros_like(x)
+    score = np.zeros(len(x))
+    for name, term in terms.items():
+        contributions[:, column[name]] = term
+        score += term
 
+    # round() do Python (arredondamento correto) para bater com o escalar
+    scores = np.array([round(v, 3) for v in np.clip(score, 0.0, 1.0).tolist()])
+    return scores, contributions
+
+
+def heuristic_matrix(x: np.ndarray) -> np.ndarray:
+    """Scores da heurística para cada linha (ver heuristic_explained)."""
+    return heuristic_explained(x)[0]
+
+
+def top_contributors(contributions: np.ndarray | None, k: int = TOP_CONTRIBUTORS) -> list | None:
+    """
+    As k features de maior |contribuição| de uma linha, em forma compacta:
+    [["impact_score", 0.2113], ["has_crisis_keyword", -0.0412], ...]
+    """
+    if contributions is None:
+        return None
+    names = feature_names()
+    order = np.argsort(-np.abs(contributions), kind="stable")[:k]
+    return [[names[i], round(float(contributions[i]), 4)] for i in order if contributions[i] != 0]
+
+
+def _postprocess(probability: float) -> float:
+    """Clamp + arredondamento padrão aplicado a toda probabilidade do modelo."""
+    return round(min(max(probability, 0.0), 1.0), 3)
+
+
+def predict_matrix_explained(
+    x: np.ndarray, loaded: LoadedModel | None = None
+) -> list[tuple[float, str, list | None]]:
+    """
+    Prediz a probabilidade de impacto de um lote já em forma de matriz
+    (n_eventos × n_features, colunas na ordem de feature_names()).
+    `loaded` fixa um modelo específico; por padrão usa o de produção.
+
+    Uma única chamada ao modelo por lote — o custo fixo por chamada do
+    RandomForest é amortizado. O resultado de cada linha é idêntico ao
+    de predict(). Linhas já vistas com o mesmo modelo saem do
+    prediction_cache; só as demais vão ao modelo.
+
+    As principais contribuições por feature (ver top_contributors) saem
+    do mesmo percurso das árvores que produz a probabilidade.
+
+    Returns:
+        lista de (probability, model_version, top_features), na mesma ordem das linhas
+    """
+    if len(x) == 0:
+        return []
+
+    production = loaded if loaded is not None else _production
+    if production is not None:
+        try:
+            cached = prediction_cache.get_many(production.version, x)
+            misses = [i for i, entry in enumerate(cached) if entry is None]
+            if misses:
+                probabilities, contributions = production.predict_proba_contrib(x[misses])
+                computed = [
+                    (
+                        _postprocess(float(p)),
+                        top_contributors(contributions[j] if contributions is not None else None),
+                    )
+                    for j, p in enumerate(probabilities)
+                ]
+                prediction_cache.put_many(production.version, x[misses], computed)
+                for i, entry in zip(misses, computed):
+                    cached[i] = entry
+            return [(probability, production.version, top) for probability, top in cached]
         except Exception as e:
             print(f"[inference/model] Erro na predição ML, usando fallback: {e}")
 
     # Fallback heurístico
-    return _heuristic_predict(features), "heuristic_v1"
+    scores, contributions = heuristic_explained(x)
+    return [
+        (float(p), HEURISTIC_VERSION, top_contributors(row))
+        for p, row in zip(scores, contributions)
+    ]
+
+
+def predict_matrix(x: np.ndarray, loaded: LoadedModel | None = None) -> list[tuple[float, str]]:
+    """
+    predict_matrix_explained() sem as contribuições.
+
+    Returns:
+        lista de (probability, model_version), na mesma ordem das linhas
+    """
+    return [(probability, version) for probability, version, _top in predict_matrix_explained(x, loaded)]
+
+
+def shadow_predict_matrix(x: np.ndarray) -> tuple[list[tuple[float, str]], float] | None:
+    """
+    Pontua o mesmo lote com o modelo candidato (shadow).
+    Returns:
+        (resultados, latência do lote em ms) ou None se não há shadow.
+        Erros do shadow nunca afetam a produção.
+    """
+    shadow = _shadow
+    if shadow is None or len(x) == 0:
+        return None
+    try:
+        start = time.perf_counter()
+        probabilities = shadow.predict_proba(x)
+        latency_ms = (time.perf_counter() - start) * 1000
+        return [(_postprocess(float(p)), shadow.version) for p in probabilities], latency_ms
+    except Exception as e:
+        print(f"[inference/model] Erro no modelo shadow {shadow.version}: {e}")
+        return None
+
+
+def predict_batch(features_list: list[dict]) -> list[tuple[float, str]]:
+    """Prediz vários eventos a partir de dicts de features (ver predict_matrix)."""
+    names = feature_names()
+    x = np.array(
+        [[features.get(name, 0) for name in names] for features in features_list],
+        dtype=np.float32,
+    ).reshape(len(features_list), len(names))
+    return predict_matrix(x)
+
+
+def predict(features: dict) -> tuple[float, str]:
+    """
+    Prediz a probabilidade de impacto de um evento.
+
+    Returns:
+        (probability, model_version)
+        probability: float 0.0 – 1.0
+        model_version: str identifica qual modelo/método foi usado
+    """
+    return predict_batch([features])[0]
 
 
 def get_confidence_label(probability: float) -> str:
@@ -0,0 +1,24 @@
+"""
+Mood — Atualização do índice de humor pelas predições novas (métrica
+`probability`). Script Lua, chaves e meias-vidas em shared.mood, os
+mesmos que o analysis usa para a métrica `sentiment`.
+"""
+
+from shared.mood import MOOD_HALF_LIVES, UPDATE_SCRIPT, update_args
+
+
+class MoodIndex:
+    def __init__(self, redis_client, half_lives: list[int] | None = None):
+        self.redis = redis_client
+        self.half_lives = half_lives or MOOD_HALF_LIVES
+        self._script = redis_client.register_script(UPDATE_SCRIPT)
+
+    def record_many(self, metric: str, samples: list[tuple[str | None, float]]) -> None:
+        """Uma amostra (setor, valor) por evento; todas num único pipeline."""
+        if not samples:
+            return
+        pipe = self.redis.pipeline(transaction=False)
+        for sector, value in samples:
+            keys, args = update_args(metric, sector, value, self.half_lives)
+            self._script(keys=keys, args=args, client=pipe)
+        pipe.execute()
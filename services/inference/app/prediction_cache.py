@@ -0,0 +1,80 @@
+"""
+Prediction Cache — LRU de predições na frente do modelo.
+
+Chave: (model_version, bytes da linha float32 de features) — a tupla
+exata das 14 features, na ordem de FEATURE_NAMES. Como o forest é
+determinístico, uma linha repetida dá a mesma probabilidade (e as
+mesmas contribuições); o cache evita reavaliar as 150 árvores para ela.
+Valor guardado: (probability, top_features).
+
+Limpo a cada (re)carga de modelo (model._load_model); a versão na chave
+ainda protege contra qualquer mistura entre modelos (ex.: backfill com
+uma versão fixada).
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "4096"))
+
+
+class PredictionCache:
+    def __init__(self, max_size: int = PREDICTION_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries: OrderedDict[tuple[str, bytes], tuple[float, list | None]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _key(version: str, row: np.ndarray) -> tuple[str, bytes]:
+        return version, np.ascontiguousarray(row, dtype=np.float32).tobytes()
+
+    def get_many(self, version: str, x: np.ndarray) -> list[tuple[float, list | None] | None]:
+        """Predição em cache de cada linha (None = miss)."""
+        if self.max_size <= 0:
+            return [None] * len(x)
+        found = []
+        with self._lock:
+            for row in x:
+                key = self._key(version, row)
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                found.append(entry)
+            hits = sum(entry is not None for entry in found)
+            self._hits += hits
+            self._misses += len(found) - hits
+        return found
+
+    def put_many(self, version: str, x: np.ndarray, entries: list[tuple[float, list | None]]) -> None:
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            for row, entry in zip(x, entries):
+                key = self._key(version, row)
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+            }
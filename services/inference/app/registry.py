@@ -0,0 +1,186 @@
+"""
+Model Registry — Diretório de modelos versionados.
+
+Layout:
+    models/registry/
+        registry.json              {"production": "rf_v2", "shadow": "rf_v3"}
+        rf_v2/model.joblib
+        rf_v2/model.forest         formato compacto (memmap), gerado no register
+        rf_v2/meta.json            {"version", "registered_at", "metrics", ...}
+
+Os workers observam o registry.json e trocam de modelo a quente quando
+a versão promovida muda (ver model.maybe_reload). Toda escrita no
+registry.json é atômica (arquivo temporário + os.replace).
+
+Uso:
+    python -m app.registry list
+    python -m app.registry register /caminho/modelo.joblib --version rf_v2
+    python -m app.registry promote rf_v2
+    python -m app.registry shadow rf_v3
+    python -m app.registry shadow --clear
+"""
+
+import argparse
+import json
+import os
+import shutil
+from datetime import datetime, timezone
+
+REGISTRY_DIR = os.getenv(
+    "MODEL_REGISTRY_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "models", "registry"),
+)
+POINTERS_FILE = "registry.json"
+ARTIFACT_FILE = "model.joblib"
+FOREST_FILE = "model.forest"
+META_FILE = "meta.json"
+
+
+def _pointers_path(registry_dir: str = REGISTRY_DIR) -> str:
+    return os.path.join(registry_dir, POINTERS_FILE)
+
+
+def _write_json_atomic(path: str, data: dict) -> None:
+    """Escreve JSON de forma atômica — leitores nunca veem arquivo pela metade."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def read_pointers(registry_dir: str = REGISTRY_DIR) -> dict:
+    """Retorna {"production": versão|None, "shadow": versão|None}."""
+    try:
+        with open(_pointers_path(registry_dir), encoding="utf-8") as f:
+            pointers = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        pointers = {}
+    return {
+        "production": pointers.get("production"),
+        "shadow": pointers.get("shadow"),
+    }
+
+
+def pointers_mtime(registry_dir: str = REGISTRY_DIR) -> float | None:
+    """mtime do registry.json (None se o registry ainda não existe)."""
+    try:
+        return os.path.getmtime(_pointers_path(registry_dir))
+    except OSError:
+        return None
+
+
+def artifact_path(version: str, registry_dir: str = REGISTRY_DIR) -> str:
+    return os.path.join(registry_dir, version, ARTIFACT_FILE)
+
+
+def read_meta(version: str, registry_dir: str = REGISTRY_DIR) -> dict:
+    try:
+        with open(os.path.join(registry_dir, version, META_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def list_versions(registry_dir: str = REGISTRY_DIR) -> list[str]:
+    if not os.path.isdir(registry_dir):
+        return []
+    return sorted(
+        name for name in os.listdir(registry_dir)
+        if os.path.exists(artifact_path(name, registry_dir))
+    )
+
+
+def register(model_path: str, version: str, metrics: dict | None = None,
+             registry_dir: str = REGISTRY_DIR) -> str:
+    """Copia um modelo .joblib para o registry sob a versão informada."""
+    target_dir = os.path.join(registry_dir, version)
+    if os.path.exists(os.path.join(target_dir, ARTIFACT_FILE)):
+        raise ValueError(f"Versão já registrada: {version}")
+
+    os.makedirs(target_dir, exist_ok=True)
+    shutil.copyfile(model_path, os.path.join(target_dir, ARTIFACT_FILE))
+    try:
+        # Formato compacto para cold start rápido (ver forest.py)
+        from .forest import convert
+        convert(model_path, os.path.join(target_dir, FOREST_FILE))
+    except Exception as e:
+        print(f"[inference/registry] .forest não gerado para {version} (usará o .joblib): {e}")
+    _write_json_atomic(os.path.join(target_dir, META_FILE), {
+        "version": version,
+        "registered_at": datetime.now(timezone.utc).isoformat(),
+        "source": os.path.abspath(model_path),
+        "metrics": metrics or {},
+    })
+    return target_dir
+
+
+def _set_pointer(role: str, version: str | None, registry_dir: str = REGISTRY_DIR) -> dict:
+    if version is not None and version not in list_versions(registry_dir):
+        raise ValueError(f"Versão não registrada: {version}")
+
+    os.makedirs(registry_dir, exist_ok=True)
+    pointers = read_pointers(registry_dir)
+    pointers[role] = version
+    pointers["updated_at"] = datetime.now(timezone.utc).isoformat()
+    _write_json_atomic(_pointers_path(registry_dir), pointers)
+    return pointers
+
+
+def promote(version: str, registry_dir: str = REGISTRY_DIR) -> dict:
+    """Promove uma versão para produção. Se ela era o shadow, o shadow é limpo."""
+    pointers = _set_pointer("production", version, registry_dir)
+    if pointers.get("shadow") == version:
+        pointers = _set_pointer("shadow", None, registry_dir)
+    return pointers
+
+
+def set_shadow(version: str | None, registry_dir: str = REGISTRY_DIR) -> dict:
+    """Define (ou limpa, com None) o modelo candidato em shadow mode."""
+    return _set_pointer("shadow", version, registry_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Registry de modelos do inference service")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("list", help="Lista versões registradas")
+
+    reg = sub.add_parser("register", help="Registra um .joblib como nova versão")
+    reg.add_argument("model_path")
+    reg.add_argument("--version", required=True)
+
+    prom = sub.add_parser("promote", help="Promove uma versão para produção")
+    prom.add_argument("version")
+
+    shadow = sub.add_parser("shadow", help="Define o modelo candidato (shadow)")
+    shadow.add_argument("version", nargs="?")
+    shadow.add_argument("--clear", action="store_true")
+
+    args = parser.parse_args()
+
+    if args.command == "list":
+        pointers = read_pointers()
+        for version in list_versions():
+            role = " (production)" if version == pointers["production"] else \
+                " (shadow)" if version == pointers["shadow"] else ""
+            meta = read_meta(version)
+            print(f"  {version}{role}  registrado em {meta.get('registered_at', '?')}")
+    elif args.command == "register":
+        path = register(args.model_path, args.version)
+        print(f"[inference/registry] ✓ {args.version} registrado em {path}")
+    elif args.command == "promote":
+        promote(args.version)
+        print(f"[inference/registry] ✓ {args.version} promovido para produção")
+    elif args.command == "shadow":
+        if args.clear:
+            set_shadow(None)
+            print("[inference/registry] ✓ Shadow desativado")
+        elif args.version:
+            set_shadow(args.version)
+            print(f"[inference/registry] ✓ {args.version} em shadow mode")
+        else:
+            parser.error("informe a versão ou --clear")
+
+
+if __name__ == "__main__":
+    main()
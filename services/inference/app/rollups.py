@@ -0,0 +1,29 @@
+"""
+Rollups — Probabilidade das predições novas nas séries por setor e país.
+
+Buckets, formato dos documentos e retenção em shared.rollups (os mesmos
+que o analysis usa para count/impact/sentiment dos eventos).
+"""
+
+from datetime import datetime
+
+from shared.rollups import RollupBatch
+
+
+def record_predictions(collection, docs: list[dict]) -> int:
+    """Soma a probabilidade das predições novas nos buckets do seu predicted_at."""
+    batch = RollupBatch()
+    for doc in docs:
+        probability = doc.get("probability")
+        if probability is None:
+            continue
+        try:
+            at = datetime.fromisoformat(doc["predicted_at"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        batch.add(
+            at,
+            {"sector": doc.get("sector"), "country": doc.get("country")},
+            {"probability_sum": probability, "probability_count": 1},
+        )
+    return batch.write(collection)
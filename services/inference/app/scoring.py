@@ -0,0 +1,39 @@
+"""
+Scoring — Caminho síncrono evento(s) → probabilidade, compartilhado pelo
+loop da fila e pela API HTTP. Usa o mesmo modelo em memória e o mesmo
+extrator de features.
+"""
+
+from .features import FEATURE_NAMES, extract_feature_matrix
+from . import cascade
+from .model import get_confidence_label
+
+_POLICY_COLUMN = FEATURE_NAMES.index("has_policy_keyword")
+
+
+def impact_category(sector: str, has_policy_keyword) -> str:
+    """Determina a categoria de impacto exibida no dashboard."""
+    if has_policy_keyword:
+        return "Impacto de Políticas Públicas"
+    if sector in ("Macro", "Commodities", "Market"):
+        return "Impacto Macroeconômico"
+    return "Impacto Setorial"
+
+
+def score_events(events: list[dict]) -> list[dict]:
+    """Pontua um lote de eventos (sem LLM, sem persistência)."""
+    x = extract_feature_matrix(events)
+    # Contagens à parte: chamadas what-if não entram nas taxas da pipeline
+    results = cascade.route(x, cascade.http_stats)
+    return [
+        {
+            "event_id": event.get("id"),
+            "probability": probability,
+            "confidence": get_confidence_label(probability),
+            "impact_category": impact_category(event.get("sector", ""), row[_POLICY_COLUMN]),
+            "model_version": model_version,
+            "cascade_tier": tier,
+            "top_features": top_features,
+        }
+        for event, row, (probability, model_version, tier, top_features) in zip(events, x, results)
+    ]
@@ -0,0 +1,112 @@
+"""
+Inference API — Scoring HTTP síncrono de baixa latência.
+
+Compartilha o modelo em memória e o extrator de features com o loop da
+fila (mesmo processo). Útil para what-if no dashboard e para teste de
+carga do caminho do modelo isolado do pipeline.
+
+Endpoints:
+    POST /score         → um evento
+    POST /score/batch   → lista de eventos
+    GET  /health
+    GET  /metrics       → histogramas (formato Prometheus, ver metrics.py)
+
+Sobe junto com o worker (INFERENCE_HTTP_PORT, default 8001) ou sozinho:
+    uvicorn app.server:app --port 8001
+"""
+
+import threading
+import time
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel, Field
+
+from . import cascade, metrics
+from .model import current_versions, prediction_cache
+from .scoring import score_events
+
+MAX_BATCH = 1000
+
+app = FastAPI(title="OpenFinance Intel — Inference API")
+
+
+class Sentiment(BaseModel):
+    polarity: float = 0.0
+    label: str = "Neutral"
+
+
+class Analytics(BaseModel):
+    sentiment: Sentiment = Field(default_factory=Sentiment)
+    score: int = 0
+
+
+class Source(BaseModel):
+    url: str = ""
+
+
+class ScoreEvent(BaseModel):
+    """Evento enriquecido (mesmo schema do analysis); só o título é obrigatório."""
+    id: str | None = None
+    title: str
+    description: str = ""
+    sector: str = ""
+    sub_sector: str = ""
+    impact: str = "low"
+    urgency: str = "normal"
+    keywords: list[str] = Field(default_factory=list)
+    entities: list = Field(default_factory=list)
+    analytics: Analytics = Field(default_factory=Analytics)
+    source: Source = Field(default_factory=Source)
+    link: str = ""
+
+
+class ScoreBatchRequest(BaseModel):
+    events: list[ScoreEvent] = Field(max_length=MAX_BATCH)
+
+
+def _score(events: list[ScoreEvent]) -> tuple[list[dict], float]:
+    start = time.perf_counter()
+    results = score_events([event.model_dump() for event in events])
+    return results, round((time.perf_counter() - start) * 1000, 3)
+
+
+@app.get("/health")
+def health() -> dict:
+    return {
+        "status": "ok",
+        "models": current_versions(),
+        "cascade": cascade.stats.snapshot(),
+        "cascade_http": cascade.http_stats.snapshot(),
+        "prediction_cache": prediction_cache.stats(),
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics_endpoint() -> PlainTextResponse:
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.post("/score")
+def score(event: ScoreEvent) -> dict:
+    results, latency_ms = _score([event])
+    return {**results[0], "latency_ms": latency_ms}
+
+
+@app.post("/score/batch")
+def score_batch(request: ScoreBatchRequest) -> dict:
+    if not request.events:
+        return {"results": [], "latency_ms": 0.0}
+    results, latency_ms = _score(request.events)
+    return {"results": results, "latency_ms": latency_ms}
+
+
+def start_in_background(port: int) -> threading.Thread:
+    """Sobe o servidor HTTP numa thread daemon, dentro do processo do worker."""
+    import uvicorn
+
+    config = uvicorn.Config(app, host="0.0.0.0", port=port, log_level="warning")
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, name="inference-http", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,30 @@
+"""
+Stream — Publica as predições novas para os dashboards (SSE via API).
+
+Canal Redis `stream:predictions` (pub/sub), uma mensagem por predição
+nova, na view card de GET /predictions; a API repassa aos clientes de
+GET /stream conforme o filtro (sector, region). Ver services/api/app/stream.py.
+"""
+
+import json
+
+STREAM_PREDICTIONS_CHANNEL = "stream:predictions"
+CARD_FIELDS = (
+    "event_id", "event_title", "sector", "sub_sector", "probability", "confidence",
+    "impact_category", "top_features", "llm_reasoning", "llm_status", "model_version",
+    "cascade_tier", "predicted_at",
+)
+
+
+def publish_predictions(redis_client, docs: list[dict]) -> None:
+    """Publica as predições num único pipeline (chamado no on_insert do writer)."""
+    if not docs:
+        return
+    pipe = redis_client.pipeline(transaction=False)
+    for doc in docs:
+        message = {
+            "filter": {"sector": doc.get("sector"), "region": doc.get("country")},
+            "item": {field: doc[field] for field in CARD_FIELDS if field in doc},
+        }
+        pipe.publish(STREAM_PREDICTIONS_CHANNEL, json.dumps(message, default=str))
+    pipe.execute()
@@ -0,0 +1,221 @@
+"""
+Writer — Persistência em lote das predições.
+
+Acumula as escritas em memória e as envia ao MongoDB num único
+bulk_write(ordered=False), quando o buffer enche ou o intervalo de flush
+vence (o que vier primeiro). Semântica at-least-once: se o flush falha,
+as operações voltam para o buffer e são reenviadas no próximo flush
+(todas são $set idempotentes).
+
+Cada upsert leva o `content_hash` da predição (sem predicted_at e
+latências). No flush, os upserts cujo hash já está gravado são
+descartados: re-pontuar um evento sem mudança não regrava o documento,
+não move o updated_at (delta-sync) nem a versão de escrita.
+
+O buffer guarda no máximo UMA operação por event_id. Como um bulk
+não-ordenado pode executar as operações em qualquer ordem, um patch
+(ex.: ajuste do LLM) sobre uma predição ainda não gravada é mesclado
+na própria operação de upsert em vez de virar uma segunda operação.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from typing import Callable
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, OperationFailure
+
+from .metrics import MONGO_WRITE_SECONDS
+
+# Contador de versão de escrita no Redis: invalida o cache de respostas da API
+PREDICTIONS_VERSION_KEY = "write_version:predictions"
+
+
+# Mudam a cada re-pontuação sem mudar a predição
+VOLATILE_PREDICTION_FIELDS = ("predicted_at", "model_latency_ms", "content_hash")
+
+
+def prediction_content_hash(fields: dict) -> str:
+    """Hash do conteúdo da predição (campos voláteis e latência do shadow de fora)."""
+    content = {k: v for k, v in fields.items() if k not in VOLATILE_PREDICTION_FIELDS}
+    if isinstance(content.get("shadow"), dict):
+        content["shadow"] = {k: v for k, v in content["shadow"].items() if k != "latency_ms"}
+    return hashlib.md5(
+        json.dumps(content, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")
+    ).hexdigest()
+
+
+class _PendingWrite:
+    __slots__ = ("query", "fields", "upsert")
+
+    def __init__(self, query: dict, fields: dict, upsert: bool):
+        self.query = query
+        self.fields = fields
+        self.upsert = upsert
+
+    def to_operation(self) -> UpdateOne:
+        # updated_at (relógio do Mongo): cursor do delta-sync da API (GET /predictions?since=)
+        return UpdateOne(
+            self.query, {"$set": self.fields, "$currentDate": {"updated_at": True}}, upsert=self.upsert
+        )
+
+
+class PredictionWriter:
+    """Buffer de escritas para a collection de predições."""
+
+    def __init__(
+        self,
+        collection,
+        max_batch: int = 500,
+        flush_interval: float = 1.0,
+        on_flush: Callable[[int], None] | None = None,
+        on_insert: Callable[[list[dict]], None] | None = None,
+    ):
+        self.collection = collection
+        # Chamado com o nº de documentos inseridos/alterados após cada flush que mudou algo
+        self.on_flush = on_flush
+        # Chamado com os documentos das predições novas (upserts que inseriram)
+        self.on_insert = on_insert
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self._pending: dict[str, _PendingWrite] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._thread: threading.Thread | None = None
+
+    def ensure_indexes(self) -> None:
+        """Índice único do upsert por event_id (os de leitura são declarados na API)."""
+        try:
+            self.collection.create_index("event_id", unique=True)
+        except OperationFailure as e:
+            print(f"[inference] ⚠️  Índice predictions.event_id não criado: {e}")
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def upsert(self, event_id: str, doc: dict) -> None:
+        """Agenda o upsert da predição completa de um evento."""
+        with self._lock:
+            fields = {**doc, "content_hash": prediction_content_hash(doc)}
+            self._pending[event_id] = _PendingWrite({"event_id": event_id}, fields, upsert=True)
+        if len(self._pending) >= self.max_batch:
+            self.flush()
+
+    def patch(self, event_id: str, predicted_at: str, fields: dict) -> None:
+        """
+        Agenda uma atualização parcial da predição feita em `predicted_at`.
+        Se essa predição ainda está no buffer, o patch é mesclado nela;
+        se o buffer já tem uma predição mais nova do evento, o patch é descartado.
+        """
+        with self._lock:
+            pending = self._pending.get(event_id)
+            if pending is None:
+                self._pending[event_id] = _PendingWrite(
+                    {"event_id": event_id, "predicted_at": predicted_at}, dict(fields), upsert=False
+                )
+            elif pending.upsert and pending.fields.get("predicted_at") != predicted_at:
+                return
+            else:
+                pending.fields.update(fields)
+
+    def maybe_flush(self) -> int:
+        """Faz flush se o buffer encheu ou o intervalo venceu."""
+        if len(self._pending) >= self.max_batch or time.monotonic() - self._last_flush >= self.flush_interval:
+            return self.flush()
+        return 0
+
+    def flush(self) -> int:
+        """Envia o buffer num bulk_write não-ordenado. Retorna nº de operações gravadas."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+            for event_id in self._unchanged(batch):
+                del batch[event_id]
+            if not batch:
+                return 0
+
+            keys = list(batch)
+            operations = [batch[key].to_operation() for key in keys]
+            start = time.perf_counter()
+            try:
+                result = self.collection.bulk_write(operations, ordered=False)
+                written = len(operations)
+                inserted = list(result.upserted_ids)
+                changed = result.upserted_count + result.modified_count
+            except BulkWriteError as e:
+                failed = {error["index"] for error in e.details.get("writeErrors", [])}
+                inserted = [upserted["index"] for upserted in e.details.get("upserted", [])]
+                changed = e.details.get("nUpserted", 0) + e.details.get("nModified", 0)
+                print(f"[inference/writer] ✕ {len(failed)}/{len(operations)} escritas falharam; reenfileirando.")
+                self._requeue({keys[i]: batch[keys[i]] for i in failed})
+                written = len(operations) - len(failed)
+            except Exception as e:
+                print(f"[inference/writer] ✕ Falha no bulk_write ({len(operations)} ops); reenfileirando: {e}")
+                self._requeue(batch)
+                return 0
+            finally:
+                MONGO_WRITE_SECONDS.observe(
+                    time.perf_counter() - start, collection=getattr(self.collection, "name", "predictions")
+                )
+
+            # Só documentos inseridos/alterados (patch que não casou não conta)
+            if changed and self.on_flush is not None:
+                try:
+                    self.on_flush(changed)
+                except Exception as e:
+                    print(f"[inference/writer] ✕ Erro no callback de flush: {e}")
+            if inserted and self.on_insert is not None:
+                try:
+                    self.on_insert([batch[keys[i]].fields for i in inserted])
+                except Exception as e:
+                    print(f"[inference/writer] ✕ Erro no callback de inserção: {e}")
+            return written
+
+    def _unchanged(self, batch: dict[str, _PendingWrite]) -> list[str]:
+        """Upserts do lote cujo content_hash já está gravado (uma consulta por flush)."""
+        hashes = {
+            event_id: pending.fields["content_hash"]
+            for event_id, pending in batch.items()
+            if pending.upsert and "content_hash" in pending.fields
+        }
+        if not hashes:
+            return []
+        try:
+            stored = self.collection.find(
+                {"event_id": {"$in": list(hashes)}}, {"_id": 0, "event_id": 1, "content_hash": 1}
+            )
+            return [doc["event_id"] for doc in stored if doc.get("content_hash") == hashes[doc["event_id"]]]
+        except Exception as e:
+            # Sem a leitura, grava tudo (como antes): só perde a economia
+            print(f"[inference/writer] ⚠️  Falha ao ler content_hash; gravando o lote inteiro: {e}")
+            return []
+
+    def _requeue(self, failed: dict[str, _PendingWrite]) -> None:
+        """Devolve escritas falhas ao buffer, sem sobrescrever versões mais novas."""
+        with self._lock:
+            for event_id, pending in failed.items():
+                newer = self._pending.get(event_id)
+                if newer is None:
+                    self._pending[event_id] = pending
+                elif not newer.upsert and pending.upsert and \
+                        newer.query.get("predicted_at") == pending.fields.get("predicted_at"):
+                    # Patch chegou depois do upsert que falhou: mescla no upsert
+                    pending.fields.update(newer.fields)
+                    self._pending[event_id] = pending
+
+    def start(self) -> None:
+        """Inicia a thread que garante o flush periódico mesmo com a fila parada."""
+        if self._thread is not None:
+            return
+
+        def _loop():
+            while True:
+                time.sleep(self.flush_interval)
+                self.maybe_flush()
+
+        self._thread = threading.Thread(target=_loop, name="prediction-writer", daemon=True)
+        self._thread.start()
@@ -0,0 +1,13 @@
+"""
+Shared — Código comum aos serviços que escrevem nas mesmas estruturas.
+
+    shared.mood      script Lua e chaves do índice de humor   (analysis, inference)
+    shared.rollups   buckets e upserts dos rollups            (analysis, inference)
+
+Os serviços que o usam são construídos com contexto `services/` (ver
+docker-compose.yml) e copiam este pacote para /app/shared. Fora do
+Docker, rodar com services/ no PYTHONPATH:
+
+    PYTHONPATH=services python services/analysis/app/main.py
+    cd services/inference && PYTHONPATH=.. python -m app.main
+"""
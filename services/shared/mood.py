@@ -0,0 +1,55 @@
+"""
+Mood — Índice de humor do mercado com decaimento exponencial, no Redis.
+
+Por (métrica, escopo, meia-vida), um hash `mood:{métrica}:{escopo}:{meia_vida}`
+com a soma ponderada `s`, o peso `w` e o instante `t` da última atualização.
+Cada amostra x no instante `now`:
+
+    decay = 2 ^ (-(now - t) / meia_vida)
+    s = s * decay + x
+    w = w * decay + 1
+    média = s / w          (EWMA irregular no tempo; w ≈ atividade recente)
+
+Atualização O(1) por evento num script Lua (atômico, relógio do Redis,
+sem corrida entre analysis e inference). Métricas:
+
+    sentiment     polaridade dos eventos novos (analysis)
+    probability   probabilidade de impacto das predições novas (inference)
+
+Escopos: "all" e o setor do evento. Meias-vidas em segundos, via
+MOOD_HALF_LIVES (default "900,14400": 15 min e 4 h). A API lê em GET /mood.
+"""
+
+import os
+
+MOOD_HALF_LIVES = [int(h) for h in os.getenv("MOOD_HALF_LIVES", "900,14400").split(",") if h.strip()]
+MOOD_KEYS_SET = "mood:keys"
+
+# KEYS[1]: set com os hashes existentes, KEYS[2..]: hashes a atualizar
+# ARGV[1]: amostra, ARGV[i]: meia-vida de KEYS[i]
+UPDATE_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+local x = tonumber(ARGV[1])
+for i = 2, #KEYS do
+    local half_life = tonumber(ARGV[i])
+    local state = redis.call('HMGET', KEYS[i], 's', 'w', 't')
+    local s = tonumber(state[1]) or 0
+    local w = tonumber(state[2]) or 0
+    local t = tonumber(state[3]) or now
+    local decay = 2 ^ (-math.max(now - t, 0) / half_life)
+    redis.call('HSET', KEYS[i], 's', s * decay + x, 'w', w * decay + 1, 't', now)
+    redis.call('SADD', KEYS[1], KEYS[i])
+end
+return #KEYS - 1
+"""
+
+
+def update_args(metric: str, sector: str | None, value: float, half_lives: list[int] | None = None) -> tuple[list, list]:
+    """KEYS e ARGV do UPDATE_SCRIPT para uma amostra: escopos "all" e setor, todas as meias-vidas."""
+    keys, args = [MOOD_KEYS_SET], [value]
+    for scope in ("all", sector or "Global"):
+        for half_life in half_lives or MOOD_HALF_LIVES:
+            keys.append(f"mood:{metric}:{scope}:{half_life}")
+            args.append(half_life)
+    return keys, args
@@ -0,0 +1,78 @@
+"""
+Rollups — Séries temporais agregadas por setor e por país.
+
+Collection `rollups`, um documento por (resolução, dimensão, chave, bucket):
+
+    {"_id": "1m|sector|Tech|2026-10-19T15:42", "resolution": "1m",
+     "dimension": "sector", "key": "Tech", "bucket": <início do bucket>,
+     "count", "impact": {"high", "medium", "low"}, "sentiment_sum",
+     "sentiment_count", "probability_sum", "probability_count", "expires_at"}
+
+O analysis incrementa count/impact/sentiment de cada evento novo; o
+inference incrementa probability_* de cada predição nova (no flush do
+writer). Tudo via $inc com upsert, agrupado por documento antes do
+bulk_write. O bucket é o horário de processamento (analyzed_at /
+predicted_at), então um evento e sua predição caem no mesmo bucket.
+
+Retenção por resolução (índice TTL em expires_at, criado pelo analysis):
+    1m  ROLLUP_MINUTE_RETENTION_HOURS (48h)
+    1h  ROLLUP_HOUR_RETENTION_DAYS    (30 dias)
+"""
+
+import os
+from datetime import datetime, timedelta
+
+from pymongo import UpdateOne
+
+RESOLUTIONS = {
+    "1m": (timedelta(minutes=1), timedelta(hours=int(os.getenv("ROLLUP_MINUTE_RETENTION_HOURS", "48")))),
+    "1h": (timedelta(hours=1), timedelta(days=int(os.getenv("ROLLUP_HOUR_RETENTION_DAYS", "30")))),
+}
+
+
+def bucket_start(at: datetime, step: timedelta) -> datetime:
+    """Início do bucket de `at` (UTC sem tzinfo, como o Mongo devolve)."""
+    at = at.replace(tzinfo=None)
+    if step >= timedelta(hours=1):
+        return at.replace(minute=0, second=0, microsecond=0)
+    return at.replace(second=0, microsecond=0)
+
+
+class RollupBatch:
+    """Acumula incrementos de um lote e os converte em um upsert por documento."""
+
+    def __init__(self):
+        self._docs: dict[str, tuple[dict, dict]] = {}  # _id → (campos do insert, incrementos)
+
+    def add(self, at: datetime, dimensions: dict, increments: dict) -> None:
+        for resolution, (step, retention) in RESOLUTIONS.items():
+            bucket = bucket_start(at, step)
+            for dimension, key in dimensions.items():
+                if not key:
+                    continue
+                doc_id = f"{resolution}|{dimension}|{key}|{bucket.isoformat(timespec='minutes')}"
+                entry = self._docs.get(doc_id)
+                if entry is None:
+                    entry = self._docs[doc_id] = ({
+                        "resolution": resolution,
+                        "dimension": dimension,
+                        "key": key,
+                        "bucket": bucket,
+                        "expires_at": bucket + step + retention,
+                    }, {})
+                totals = entry[1]
+                for field, value in increments.items():
+                    totals[field] = totals.get(field, 0) + value
+
+    def operations(self) -> list[UpdateOne]:
+        return [
+            UpdateOne({"_id": doc_id}, {"$inc": increments, "$setOnInsert": fields}, upsert=True)
+            for doc_id, (fields, increments) in self._docs.items()
+        ]
+
+    def write(self, collection) -> int:
+        """Grava o lote num bulk_write não-ordenado; retorna o nº de documentos."""
+        operations = self.operations()
+        if operations:
+            collection.bulk_write(operations, ordered=False)
+        return len(operations)
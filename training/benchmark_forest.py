@@ -0,0 +1,117 @@
+"""
+benchmark_forest.py — Valida e mede o avaliador vetorizado (FlatForest)
+
+Compara o FlatForest do inference service com o predict_proba do sklearn
+sobre o dataset de treinamento (igualdade bit a bit) e mede latência
+p50/p99 para uma linha e para um lote.
+
+Uso:
+    python training/benchmark_forest.py
+    python training/benchmark_forest.py --model services/inference/models/impact_model_v1.joblib
+    python training/benchmark_forest.py --runs 2000 --batch-size 64
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "services", "inference"))
+
+from app.features import feature_names  # noqa: E402
+from app.forest import FlatForest  # noqa: E402
+
+MODEL_PATH = os.path.join(ROOT, "services", "inference", "models", "impact_model_v1.joblib")
+
+
+def measure(fn, runs: int) -> tuple[float, float]:
+    """Executa fn() `runs` vezes e retorna (p50, p99) em microssegundos."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1e6)
+    return float(np.percentile(timings, 50)), float(np.percentile(timings, 99))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Valida e mede o FlatForest contra o sklearn")
+    parser.add_argument("--input", default="training/dataset.csv", help="CSV de entrada")
+    parser.add_argument("--model", default=MODEL_PATH, help="Modelo sklearn (.joblib)")
+    parser.add_argument("--runs", type=int, default=1000, help="Repetições por medição")
+    parser.add_argument("--batch-size", type=int, default=64, help="Tamanho do lote medido")
+    args = parser.parse_args()
+
+    print(f"\n{'='*60}")
+    print(f"  OpenFinance Intel — FlatForest Benchmark")
+    print(f"{'='*60}")
+    print(f"  Input:       {args.input}")
+    print(f"  Model:       {args.model}")
+    print(f"  Runs:        {args.runs}")
+    print(f"  Batch Size:  {args.batch_size}")
+    print(f"{'='*60}\n")
+
+    df = pd.read_csv(args.input)
+    X = df[feature_names()].values
+
+    model = joblib.load(args.model)
+    # Soma sequencial das árvores: com n_jobs > 1 a ordem da soma no sklearn varia
+    model.n_jobs = 1
+    forest = FlatForest.from_sklearn(model)
+    print(f"🌲 {forest.n_trees} árvores | {forest.n_nodes} nós | profundidade {forest.max_depth}")
+
+    # ── 1. Igualdade bit a bit ──
+    expected = model.predict_proba(X)
+    got = forest.predict_proba(X)
+    row_by_row = np.vstack([forest.predict_proba(x) for x in X])
+
+    # Formato compacto (.forest via memmap, thresholds float32)
+    with tempfile.TemporaryDirectory() as tmp:
+        compact_path = os.path.join(tmp, "model.forest")
+        forest.save(compact_path)
+        compact_kb = os.path.getsize(compact_path) / 1024
+        start = time.perf_counter()
+        compact = FlatForest.load(compact_path)
+        load_ms = (time.perf_counter() - start) * 1000
+        from_disk = compact.predict_proba(X)
+    start = time.perf_counter()
+    joblib.load(args.model)
+    joblib_ms = (time.perf_counter() - start) * 1000
+
+    identical = all(np.array_equal(expected, other) for other in (got, row_by_row, from_disk))
+
+    print(f"\n📋 Validação ({len(X)} amostras):")
+    print(f"   Diferença máxima: {np.abs(expected - got).max():.3e}")
+    print(f"   Bit a bit:        {'✅ idêntico' if identical else '❌ DIVERGENTE'} (memória e .forest)")
+    if not identical:
+        sys.exit(1)
+
+    print(f"\n📦 Cold start:")
+    print(f"   joblib.load:      {joblib_ms:8.1f} ms ({os.path.getsize(args.model) / 1024:.1f} KB)")
+    print(f"   .forest (memmap): {load_ms:8.1f} ms ({compact_kb:.1f} KB)")
+
+    # ── 2. Latência ──
+    one = X[:1]
+    batch = X[: args.batch_size]
+    results = [
+        ("sklearn  1 linha", measure(lambda: model.predict_proba(one), args.runs)),
+        ("forest   1 linha", measure(lambda: forest.predict_proba(one), args.runs)),
+        (f"sklearn  {len(batch)} linhas", measure(lambda: model.predict_proba(batch), args.runs)),
+        (f"forest   {len(batch)} linhas", measure(lambda: forest.predict_proba(batch), args.runs)),
+    ]
+
+    print(f"\n⏱️  Latência (µs):")
+    print(f"   {'':<20s} {'p50':>10s} {'p99':>10s}")
+    for name, (p50, p99) in results:
+        print(f"   {name:<20s} {p50:>10.1f} {p99:>10.1f}")
+    print()
+
+
+if __name__ == "__main__":
+    main()
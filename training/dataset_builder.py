@@ -18,87 +18,30 @@ from datetime import datetime
 from pymongo import MongoClient
 
 # ──────────────────────────────────────────────
-# Feature extraction (réplica exata do inference)
+# Feature extraction (compartilhada com o inference service)
 # ──────────────────────────────────────────────
-SECTOR_MAP = {
-    "Crypto": 0, "Tech": 1, "Market": 2,
-    "Macro": 3, "Commodities": 4, "Social": 5,
-}
-
-SUB_SECTOR_MAP = {
-    "Monetary Policy": 0, "Geopolitics": 1, "Fiscal Policy": 2,
-    "Economic Data": 3, "General": 4,
-    "DeFi": 5, "Regulation": 6, "Mining": 7,
-    "AI": 8, "Semiconductors": 9, "Cybersecurity": 10,
-}
-
-CRISIS_KEYWORDS = [
-    "crash", "colapso", "recessão", "recession", "default", "guerra",
-    "war", "sanção", "sanction", "tariff", "tarifa", "impeachment",
-    "crise", "crisis", "falência", "bankruptcy", "shutdown",
-    "emergência", "emergency", "inflação", "inflation",
-    "selic", "fed", "juros", "rates", "hike",
-]
-
-POLICY_KEYWORDS = [
-    "governo", "government", "lei", "law", "regulação", "regulation",
-    "ministério", "ministry", "congresso", "congress", "senado", "senate",
-    "reforma", "reform", "tributária", "fiscal", "orçamento", "budget",
-    "subsídio", "subsidy", "privatização", "privatization",
-    "lula", "haddad", "campos neto", "galípolo",
-    "powell", "yellen", "lagarde", "biden", "trump",
-]
-
-FEATURE_NAMES = [
-    "sentiment_polarity", "sentiment_abs", "impact_score",
-    "sector_encoded", "sub_sector_encoded",
-    "keyword_count", "entity_count",
-    "title_length", "description_length",
-    "has_crisis_keyword", "has_policy_keyword",
-    "is_social_source", "urgency_encoded", "impact_encoded",
-]
-
-
-def extract_features(event: dict) -> dict:
-    """Extrai features numéricas de um evento — idêntico ao inference/app/features.py."""
-    analytics = event.get("analytics", {})
-    sentiment = analytics.get("sentiment", {})
-    title = event.get("title", "")
-    description = event.get("description", "")
-    full_text = f"{title} {description}".lower()
-    source = event.get("source", {})
-    source_url = (source.get("url", "") or "").lower()
-    link = (event.get("link", "") or "").lower()
-
-    return {
-        "sentiment_polarity": sentiment.get("polarity", 0.0),
-        "sentiment_abs": abs(sentiment.get("polarity", 0.0)),
-        "impact_score": analytics.get("score", 0),
-        "sector_encoded": SECTOR_MAP.get(event.get("sector", ""), 5),
-        "sub_sector_encoded": SUB_SECTOR_MAP.get(event.get("sub_sector", ""), 4),
-        "keyword_count": len(event.get("keywords", [])),
-        "entity_count": len(event.get("entities", [])),
-        "title_length": len(title),
-        "description_length": len(description),
-        "has_crisis_keyword": 1 if any(k in full_text for k in CRISIS_KEYWORDS) else 0,
-        "has_policy_keyword": 1 if any(k in full_text for k in POLICY_KEYWORDS) else 0,
-        "is_social_source": 1 if any(
-            d in source_url or d in link
-            for d in ["reddit.com", "twitter.com", "x.com", "nitter."]
-        ) else 0,
-        "urgency_encoded": {"critical": 3, "urgent": 2, "normal": 1, "low": 0}.get(
-            event.get("urgency", "normal"), 1
-        ),
-        "impact_encoded": {"high": 3, "medium": 2, "low": 1}.get(
-            event.get("impact", "low"), 1
-        ),
-    }
+sys.path.insert(0, os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "services", "inference",
+))
+
+from app.features import FEATURE_NAMES, FEATURE_VERSION, extract_feature_matrix  # noqa: E402
+from app.feature_store import FeatureStore  # noqa: E402
+
+CRISIS_COLUMN = FEATURE_NAMES.index("has_crisis_keyword")
+POLICY_COLUMN = FEATURE_NAMES.index("has_policy_keyword")
+
+
+def csv_value(value) -> int | float:
+    """Valor float32 da matriz → número legível no CSV (inteiros sem '.0')."""
+    value = float(str(value))
+    return int(value) if value.is_integer() else value
 
 
 # ──────────────────────────────────────────────
 # Labeling heurístico automático
 # ──────────────────────────────────────────────
-def auto_label(event: dict, all_titles: dict) -> int:
+def auto_label(event: dict, all_titles: dict, has_crisis: bool, has_policy: bool) -> int:
     """
     Rotula automaticamente um evento como alto impacto (1) ou baixo (0).
 
@@ -112,18 +55,14 @@ def auto_label(event: dict, all_titles: dict) -> int:
       - Impacto = low E sem urgência
 
     Eventos ambíguos recebem label baseado no score médio.
+    has_crisis/has_policy vêm do vetor de features (sem nova varredura de texto).
     """
     analytics = event.get("analytics", {})
     score = analytics.get("score", 0)
     title = event.get("title", "")
-    description = event.get("description", "")
-    full_text = f"{title} {description}".lower()
     impact = event.get("impact", "low")
     urgency = event.get("urgency", "normal")
 
-    has_crisis = any(k in full_text for k in CRISIS_KEYWORDS)
-    has_policy = any(k in full_text for k in POLICY_KEYWORDS)
-
     # Título normalizado para dedup
     title_key = title.lower().strip()[:60]  # primeiros 60 chars
     source_count = all_titles.get(title_key, 1)
@@ -168,6 +107,7 @@ def main():
     parser.add_argument("--db", default="sentinelwatch", help="Nome do banco")
     parser.add_argument("--output", default="training/dataset.csv", help="Caminho do CSV de saída")
     parser.add_argument("--min-events", type=int, default=50, help="Mínimo de eventos para exportar")
+    parser.add_argument("--recompute", action="store_true", help="Ignora o feature store e recalcula tudo")
     args = parser.parse_args()
 
     print(f"\n{'='*60}")
@@ -200,12 +140,22 @@ def main():
     dataset = []
     label_counts = {0: 0, 1: 0}
 
-    for event in events:
-        features = extract_features(event)
-        label = auto_label(event, title_freq)
+    # Features: lidas em bulk do feature store; só recalcula o que faltar
+    # ou estiver em outra versão de schema (e regrava no store)
+    store = FeatureStore(db["features"])
+    if args.recompute:
+        matrix = extract_feature_matrix(events)
+        store.put_many([e.get("id") for e in events], matrix)
+        recomputed = total
+    else:
+        matrix, recomputed = store.load_matrix(events)
+    print(f"🧮 Features v{FEATURE_VERSION}: {total - recomputed} do store, {recomputed} recalculadas")
+
+    for event, values in zip(events, matrix):
+        label = auto_label(event, title_freq, bool(values[CRISIS_COLUMN]), bool(values[POLICY_COLUMN]))
         label_counts[label] += 1
 
-        row = {name: features[name] for name in FEATURE_NAMES}
+        row = {name: csv_value(value) for name, value in zip(FEATURE_NAMES, values)}
         row["label"] = label
         row["event_id"] = event.get("id", "")
         row["title"] = event.get("title", "")[:100]
@@ -26,19 +26,16 @@ from sklearn.metrics import (
 )
 import joblib
 
-# Features — deve ser EXATAMENTE a mesma lista do inference/app/features.py
-FEATURE_NAMES = [
-    "sentiment_polarity", "sentiment_abs", "impact_score",
-    "sector_encoded", "sub_sector_encoded",
-    "keyword_count", "entity_count",
-    "title_length", "description_length",
-    "has_crisis_keyword", "has_policy_keyword",
-    "is_social_source", "urgency_encoded", "impact_encoded",
-]
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Features — mesma lista (e ordem de colunas) do inference/app/features.py
+sys.path.insert(0, os.path.join(ROOT, "services", "inference"))
+from app.features import FEATURE_NAMES  # noqa: E402
+from app import registry  # noqa: E402
+from app.forest import FlatForest  # noqa: E402
 
 MODEL_OUTPUT = os.path.join(
-    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
-    "services", "inference", "models", "impact_model_v1.joblib"
+    ROOT, "services", "inference", "models", "impact_model_v1.joblib"
 )
 
 
@@ -50,6 +47,7 @@ def main():
     parser.add_argument("--max-depth", type=int, default=10, help="Profundidade máxima")
     parser.add_argument("--test-size", type=float, default=0.2, help="Fração de teste")
     parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    parser.add_argument("--register", metavar="VERSION", help="Registra o modelo no registry (ex: rf_v2)")
     args = parser.parse_args()
 
     print(f"\n{'='*60}")
@@ -79,7 +77,8 @@ def main():
         sys.exit(1)
 
     # ── 2. Preparar X e y ──
-    X = df[FEATURE_NAMES].values
+    # float32 — mesmo dtype da matriz de inferência (extract_feature_matrix)
+    X = df[FEATURE_NAMES].to_numpy(dtype=np.float32)
     y = df["label"].values
 
     print(f"   Features:     {X.shape[1]}")
@@ -120,6 +119,7 @@ def main():
     y_proba = model.predict_proba(X_test)
 
     acc = accuracy_score(y_test, y_pred)
+    auc = None
     print(f"{'─'*60}")
     print(f"  RESULTADOS")
     print(f"{'─'*60}")
@@ -159,11 +159,33 @@ def main():
     os.makedirs(os.path.dirname(args.output), exist_ok=True)
     joblib.dump(model, args.output)
     model_size = os.path.getsize(args.output) / 1024
+
+    # Formato compacto (.forest) ao lado — o inference service o prefere
+    forest_output = os.path.splitext(args.output)[0] + ".forest"
+    FlatForest.from_sklearn(model).save(forest_output)
+    forest_size = os.path.getsize(forest_output) / 1024
+
     print(f"\n{'='*60}")
     print(f"  ✅ Modelo salvo: {args.output}")
     print(f"  📦 Tamanho:      {model_size:.1f} KB")
+    print(f"  🗜️  Compacto:     {forest_output} ({forest_size:.1f} KB)")
     print(f"{'='*60}")
 
+    # ── 9. Registry (opcional) ──
+    if args.register:
+        metrics = {
+            "accuracy": round(float(acc), 4),
+            "auc": round(float(auc), 4) if auc is not None else None,
+            "cv_accuracy": round(float(cv_scores.mean()), 4),
+            "n_samples": int(len(df)),
+            "estimators": args.estimators,
+            "max_depth": args.max_depth,
+        }
+        path = registry.register(args.output, args.register, metrics)
+        print(f"\n📚 Registrado como {args.register}: {path}")
+        print(f"   Shadow:   python -m app.registry shadow {args.register}")
+        print(f"   Promover: python -m app.registry promote {args.register}")
+
     print(f"\n💡 Próximo passo:")
     print(f"   docker compose up --build inference")
     print(f"   → O modelo será carregado automaticamente na inicialização.\n")